@@ -30,6 +30,8 @@ def run_migrations_online() -> None:
         url = os.environ.get("DATABASE_URL")
         if url.startswith("postgres://"):
             url = url.replace("postgres://", "postgresql://", 1)
+        # アプリ用の非同期ドライバ指定（+asyncpg / +aiosqlite）はマイグレーションでは同期ドライバに読み替える
+        url = url.replace("+asyncpg", "", 1).replace("+aiosqlite", "", 1)
         configuration["sqlalchemy.url"] = url
 
     connectable = engine_from_config(
@@ -0,0 +1,53 @@
+"""Add composite indexes for per-user listings and background jobs
+
+Revision ID: a3d7e9c2f5b8
+Revises: f1c8a4d6b2e7
+Create Date: 2026-10-18 19:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a3d7e9c2f5b8'
+down_revision: Union[str, None] = 'f1c8a4d6b2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (インデックス名, テーブル, 列)。対応するクエリは tests/test_query_plans.py で確認する
+INDEXES = [
+    ("ix_click_logs_link_clicked", "click_logs", ["link_id", "clicked_at"]),
+    ("ix_click_logs_clicked_at", "click_logs", ["clicked_at"]),
+    ("ix_click_hourly_hour", "click_hourly", ["hour"]),
+    ("ix_schedules_user_time", "schedules", ["user_id", "time", "id"]),
+    ("ix_genres_user_name", "genres", ["user_id", "genre_name", "id"]),
+    ("ix_sns_accounts_user_platform", "sns_accounts", ["user_id", "platform"]),
+    ("ix_affiliate_revenue_user_recorded", "affiliate_revenue", ["user_id", "recorded_at"]),
+    ("ix_affiliate_accounts_user", "affiliate_accounts", ["user_id"]),
+    ("ix_affiliate_offers_user_title", "affiliate_offers", ["user_id", "title", "id"]),
+    ("ix_short_links_user", "short_links", ["user_id", "id"]),
+    ("ix_post_outbox_status_next", "post_outbox", ["status", "next_attempt_at"]),
+    ("ix_post_outbox_status_locked", "post_outbox", ["status", "locked_until"]),
+]
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def _has_index(table: str, index: str) -> bool:
+    return any(i["name"] == index for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if _has_table(table) and not _has_index(table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(INDEXES):
+        if _has_table(table) and _has_index(table, name):
+            op.drop_index(name, table_name=table)
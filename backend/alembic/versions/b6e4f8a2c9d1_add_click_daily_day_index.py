@@ -0,0 +1,34 @@
+"""Add click_daily (day, link_id, clicks) index for link cache preload
+
+Revision ID: b6e4f8a2c9d1
+Revises: a3d7e9c2f5b8
+Create Date: 2026-10-18 21:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b6e4f8a2c9d1'
+down_revision: Union[str, None] = 'a3d7e9c2f5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def _has_index(table: str, index: str) -> bool:
+    return any(i["name"] == index for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade() -> None:
+    if _has_table("click_daily") and not _has_index("click_daily", "ix_click_daily_day_link"):
+        op.create_index("ix_click_daily_day_link", "click_daily", ["day", "link_id", "clicks"])
+
+
+def downgrade() -> None:
+    if _has_table("click_daily") and _has_index("click_daily", "ix_click_daily_day_link"):
+        op.drop_index("ix_click_daily_day_link", table_name="click_daily")
@@ -0,0 +1,53 @@
+"""Add schedules.next_run_at and users.timezone
+
+Revision ID: be0b52bb6dd4
+Revises: d2d49ca98ce2
+Create Date: 2026-10-18 10:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'be0b52bb6dd4'
+down_revision: Union[str, None] = 'd2d49ca98ce2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def _has_index(table: str, index: str) -> bool:
+    return any(i["name"] == index for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade() -> None:
+    if _has_table("schedules"):
+        if not _has_column("schedules", "next_run_at"):
+            op.add_column("schedules", sa.Column("next_run_at", sa.DateTime(), nullable=True))
+        if not _has_index("schedules", "ix_schedules_next_run_at"):
+            op.create_index("ix_schedules_next_run_at", "schedules", ["next_run_at"])
+    if _has_table("users") and not _has_column("users", "timezone"):
+        op.add_column(
+            "users",
+            sa.Column("timezone", sa.String(), nullable=False, server_default="Asia/Tokyo"),
+        )
+
+
+def downgrade() -> None:
+    if _has_table("schedules"):
+        if _has_index("schedules", "ix_schedules_next_run_at"):
+            op.drop_index("ix_schedules_next_run_at", table_name="schedules")
+        if _has_column("schedules", "next_run_at"):
+            with op.batch_alter_table("schedules") as batch_op:
+                batch_op.drop_column("next_run_at")
+    if _has_table("users") and _has_column("users", "timezone"):
+        with op.batch_alter_table("users") as batch_op:
+            batch_op.drop_column("timezone")
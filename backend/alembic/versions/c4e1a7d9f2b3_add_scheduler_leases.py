@@ -0,0 +1,36 @@
+"""Add scheduler_leases
+
+Revision ID: c4e1a7d9f2b3
+Revises: be0b52bb6dd4
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c4e1a7d9f2b3'
+down_revision: Union[str, None] = 'be0b52bb6dd4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if not _has_table("scheduler_leases"):
+        op.create_table(
+            "scheduler_leases",
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("holder", sa.String(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+
+def downgrade() -> None:
+    if _has_table("scheduler_leases"):
+        op.drop_table("scheduler_leases")
@@ -0,0 +1,67 @@
+"""Add post_outbox and post_status_events
+
+Revision ID: d7a3c5e8b1f4
+Revises: c4e1a7d9f2b3
+Create Date: 2026-10-18 14:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd7a3c5e8b1f4'
+down_revision: Union[str, None] = 'c4e1a7d9f2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    if not _has_table("post_outbox"):
+        op.create_table(
+            "post_outbox",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("post_id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("platform", sa.String(), nullable=False),
+            sa.Column("sns_account_id", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(["post_id"], ["posts.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.ForeignKeyConstraint(["sns_account_id"], ["sns_accounts.id"], ondelete="SET NULL"),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("post_id"),
+        )
+        op.create_index("ix_post_outbox_next_attempt_at", "post_outbox", ["next_attempt_at"])
+    if not _has_table("post_status_events"):
+        op.create_table(
+            "post_status_events",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("post_id", sa.String(), nullable=False),
+            sa.Column("from_status", sa.String(), nullable=True),
+            sa.Column("to_status", sa.String(), nullable=False),
+            sa.Column("detail", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(["post_id"], ["posts.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_post_status_events_post_id", "post_status_events", ["post_id"])
+
+
+def downgrade() -> None:
+    if _has_table("post_status_events"):
+        op.drop_index("ix_post_status_events_post_id", table_name="post_status_events")
+        op.drop_table("post_status_events")
+    if _has_table("post_outbox"):
+        op.drop_index("ix_post_outbox_next_attempt_at", table_name="post_outbox")
+        op.drop_table("post_outbox")
@@ -0,0 +1,86 @@
+"""Add click_hourly and click_daily rollups
+
+Revision ID: e5b9d2f6a8c1
+Revises: d7a3c5e8b1f4
+Create Date: 2026-10-18 16:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e5b9d2f6a8c1'
+down_revision: Union[str, None] = 'd7a3c5e8b1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def _backfill() -> None:
+    """
+    既存のクリックログからロールアップを作る（ロールアップが空の場合のみ）。
+    行を Python に読み込まず、INSERT ... SELECT ... GROUP BY でDB内で集計する。
+    """
+    bind = op.get_bind()
+    if not _has_table("click_logs") or not _has_table("short_links"):
+        return
+    if bind.execute(sa.text("SELECT COUNT(*) FROM click_daily")).scalar():
+        return
+
+    if bind.dialect.name == "sqlite":
+        # SQLAlchemy が DateTime / Date を保存する文字列形式に合わせる（主キーの一致に必要）
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', c.clicked_at)"
+        day = "date(c.clicked_at)"
+    else:
+        hour = "date_trunc('hour', c.clicked_at)"
+        day = "CAST(c.clicked_at AS DATE)"
+
+    for table, column, bucket in (("click_hourly", "hour", hour), ("click_daily", "day", day)):
+        op.execute(
+            f"INSERT INTO {table} (link_id, {column}, user_id, clicks) "
+            f"SELECT c.link_id, {bucket}, s.user_id, COUNT(*) "
+            "FROM click_logs c JOIN short_links s ON s.id = c.link_id "
+            "WHERE c.clicked_at IS NOT NULL "
+            f"GROUP BY c.link_id, {bucket}, s.user_id"
+        )
+
+
+def upgrade() -> None:
+    if not _has_table("click_hourly"):
+        op.create_table(
+            "click_hourly",
+            sa.Column("link_id", sa.String(), nullable=False),
+            sa.Column("hour", sa.DateTime(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("clicks", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["link_id"], ["short_links.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("link_id", "hour"),
+        )
+        op.create_index("ix_click_hourly_user_hour", "click_hourly", ["user_id", "hour"])
+    if not _has_table("click_daily"):
+        op.create_table(
+            "click_daily",
+            sa.Column("link_id", sa.String(), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("clicks", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["link_id"], ["short_links.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("link_id", "day"),
+        )
+        op.create_index("ix_click_daily_user_day", "click_daily", ["user_id", "day"])
+    _backfill()
+
+
+def downgrade() -> None:
+    if _has_table("click_daily"):
+        op.drop_index("ix_click_daily_user_day", table_name="click_daily")
+        op.drop_table("click_daily")
+    if _has_table("click_hourly"):
+        op.drop_index("ix_click_hourly_user_hour", table_name="click_hourly")
+        op.drop_table("click_hourly")
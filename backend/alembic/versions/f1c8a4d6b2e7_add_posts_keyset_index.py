@@ -0,0 +1,43 @@
+"""Add posts (user_id, created_at, id) index for keyset pagination
+
+Revision ID: f1c8a4d6b2e7
+Revises: e5b9d2f6a8c1
+Create Date: 2026-10-18 18:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f1c8a4d6b2e7'
+down_revision: Union[str, None] = 'e5b9d2f6a8c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# テーブルは起動時の create_all で作られる場合があるため、存在確認してから変更する
+def _has_table(table: str) -> bool:
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def _has_index(table: str, index: str) -> bool:
+    return any(i["name"] == index for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade() -> None:
+    if not _has_table("posts"):
+        return
+    if op.get_bind().dialect.name == "sqlite":
+        # CURRENT_TIMESTAMP で入った値（秒まで）を SQLAlchemy の保存形式（マイクロ秒まで）に揃える。
+        # 形式が混在すると同じ時刻の比較が文字列比較でずれ、カーソルの前後判定を誤る
+        op.execute(
+            "UPDATE posts SET created_at = created_at || '.000000' "
+            "WHERE created_at IS NOT NULL AND length(created_at) = 19"
+        )
+    if not _has_index("posts", "ix_posts_user_created"):
+        op.create_index("ix_posts_user_created", "posts", ["user_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    if _has_table("posts") and _has_index("posts", "ix_posts_user_created"):
+        op.drop_index("ix_posts_user_created", table_name="posts")
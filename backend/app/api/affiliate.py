@@ -1,16 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.deps import get_current_user
+from app.core.pagination import PageParams, optional_page_params, paginate
 from app.database import get_db
 from app.models.user import User
 from app.models.affiliate_account import AffiliateAccount
 from app.models.affiliate_offer import AffiliateOffer
-from app.models.affiliate_revenue import AffiliateRevenue
-from app.models.short_link import ShortLink
-from app.models.click_log import ClickLog
+from app.services import dashboard_stats
 from app.schemas import (
     AffiliateAccountCreate,
     AffiliateAccountResponse,
@@ -65,18 +64,20 @@ async def create_offer(
     db.add(offer)
     await db.flush()
     await db.refresh(offer)
+    await db.commit()
+    dashboard_stats.invalidate_user_stats(user.id)
     return offer
 
 
 @router.get("/offers", response_model=List[AffiliateOfferResponse])
 async def list_offers(
+    response: Response,
+    page: PageParams = Depends(optional_page_params),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(AffiliateOffer).where(AffiliateOffer.user_id == user.id)
-    )
-    return result.scalars().all()
+    stmt = select(AffiliateOffer).where(AffiliateOffer.user_id == user.id)
+    return await paginate(db, stmt, page, response, (AffiliateOffer.title, AffiliateOffer.id))
 
 
 @router.delete("/offers/{offer_id}", status_code=204)
@@ -95,6 +96,8 @@ async def delete_offer(
     if not offer:
         raise HTTPException(status_code=404, detail="案件が見つかりません")
     await db.delete(offer)
+    await db.commit()
+    dashboard_stats.invalidate_user_stats(user.id)
 
 
 # ─── Stats ───
@@ -103,38 +106,4 @@ async def get_stats(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    # Total clicks
-    links_result = await db.execute(
-        select(ShortLink.id).where(ShortLink.user_id == user.id)
-    )
-    link_ids = [row[0] for row in links_result.all()]
-
-    total_clicks = 0
-    if link_ids:
-        click_result = await db.execute(
-            select(func.count()).where(ClickLog.link_id.in_(link_ids))
-        )
-        total_clicks = click_result.scalar() or 0
-
-    # Total revenue
-    rev_result = await db.execute(
-        select(func.coalesce(func.sum(AffiliateRevenue.amount), 0.0)).where(
-            AffiliateRevenue.user_id == user.id
-        )
-    )
-    total_revenue = float(rev_result.scalar())
-
-    # Offers
-    offers_result = await db.execute(
-        select(AffiliateOffer).where(AffiliateOffer.user_id == user.id)
-    )
-    offers = offers_result.scalars().all()
-
-    ctr = 0.0
-
-    return AffiliateStats(
-        total_clicks=total_clicks,
-        total_revenue=total_revenue,
-        ctr=ctr,
-        offers=offers,
-    )
+    return await dashboard_stats.get_affiliate_stats(db, user.id)
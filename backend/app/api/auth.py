@@ -2,10 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core import hash_password, verify_password, create_access_token
+from app.core import create_access_token
+from app.core.passwords import hash_password_async, rehash_if_needed, verify_password_async
 from app.database import get_db
 from app.models.user import User
 from app.schemas import UserRegister, UserLogin, TokenResponse, UserResponse
+from app.services.user_cache import invalidate_user
 
 router = APIRouter(prefix="/api/auth", tags=["認証"])
 
@@ -16,7 +18,8 @@ async def register(body: UserRegister, db: AsyncSession = Depends(get_db)):
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="このメールアドレスは既に登録されています")
 
-    user = User(email=body.email, password_hash=hash_password(body.password))
+    # bcrypt は専用スレッドで実行する（混雑時は 503）
+    user = User(email=body.email, password_hash=await hash_password_async(body.password))
     db.add(user)
     await db.flush()
     await db.refresh(user)
@@ -27,8 +30,15 @@ async def register(body: UserRegister, db: AsyncSession = Depends(get_db)):
 async def login(body: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == body.email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(body.password, user.password_hash):
+    if not user or not await verify_password_async(body.password, user.password_hash):
         raise HTTPException(status_code=401, detail="メールアドレスまたはパスワードが正しくありません")
 
+    # BCRYPT_ROUNDS が変わっていれば新しいコストで保存し直す
+    new_hash = await rehash_if_needed(body.password, user.password_hash)
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        await invalidate_user(user.id)
+
     token = create_access_token({"sub": str(user.id)})
     return TokenResponse(access_token=token)
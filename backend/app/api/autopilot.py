@@ -6,6 +6,7 @@ from app.database import get_db
 from app.models.user import User
 from app.schemas import AutopilotStatus, AutopilotToggle
 from app.services.auto_scheduler import run_autopilot_for_user
+from app.services.user_cache import invalidate_user
 
 router = APIRouter(prefix="/api/autopilot", tags=["全自動モード"])
 
@@ -32,6 +33,8 @@ async def toggle_autopilot(
     user.auto_post_enabled = body.enabled
     await db.flush()
     await db.refresh(user)
+    await db.commit()
+    await invalidate_user(user.id)
     return AutopilotStatus(
         enabled=user.auto_post_enabled,
         user_id=user.id,
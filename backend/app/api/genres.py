@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.deps import get_current_user
+from app.core.pagination import PageParams, optional_page_params, paginate
 from app.database import get_db
 from app.models.user import User
 from app.models.genre import Genre
@@ -27,11 +28,13 @@ async def create_genre(
 
 @router.get("/", response_model=List[GenreResponse])
 async def list_genres(
+    response: Response,
+    page: PageParams = Depends(optional_page_params),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Genre).where(Genre.user_id == user.id))
-    return result.scalars().all()
+    stmt = select(Genre).where(Genre.user_id == user.id)
+    return await paginate(db, stmt, page, response, (Genre.genre_name, Genre.id))
 
 
 @router.delete("/{genre_id}", status_code=204)
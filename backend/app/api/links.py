@@ -1,19 +1,32 @@
 import string
 import secrets
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.responses import RedirectResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
 
 from app.core.deps import get_current_user
+from app.core.metrics import Histogram
+from app.core.pagination import PageParams, page_params, paginate
 from app.database import get_db
 from app.models.user import User
 from app.models.short_link import ShortLink
-from app.models.click_log import ClickLog
 from app.schemas import ShortLinkCreate, ShortLinkResponse
+from app.services.click_buffer import click_buffer
+from app.services.link_resolver import cache_link, invalidate_short_code, resolve_short_code
 
 router = APIRouter(prefix="/api/links", tags=["短縮URL"])
 
+# リダイレクトはキャッシュヒット時にミリ秒未満で返る想定のため細かいバケットにする
+_redirect_seconds = Histogram(
+    "autobuzz_redirect_duration_seconds",
+    "短縮URLリダイレクトの処理時間（found / not_found）",
+    ["result"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
 
 def _generate_code(length: int = 8) -> str:
     chars = string.ascii_letters + string.digits
@@ -33,19 +46,51 @@ async def create_short_link(
     db.add(link)
     await db.flush()
     await db.refresh(link)
+    await db.commit()
+    await cache_link(link.short_code, link.id, link.original_url)
     return link
 
 
-@router.get("/r/{short_code}")
-async def redirect_link(short_code: str, db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=List[ShortLinkResponse])
+async def list_short_links(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(ShortLink).where(ShortLink.user_id == user.id)
+    return await paginate(db, stmt, page, response, (ShortLink.id,))
+
+
+@router.delete("/{link_id}", status_code=204)
+async def delete_short_link(
+    link_id: str,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     result = await db.execute(
-        select(ShortLink).where(ShortLink.short_code == short_code)
+        select(ShortLink).where(ShortLink.id == link_id, ShortLink.user_id == user.id)
     )
     link = result.scalar_one_or_none()
     if not link:
         raise HTTPException(status_code=404, detail="リンクが見つかりません")
+    short_code = link.short_code
+    await db.delete(link)
+    await db.commit()
+    await invalidate_short_code(short_code)
 
-    click = ClickLog(link_id=link.id)
-    db.add(click)
-    await db.flush()
-    return RedirectResponse(url=link.original_url, status_code=302)
+
+@router.get("/r/{short_code}")
+async def redirect_link(short_code: str):
+    started = time.perf_counter()
+    # キャッシュヒット時はDBに問い合わせない
+    resolved = await resolve_short_code(short_code)
+    if not resolved:
+        _redirect_seconds.observe(time.perf_counter() - started, "not_found")
+        raise HTTPException(status_code=404, detail="リンクが見つかりません")
+    link_id, original_url = resolved
+
+    # クリックはバッファに積むだけ（DBへはバックグラウンドでまとめて書き込む）
+    await click_buffer.add(link_id)
+    _redirect_seconds.observe(time.perf_counter() - started, "found")
+    return RedirectResponse(url=original_url, status_code=302)
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.core.deps import get_auth_cache_stats
+from app.core.metrics import CONTENT_TYPE, metrics_access_allowed, register_collector, render_metrics, stats_samples
+from app.core.passwords import get_password_hasher_stats
+from app.database import engine, get_sqlite_writer_stats
+from app.services.buzz_collector import get_trend_cache_stats
+from app.services.click_buffer import get_click_buffer_stats
+from app.services.dashboard_stats import get_dashboard_cache_stats
+from app.services.generation_cache import get_generation_cache_stats
+from app.services.link_resolver import get_link_cache_stats
+from app.services.llm_limiter import get_llm_limiter_stats
+from app.services.rate_governor import rate_governor
+from app.services.user_cache import get_user_cache_stats
+
+router = APIRouter(tags=["メトリクス"])
+
+
+# ─── 収集時に読む現在値 ───
+
+def _collect_db_pool():
+    """SQLAlchemy の接続プール（NullPool 等、数を持たないプールでは出さない）"""
+    pool = engine.pool
+    for key, documentation in (
+        ("size", "接続プールの常駐接続数"),
+        ("checkedout", "使用中の接続数"),
+        ("checkedin", "待機中の接続数"),
+        ("overflow", "pool_size を超えて開いている接続数"),
+    ):
+        reader = getattr(pool, key, None)
+        if callable(reader):
+            yield (f"autobuzz_db_pool_{key}", documentation, {}, reader())
+
+
+def _collect_caches():
+    for stats in (
+        get_link_cache_stats(),
+        get_trend_cache_stats(),
+        get_generation_cache_stats(),
+        get_dashboard_cache_stats(),
+        get_user_cache_stats(),
+        get_auth_cache_stats(),
+    ):
+        yield from stats_samples("autobuzz_cache", "キャッシュ統計", stats, {"cache": stats["name"]})
+
+
+def _collect_components():
+    yield from stats_samples("autobuzz_click_buffer", "クリック書き込みバッファ", get_click_buffer_stats())
+    yield from stats_samples("autobuzz_llm_limiter", "OpenAI 呼び出しのリミッター", get_llm_limiter_stats())
+    yield from stats_samples("autobuzz_sns_rate", "SNS 投稿のレート制御", rate_governor.stats())
+    yield from stats_samples("autobuzz_password_hasher", "bcrypt のスレッドプール", get_password_hasher_stats())
+    yield from stats_samples("autobuzz_sqlite_writer", "SQLite の書き込みキュー", get_sqlite_writer_stats())
+
+
+register_collector(_collect_db_pool)
+register_collector(_collect_caches)
+register_collector(_collect_components)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus のスクレイプ用（テキスト形式）。METRICS_TOKEN / METRICS_ALLOWED_NETWORKS で許可した相手のみ"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    client_host = request.client.host if request.client else None
+    if not metrics_access_allowed(client_host, request.headers.get("Authorization")):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
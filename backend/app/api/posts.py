@@ -1,20 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.core.deps import get_current_user
+from app.core.pagination import PageParams, page_params, paginate
 from app.database import get_db
 from app.models.user import User
 from app.models.post import Post
 from app.models.generated_post import GeneratedPost
-from app.schemas import PostGenerateRequest, PostResponse, TrendsResponse
-from app.services.ai_generator import generate_post_content
-from app.services.buzz_collector import collect_all_trends
+from app.schemas import PostGenerateRequest, PostBatchGenerateRequest, PostResponse, TrendsResponse
+from app.services.ai_generator import generate_posts_batch
+from app.services.dashboard_stats import invalidate_user_stats
+from app.services.buzz_collector import collect_all_trends, collect_global_trends, collect_keyword_buzz
 
 router = APIRouter(prefix="/api/posts", tags=["投稿"])
 
 
+def _naive_utc(value: datetime) -> datetime:
+    """タイムゾーン付きの指定は UTC に変換する（DB は naive UTC）"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 @router.get("/trends", response_model=TrendsResponse)
 async def get_trends(
     user: User = Depends(get_current_user),
@@ -41,10 +53,9 @@ async def generate_post(
     )
 
     # 2. トレンドを参考にAI投稿を生成
-    content = await generate_post_content(
-        genre=body.genre,
-        platform=body.platform,
-        trend_data=trend_data,
+    [content] = await generate_posts_batch(
+        [{"genre": body.genre, "platform": body.platform}],
+        trend_data,
     )
 
     generated = GeneratedPost(user_id=user.id, content=content)
@@ -59,18 +70,75 @@ async def generate_post(
     db.add(post)
     await db.flush()
     await db.refresh(post)
+    await db.commit()
+    invalidate_user_stats(user.id)
     return post
 
 
+@router.post("/generate-batch", response_model=List[PostResponse], status_code=201)
+async def generate_posts(
+    body: PostBatchGenerateRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """複数ジャンル×複数プラットフォームの下書きを1回の生成リクエストで作成"""
+    if not body.genres or not body.platforms:
+        raise HTTPException(status_code=400, detail="ジャンルとプラットフォームを指定してください")
+
+    # 1. グローバルトレンドは1回、Xバズはジャンルごとに並行して取得
+    global_trends, *x_buzz_per_genre = await asyncio.gather(
+        collect_global_trends(),
+        *(collect_keyword_buzz([genre] if genre else None) for genre in body.genres),
+    )
+    targets = []
+    for genre, x_buzz in zip(body.genres, x_buzz_per_genre):
+        for platform in body.platforms:
+            targets.append({"genre": genre, "platform": platform, "x_buzz": x_buzz})
+
+    # 2. まとめて生成
+    contents = await generate_posts_batch(targets, global_trends)
+
+    posts = []
+    for target, content in zip(targets, contents):
+        db.add(GeneratedPost(user_id=user.id, content=content))
+        post = Post(
+            user_id=user.id,
+            platform=target["platform"],
+            content=content,
+            status="draft",
+        )
+        db.add(post)
+        posts.append(post)
+    await db.flush()
+    for post in posts:
+        await db.refresh(post)
+    await db.commit()
+    invalidate_user_stats(user.id)
+    return posts
+
+
 @router.get("/", response_model=List[PostResponse])
 async def list_posts(
+    response: Response,
+    platform: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="作成日時（UTC）がこの日時以降"),
+    created_to: Optional[datetime] = Query(None, description="作成日時（UTC）がこの日時より前"),
+    page: PageParams = Depends(page_params),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(Post).where(Post.user_id == user.id).order_by(Post.created_at.desc())
-    )
-    return result.scalars().all()
+    """新しい順。次ページのカーソルは X-Next-Cursor ヘッダーで返す"""
+    stmt = select(Post).where(Post.user_id == user.id)
+    if platform:
+        stmt = stmt.where(Post.platform == platform)
+    if status:
+        stmt = stmt.where(Post.status == status)
+    if created_from:
+        stmt = stmt.where(Post.created_at >= _naive_utc(created_from))
+    if created_to:
+        stmt = stmt.where(Post.created_at < _naive_utc(created_to))
+    return await paginate(db, stmt, page, response, (Post.created_at, Post.id), descending=True)
 
 
 @router.get("/{post_id}", response_model=PostResponse)
@@ -101,3 +169,5 @@ async def delete_post(
     if not post:
         raise HTTPException(status_code=404, detail="投稿が見つかりません")
     await db.delete(post)
+    await db.commit()
+    invalidate_user_stats(user.id)
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.deps import get_current_user
+from app.core.pagination import PageParams, optional_page_params, paginate
 from app.database import get_db
 from app.models.user import User
 from app.models.schedule import Schedule
-from app.schemas import ScheduleCreate, ScheduleResponse
+from app.schemas import ScheduleCreate, ScheduleResponse, TimezoneUpdate, TimezoneResponse
+from app.services.schedule_clock import FREQUENCIES, compute_next_run_at, is_valid_timezone
+from app.services.user_cache import invalidate_user
 
 router = APIRouter(prefix="/api/schedules", tags=["スケジュール"])
 
@@ -18,7 +21,19 @@ async def create_schedule(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    schedule = Schedule(user_id=user.id, time=str(body.time), frequency=body.frequency)
+    if body.frequency not in FREQUENCIES:
+        raise HTTPException(status_code=400, detail="頻度が不正です")
+    try:
+        next_run_at = compute_next_run_at(str(body.time), body.frequency, user.timezone)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="時刻の形式が不正です（HH:MM）")
+
+    schedule = Schedule(
+        user_id=user.id,
+        time=str(body.time),
+        frequency=body.frequency,
+        next_run_at=next_run_at,
+    )
     db.add(schedule)
     await db.flush()
     await db.refresh(schedule)
@@ -27,11 +42,13 @@ async def create_schedule(
 
 @router.get("/", response_model=List[ScheduleResponse])
 async def list_schedules(
+    response: Response,
+    page: PageParams = Depends(optional_page_params),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Schedule).where(Schedule.user_id == user.id))
-    return result.scalars().all()
+    stmt = select(Schedule).where(Schedule.user_id == user.id)
+    return await paginate(db, stmt, page, response, (Schedule.time, Schedule.id))
 
 
 @router.delete("/{schedule_id}", status_code=204)
@@ -49,3 +66,26 @@ async def delete_schedule(
     if not schedule:
         raise HTTPException(status_code=404, detail="スケジュールが見つかりません")
     await db.delete(schedule)
+
+
+@router.put("/timezone", response_model=TimezoneResponse)
+async def update_timezone(
+    body: TimezoneUpdate,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """スケジュールのタイムゾーンを変更し、全スケジュールの次回実行日時を再計算"""
+    if not is_valid_timezone(body.timezone):
+        raise HTTPException(status_code=400, detail="タイムゾーンが不正です")
+
+    user.timezone = body.timezone
+    result = await db.execute(select(Schedule).where(Schedule.user_id == user.id))
+    for schedule in result.scalars().all():
+        try:
+            schedule.next_run_at = compute_next_run_at(schedule.time, schedule.frequency, body.timezone)
+        except ValueError:
+            schedule.next_run_at = None
+    await db.flush()
+    await db.commit()
+    await invalidate_user(user.id)
+    return TimezoneResponse(timezone=user.timezone)
@@ -7,7 +7,10 @@ from app.core.deps import get_current_user
 from app.database import get_db
 from app.models.user import User
 from app.models.sns_account import SnsAccount
-from app.schemas import SnsAccountCreate, SnsAccountResponse
+from app.schemas import SnsAccountCreate, SnsAccountResponse, RateLimitWindow
+from app.services.dashboard_stats import invalidate_user_stats
+from app.services.post_outbox import detach_sns_account
+from app.services.rate_governor import rate_governor
 
 router = APIRouter(prefix="/api/sns", tags=["SNSアカウント"])
 
@@ -47,6 +50,26 @@ async def list_accounts(
     return result.scalars().all()
 
 
+@router.get("/rate-limits", response_model=List[RateLimitWindow])
+async def get_rate_limits(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """連携アカウントごと・アプリ全体の投稿枠の残り（このプロセスで観測した値）"""
+    result = await db.execute(
+        select(SnsAccount).where(SnsAccount.user_id == user.id)
+    )
+    windows = []
+    for account in result.scalars().all():
+        if not account.access_token:
+            continue
+        for window in rate_governor.headroom(account.platform, account.access_token):
+            windows.append(RateLimitWindow(account_id=account.id, **window))
+    for platform in ("x", "threads"):
+        windows.extend(RateLimitWindow(**window) for window in rate_governor.headroom(platform))
+    return windows
+
+
 @router.delete("/accounts/{account_id}", status_code=204)
 async def delete_account(
     account_id: str,
@@ -62,4 +85,8 @@ async def delete_account(
     account = result.scalar_one_or_none()
     if not account:
         raise HTTPException(status_code=404, detail="アカウントが見つかりません")
+    await detach_sns_account(db, account.id)
     await db.delete(account)
+    await db.commit()
+    # 送信待ちの投稿を下書きに戻した分を反映する
+    invalidate_user_stats(user.id)
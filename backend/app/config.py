@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Tuple
 import json
 
 
@@ -7,17 +7,64 @@ class Settings(BaseSettings):
     # Database (SQLite for development, PostgreSQL for production)
     DATABASE_URL: str = "sqlite+aiosqlite:///./autobuzz.db"
     DATABASE_URL_SYNC: str = "sqlite:///./autobuzz.db"
+    # 接続プール（SQLite 以外）。Celery ワーカーもプロセスごとに1つのプールを使い回す
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+
+    # SQLite 本番プロファイル: WAL・synchronous=NORMAL・mmap・キャッシュ・busy_timeout を接続時に設定
+    SQLITE_TUNED: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    # バックグラウンドの書き込みを1本の書き込みタスクに集め、最大 SQLITE_WRITE_BATCH 件ずつまとめてコミットする
+    SQLITE_SINGLE_WRITER: bool = True
+    SQLITE_WRITE_BATCH: int = 64
 
     # Redis (optional for dev)
     REDIS_URL: str = "redis://localhost:6379/0"
+    # キャッシュをRedisで全ワーカー共有するか（無効時はプロセス内のみ）
+    CACHE_REDIS_ENABLED: bool = False
 
     # JWT
     JWT_SECRET_KEY: str = "dev-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 1440
 
+    # パスワードハッシュ: bcrypt のコスト（変更すると次回ログイン時に再ハッシュ）
+    BCRYPT_ROUNDS: int = 12
+    # bcrypt 専用スレッド数と、それを超えて待たせる最大件数（超えたら 503）
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16
+
     # OpenAI
     OPENAI_API_KEY: str = ""
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    # OpenAI 呼び出しの制限（0 は無制限）
+    LLM_MAX_IN_FLIGHT: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 120.0
+    LLM_MAX_RETRIES: int = 3
+    # 一括生成1リクエストあたりの最大投稿数
+    LLM_BATCH_MAX_ITEMS: int = 10
+
+    # 生成結果キャッシュ（キーごとに N バリエーションを保持）
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_VARIANTS: int = 3
+    GENERATION_CACHE_TTL_SECONDS: int = 900
+    GENERATION_CACHE_MAX_KEYS: int = 2048
+    # "memory" または "redis"（CACHE_REDIS_ENABLED も必要）
+    GENERATION_CACHE_BACKEND: str = "memory"
+
+    # 外部HTTP接続プール（接続先ごと）
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    # HTTP/2 を使う場合は h2 パッケージ（pip install httpx[http2]）が必要
+    HTTP2_ENABLED: bool = False
 
     # X (Twitter) API
     X_API_KEY: str = ""
@@ -25,6 +72,10 @@ class Settings(BaseSettings):
     X_BEARER_TOKEN: str = ""
     X_ACCESS_TOKEN: str = ""
     X_ACCESS_TOKEN_SECRET: str = ""
+    # 投稿バックエンド: "httpx"（非同期署名）または "tweepy"（スレッドプール）
+    X_POST_BACKEND: str = "httpx"
+    X_POST_THREADPOOL_WORKERS: int = 4
+    X_CLIENT_CACHE_SIZE: int = 1024
 
     # Threads API
     THREADS_APP_ID: str = ""
@@ -34,10 +85,116 @@ class Settings(BaseSettings):
     # News API
     NEWS_API_KEY: str = ""
 
+    # トレンドスナップショットキャッシュ（秒）
+    TREND_CACHE_TTL_SECONDS: int = 300
+    TREND_CACHE_STALE_SECONDS: int = 900
+    TREND_CACHE_MAX_ENTRIES: int = 256
+
+    # RSSフィード（JSON: [[URL, カテゴリ], ...]）
+    RSS_FEEDS: str = json.dumps([
+        ["https://news.yahoo.co.jp/rss/topics/it.xml", "IT・テクノロジー"],
+        ["https://news.yahoo.co.jp/rss/topics/business.xml", "ビジネス"],
+        ["https://news.yahoo.co.jp/rss/topics/entertainment.xml", "エンタメ"],
+        ["https://news.yahoo.co.jp/rss/topics/domestic.xml", "国内"],
+        ["https://b.hatena.ne.jp/hotentry/it.rss", "はてブ IT"],
+    ], ensure_ascii=False)
+    RSS_ITEMS_PER_FEED: int = 3
+    RSS_FETCH_TIMEOUT_SECONDS: float = 10.0
+    RSS_SEEN_GUIDS_MAX: int = 500
+
     # Stripe
     STRIPE_SECRET_KEY: str = ""
     STRIPE_WEBHOOK_SECRET: str = ""
 
+    # スケジューラー: 1ティックで処理する最大件数と、遅延時に追いかけ実行する上限（分）
+    SCHEDULER_BATCH_SIZE: int = 500
+    SCHEDULE_CATCHUP_MINUTES: int = 30
+    # 複数レプリカでの協調: API プロセス内でスケジューラーを回すか（Celery beat に任せる場合は False）
+    SCHEDULER_IN_PROCESS: bool = True
+    SCHEDULER_TICK_SECONDS: int = 60
+    # リーダーリース: auto（Postgres は advisory lock、それ以外はテーブル）/ redis / postgres / table
+    SCHEDULER_LEASE_BACKEND: str = "auto"
+    SCHEDULER_LEASE_TTL_SECONDS: int = 90
+    # 1回の取得（行ロック）で確保する件数と、プロセス内で同時実行するユーザー数
+    SCHEDULER_CLAIM_BATCH_SIZE: int = 20
+    SCHEDULER_RUN_CONCURRENCY: int = 2
+    # 期限到来分の実行方法: inline（確保したプロセスで実行）/ celery（ユーザー単位のサブタスクに分散）
+    SCHEDULER_DISPATCH: str = "inline"
+    # サブタスクの冪等キー（Redis）の保持秒数（完了後）
+    AUTOPILOT_RUN_KEY_TTL_SECONDS: int = 86400
+    # サブタスクの実行時間の上限（秒）。実行中キーはこの秒数 + 60 秒で失効し、クラッシュ後の再配送で再実行される
+    AUTOPILOT_RUN_TIME_LIMIT_SECONDS: int = 900
+
+    # 全自動モードのステージ別同時実行数（1ユーザーの実行内）
+    AUTOPILOT_COLLECT_CONCURRENCY: int = 4
+
+    # 投稿アウトボックス: ディスパッチャー数（API プロセス内）・1回の取得件数・同時送信数
+    OUTBOX_IN_PROCESS: bool = True
+    OUTBOX_DISPATCHERS: int = 2
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_SEND_CONCURRENCY: int = 4
+    OUTBOX_POLL_SECONDS: float = 5.0
+    # 送信中のまま放置された行を再取得するまでの秒数（プロセス停止時の回復用）
+    OUTBOX_LOCK_SECONDS: int = 120
+    # 再試行: 指数バックオフ（ジッター付き）と最大試行回数
+    OUTBOX_MAX_ATTEMPTS: int = 6
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 30.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 3600.0
+
+    # SNS投稿のレート制御: 枠が空くまでこの秒数以内なら待って送る（超える場合は後回し）
+    SNS_RATE_MAX_WAIT_SECONDS: float = 10.0
+    # ヘッダーで観測するまでの既定の上限（1アカウント・24時間あたりの投稿数）
+    X_USER_POSTS_PER_DAY: int = 100
+    THREADS_POSTS_PER_DAY: int = 250
+    # Threads の x-app-usage（%）がこの値以上ならアプリ全体の送信を一時停止する
+    THREADS_APP_USAGE_THRESHOLD: int = 90
+    THREADS_APP_USAGE_COOLDOWN_SECONDS: int = 300
+    # 429 で Retry-After / リセット時刻が分からない場合の停止秒数
+    SNS_RATE_LIMIT_DEFAULT_BLOCK_SECONDS: int = 60
+
+    # 短縮URLクリックの書き込みバッファ: 最大保持件数・書き出し間隔（ミリ秒）・1回の INSERT 件数
+    CLICK_BUFFER_MAX_ROWS: int = 10000
+    CLICK_FLUSH_INTERVAL_MS: int = 500
+    CLICK_FLUSH_BATCH_SIZE: int = 500
+    # バッファが溢れた分を Redis に退避するか（CACHE_REDIS_ENABLED 時のみ有効）
+    CLICK_SPILL_TO_REDIS: bool = True
+
+    # クリック集計: 時間別ロールアップの保持日数・生のクリックログの保持日数（0は無期限）・圧縮間隔
+    CLICK_HOURLY_RETENTION_DAYS: int = 7
+    CLICK_RAW_RETENTION_DAYS: int = 0
+    CLICK_COMPACTION_INTERVAL_SECONDS: int = 3600
+
+    # ダッシュボード統計のユーザー別キャッシュ
+    DASHBOARD_CACHE_TTL_SECONDS: float = 30.0
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 10000
+
+    # 短縮コード解決キャッシュ: 最大件数・TTL・存在しないコードのTTL・起動時に先読みする件数
+    LINK_CACHE_MAX_ENTRIES: int = 50000
+    LINK_CACHE_TTL_SECONDS: float = 300.0
+    LINK_NEGATIVE_TTL_SECONDS: float = 30.0
+    LINK_CACHE_PRELOAD: int = 1000
+    # 先読みの順位付けに使う直近の日数（日別ロールアップ click_daily で数える）
+    LINK_CACHE_PRELOAD_DAYS: int = 7
+
+    # 認証: 検証済みトークンとユーザー行のキャッシュ（TTL秒・最大件数）
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 300.0
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # 一覧APIのページサイズ（既定値・上限）
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+
+    # Prometheus 形式のメトリクス（/metrics）とリクエスト計測ミドルウェアを有効にするか
+    METRICS_ENABLED: bool = True
+    # /metrics の公開範囲: METRICS_TOKEN（Authorization: Bearer）が一致するか、
+    # 接続元が METRICS_ALLOWED_NETWORKS（カンマ区切りの CIDR）内の場合のみ返す
+    METRICS_TOKEN: str = ""
+    METRICS_ALLOWED_NETWORKS: str = "127.0.0.1/32,::1/128"
+    # Celery ワーカーのメトリクスを出力する HTTP ポート（プールのプロセスごとに +index。0 で無効）
+    METRICS_WORKER_PORT: int = 9540
+
     # App
     APP_URL: str = "http://localhost:3000"
     API_URL: str = "http://localhost:8000"
@@ -55,6 +212,21 @@ class Settings(BaseSettings):
             # Fallback for plain string (single URL or comma-separated)
             return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
+    @property
+    def rss_feeds_list(self) -> List[Tuple[str, str]]:
+        try:
+            parsed = json.loads(self.RSS_FEEDS)
+        except json.JSONDecodeError:
+            # カンマ区切りURLのみの指定も許可（カテゴリは「ニュース」）
+            return [(url.strip(), "ニュース") for url in self.RSS_FEEDS.split(",") if url.strip()]
+        feeds = []
+        for item in parsed if isinstance(parsed, list) else []:
+            if isinstance(item, str):
+                feeds.append((item, "ニュース"))
+            elif isinstance(item, (list, tuple)) and item:
+                feeds.append((str(item[0]), str(item[1]) if len(item) > 1 else "ニュース"))
+        return feeds
+
     model_config = {"env_file": "../.env", "env_file_encoding": "utf-8"}
 
     def __init__(self, **kwargs):
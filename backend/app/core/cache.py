@@ -0,0 +1,269 @@
+"""
+キャッシュユーティリティ
+- TTLCache: プロセス内 LRU + TTL キャッシュ（ヒット/ミス計測付き）
+- SnapshotCache: TTLCache + 任意の Redis 層、stale-while-revalidate、同一キーの同時ロード集約
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """最大件数と有効期限を持つ LRU キャッシュ（イベントループ内で使う前提のためロックなし）"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """ヒット/ミス計測・LRU順序を変えずに参照する"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# ─── Redis（任意）──────────────────────────────────────
+_redis_client = None
+_redis_loop = None
+_redis_retry_at = 0.0
+
+
+async def get_redis():
+    """共有キャッシュ用の Redis クライアントを返す。無効・接続不可なら None"""
+    global _redis_client, _redis_loop, _redis_retry_at
+
+    if not settings.CACHE_REDIS_ENABLED:
+        return None
+    if time.monotonic() < _redis_retry_at:
+        return None
+
+    loop = asyncio.get_running_loop()
+    if _redis_client is not None and _redis_loop is loop:
+        return _redis_client
+
+    try:
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(settings.REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0)
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redisキャッシュに接続できません（ローカルのみで継続）: {e}")
+        _redis_retry_at = time.monotonic() + 30.0
+        return None
+
+    _redis_client = client
+    _redis_loop = loop
+    return client
+
+
+def redis_failed() -> None:
+    """Redis 操作失敗時に呼ぶ。しばらく Redis 層を使わない"""
+    global _redis_client, _redis_retry_at
+    _redis_client = None
+    _redis_retry_at = time.monotonic() + 30.0
+
+
+class SnapshotCache:
+    """
+    ローダー結果のスナップショットキャッシュ
+    - ttl 以内: そのまま返す（fresh）
+    - ttl〜ttl+stale_ttl: 古い値を即返し、裏で再取得（stale-while-revalidate）
+    - それ以降 / 未取得: ロードして返す（同一キーの同時ロードは1回に集約）
+    Redis 層が有効な場合は全ワーカーで値を共有する。
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, maxsize: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl + stale_ttl, name=name)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _redis_key(self, key: str) -> str:
+        return f"autobuzz:{self.name}:{key}"
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._local.get(key)
+        if entry is None:
+            entry = await self._redis_get(key)
+            if entry is not None:
+                self.redis_hits += 1
+                self._local.set(key, entry, ttl=self._remaining(entry))
+
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader)
+                return value
+
+        self.misses += 1
+        return await self._load(key, loader)
+
+    async def invalidate(self, key: str) -> None:
+        self._local.delete(key)
+        redis = await get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(self._redis_key(key))
+            except Exception:
+                redis_failed()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._local),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_rate": round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+        }
+
+    # ─── 内部処理 ───
+    def _remaining(self, entry: Tuple[float, Any]) -> float:
+        return max(0.0, entry[0] + self.ttl + self.stale_ttl - time.time())
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.errors += 1
+            future.set_exception(e)
+            # 待機者がいない場合の "exception was never retrieved" を抑止
+            future.exception()
+            raise
+        else:
+            entry = (time.time(), value)
+            self._local.set(key, entry)
+            await self._redis_set(key, entry)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+
+        async def _refresh():
+            try:
+                await self._load(key, loader)
+            except Exception as e:
+                logger.warning(f"キャッシュ再取得失敗 ({self.name}:{key}): {e}")
+
+        # 参照を持たないタスクは実行中に GC されうるため、完了まで保持する
+        task = asyncio.get_running_loop().create_task(_refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _redis_get(self, key: str) -> Optional[Tuple[float, Any]]:
+        redis = await get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._redis_key(key))
+        except Exception:
+            redis_failed()
+            return None
+        if not raw:
+            return None
+        try:
+            payload = json.loads(raw)
+            return float(payload["t"]), payload["v"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    async def _redis_set(self, key: str, entry: Tuple[float, Any]) -> None:
+        redis = await get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                self._redis_key(key),
+                json.dumps({"t": entry[0], "v": entry[1]}, ensure_ascii=False),
+                ex=max(1, int(self.ttl + self.stale_ttl)),
+            )
+        except Exception:
+            redis_failed()
@@ -1,29 +1,64 @@
+import hashlib
+import time
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core import decode_access_token
+from app.core.cache import TTLCache
 from app.database import get_db
 from app.models.user import User
+from app.services.user_cache import load_user
 
 security = HTTPBearer()
 
+# 検証済みトークン（SHA-256）→ user_id。トークンの有効期限を超えては保持しない
+_tokens = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+    name="auth_tokens",
+)
+
+
+def _token_user_id(token: str) -> Optional[str]:
+    """トークンを検証して sub を返す。不正・期限切れは例外、sub 無しは None"""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    user_id = _tokens.get(digest)
+    if user_id is not None:
+        return user_id
+
+    payload = decode_access_token(token)
+    user_id = payload.get("sub")
+    if user_id is not None:
+        ttl = settings.AUTH_TOKEN_CACHE_TTL_SECONDS
+        exp = payload.get("exp")
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl > 0:
+            _tokens.set(digest, user_id, ttl=ttl)
+    return user_id
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
 ) -> User:
     try:
-        payload = decode_access_token(credentials.credentials)
-        user_id = payload.get("sub")
+        user_id = _token_user_id(credentials.credentials)
         if user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="無効なトークン")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="無効なトークン")
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    # キャッシュ済みならDBを引かない（変更時は user_cache.invalidate_user で破棄）
+    user = await load_user(db, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ユーザーが見つかりません")
     return user
+
+
+def get_auth_cache_stats() -> dict:
+    return _tokens.stats()
@@ -0,0 +1,145 @@
+"""
+外部API用HTTPクライアントの共有レジストリ
+- 接続先ごとにプールを分けた httpx.AsyncClient（keep-alive・接続数上限・タイムアウト設定済み）
+- OpenAI クライアントも同じプールを使い回す
+FastAPI の lifespan と Celery ワーカー初期化で開始/終了する。
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 接続先ごとのプール名（プール単位で接続数を制限する）
+CLIENT_NAMES = ("default", "x", "threads", "rss", "openai")
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_openai_client = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+# ループが変わった時点で元のループ上で閉じられなかったクライアント（シャットダウン時に閉じる）
+_retired: List[httpx.AsyncClient] = []
+
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2_ENABLED ですが h2 が未インストールのため HTTP/1.1 を使用します")
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        ),
+        headers={"User-Agent": "AutoBuzz/1.0"},
+    )
+
+
+def _check_loop() -> None:
+    """クライアントは作成したイベントループに紐づくため、ループが変わったら作り直す"""
+    global _loop, _openai_client
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if _loop is not loop:
+        _retire_clients(_loop)
+        _openai_client = None
+        _loop = loop
+
+
+async def _aclose(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.warning(f"HTTPクライアント終了エラー: {e}")
+
+
+def _retire_clients(old_loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """旧ループのクライアントを閉じる。旧ループが動いていればそのループ上で、止まっていれば終了待ちに回す"""
+    clients = [client for client in _clients.values() if not client.is_closed]
+    _clients.clear()
+    if not clients:
+        return
+    if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+        for client in clients:
+            asyncio.run_coroutine_threadsafe(_aclose(client), old_loop)
+        return
+    _retired.extend(clients)
+    logger.warning(f"イベントループが変わったため旧HTTPクライアント{len(clients)}件を終了待ちにしました")
+
+
+def get_http_client(name: str = "default") -> httpx.AsyncClient:
+    """共有HTTPクライアントを取得（未開始なら遅延生成）"""
+    _check_loop()
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _clients[name] = client
+    return client
+
+
+def get_openai_client():
+    """共有 AsyncOpenAI クライアントを取得。未設定・未インストール時は None"""
+    global _openai_client
+
+    if not settings.OPENAI_API_KEY:
+        return None
+    try:
+        from openai import AsyncOpenAI
+    except ImportError:
+        return None
+
+    _check_loop()
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=get_http_client("openai"),
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+            # 再試行（429・接続エラー・5xx）は llm_limiter.chat_completion が行う
+            max_retries=0,
+        )
+    return _openai_client
+
+
+async def start_http_clients() -> None:
+    """全プールを現在のイベントループ上で生成する"""
+    for name in CLIENT_NAMES:
+        get_http_client(name)
+    logger.info(f"HTTPクライアントプールを開始しました ({', '.join(CLIENT_NAMES)})")
+
+
+async def close_http_clients() -> None:
+    """全プールを閉じる（シャットダウン時）"""
+    global _openai_client, _loop
+    clients = list(_clients.values()) + _retired
+    _clients.clear()
+    _retired.clear()
+    _openai_client = None
+    _loop = None
+    for client in clients:
+        await _aclose(client)
+
+
+def reset_http_clients() -> None:
+    """fork 後の子プロセスで親のクライアントを破棄する（ソケットは共有しない）"""
+    global _openai_client, _loop
+    _clients.clear()
+    _openai_client = None
+    _loop = None
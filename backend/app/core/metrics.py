@@ -0,0 +1,297 @@
+"""
+Prometheus 形式のメトリクス（外部ライブラリ・外部サービス不要のテキスト出力）
+- Counter / Histogram はモジュール読み込み時に定義し、記録時はラベル値のタプルで辞書を1回引くだけ
+- キャッシュ統計・DB接続プールなどの現在値は /metrics の収集時に register_collector の関数で読む
+- HTTP リクエストはルートのパス（/api/posts/{post_id} 等）単位で MetricsMiddleware が計測する
+- 値はプロセスごと（uvicorn のワーカー・Celery ワーカーはそれぞれ別に集計される）
+- Celery ワーカーは start_metrics_server の小さな HTTP サーバーでプロセスごとに出力する
+- 出力は METRICS_TOKEN か METRICS_ALLOWED_NETWORKS で許可されたスクレイパーにのみ返す（metrics_access_allowed）
+"""
+import hmac
+import ipaddress
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 既定のバケット（秒）: API リクエスト向け
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 外部API（OpenAI・SNS・トレンド取得）向け
+EXTERNAL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# 収集時に読む現在値: (メトリクス名, 説明, ラベル, 値)
+Sample = Tuple[str, str, Dict[str, str], float]
+
+_metrics: Dict[str, "_Metric"] = {}
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        if name in _metrics:
+            raise ValueError(f"メトリクス名が重複しています: {name}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _metrics[name] = self
+
+    def _check(self, labels: tuple) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ラベルは {self.labelnames} を指定してください")
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    """単調増加するカウンター"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        value = self._values.get(labels)
+        if value is None:
+            self._check(labels)
+            value = 0.0
+        self._values[labels] = value + amount
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """固定バケットのヒストグラム（バケットごとの件数・合計・件数）"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル → [バケットごとの件数..., +Inf の件数, 合計]（件数は累積せずに持ち、出力時に累積する）
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            self._check(labels)
+            entry = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        """with ブロックの所要時間を記録する（例外で抜けた場合も記録する）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        bucket_names = self.labelnames + ("le",)
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for labels, entry in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, entry[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(bucket_names, labels + (bound,))} {cumulative}"
+            suffix = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {_format_value(entry[-1])}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+def register_collector(collector: Callable[[], Iterable[Sample]]) -> None:
+    """/metrics の収集時に呼ぶ関数を登録する（戻り値は Sample の並び。型は gauge として出力）"""
+    _collectors.append(collector)
+
+
+def stats_samples(prefix: str, documentation: str, stats: Optional[dict], labels: Optional[dict] = None) -> List[Sample]:
+    """get_*_stats() の辞書を Sample に変換する（数値・真偽値のみ。名前は prefix_キー）"""
+    samples = []
+    for key, value in (stats or {}).items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            samples.append((f"{prefix}_{key}", f"{documentation}: {key}", dict(labels or {}), value))
+    return samples
+
+
+def _render_collected() -> Iterator[str]:
+    families: Dict[str, Tuple[str, List[Tuple[Dict[str, str], float]]]] = {}
+    for collector in _collectors:
+        try:
+            samples = list(collector())
+        except Exception as e:
+            logger.warning(f"メトリクス収集失敗 ({getattr(collector, '__name__', collector)}): {e}")
+            continue
+        for name, documentation, labels, value in samples:
+            families.setdefault(name, (documentation, []))[1].append((labels, value))
+
+    for name, (documentation, samples) in families.items():
+        yield f"# HELP {name} {documentation}"
+        yield f"# TYPE {name} gauge"
+        for labels, value in samples:
+            yield f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}"
+
+
+def render_metrics() -> str:
+    """全メトリクスを Prometheus のテキスト形式で返す"""
+    lines: List[str] = []
+    for metric in list(_metrics.values()):
+        lines.extend(metric.render())
+    lines.extend(_render_collected())
+    return "\n".join(lines) + "\n"
+
+
+# ─── 公開範囲 ───
+
+@lru_cache(maxsize=1)
+def _allowed_networks(raw: str) -> tuple:
+    networks = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning(f"METRICS_ALLOWED_NETWORKS の指定が不正です: {item}")
+    return tuple(networks)
+
+
+def metrics_access_allowed(client_host: Optional[str], authorization: Optional[str]) -> bool:
+    """METRICS_TOKEN（Bearer）が一致するか、接続元が METRICS_ALLOWED_NETWORKS 内なら許可する"""
+    token = settings.METRICS_TOKEN
+    if token and authorization:
+        scheme, _, value = authorization.partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(value.strip().encode("utf-8"), token.encode("utf-8")):
+            return True
+    if not client_host:
+        return False
+    try:
+        address = ipaddress.ip_address(client_host)
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks(settings.METRICS_ALLOWED_NETWORKS))
+
+
+# ─── Celery ワーカー用の出力サーバー ───
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self._reply(404, b"Not Found")
+            return
+        if not metrics_access_allowed(self.client_address[0], self.headers.get("Authorization")):
+            self._reply(403, b"Forbidden")
+            return
+        self._reply(200, render_metrics().encode("utf-8"), CONTENT_TYPE)
+
+    def _reply(self, status: int, body: bytes, content_type: str = "text/plain; charset=utf-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # スクレイプごとのアクセスログは出さない
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """/metrics を返す HTTP サーバーをデーモンスレッドで起動する（ポートが使えなければ None）"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"メトリクス出力サーバーを起動できません (port={port}): {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    logger.info(f"メトリクス出力サーバーを起動しました: {host}:{port}/metrics")
+    return server
+
+
+# ─── HTTP リクエストの計測 ───
+
+http_request_seconds = Histogram(
+    "autobuzz_http_request_duration_seconds",
+    "HTTP リクエストの処理時間（ルート単位）",
+    ["method", "route", "status"],
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI ミドルウェア: レスポンス完了までの時間をルートのパステンプレート単位で記録する。
+    一致するルートが無いリクエスト（404）は route="unmatched" にまとめる（任意のパスでラベルが増えないように）。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = "500"
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            # ルーティング後は scope にマッチしたルートが入る
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_seconds.observe(time.perf_counter() - started, scope["method"], path, status)
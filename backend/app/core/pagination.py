@@ -0,0 +1,99 @@
+"""
+一覧APIのキーセットページネーション
+- 並び順の列（例: created_at, id）の最後の値をカーソルにして「その次から」を取得する（OFFSET を使わない）
+- 次ページがある場合はカーソルを X-Next-Cursor ヘッダーで返す（レスポンス本体は従来どおり配列）
+- 1ページの件数は PAGE_SIZE_MAX で上限を設ける
+- 件数の少ない一覧（ジャンル・スケジュール・オファー）は optional_page_params を使い、
+  limit / cursor の指定が無ければ従来どおり全件を返す
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import DateTime, Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class PageParams:
+    limit: Optional[int]  # None は全件（optional_page_params で limit / cursor とも未指定の場合）
+    cursor: Optional[str]
+
+
+def page_params(
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX, description="1ページの件数"),
+    cursor: Optional[str] = Query(None, description="前のページの X-Next-Cursor"),
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def optional_page_params(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description="1ページの件数（省略時は全件）"),
+    cursor: Optional[str] = Query(None, description="前のページの X-Next-Cursor"),
+) -> PageParams:
+    """limit / cursor とも未指定なら全件。cursor だけ指定された場合は既定のページサイズ"""
+    if limit is None and cursor:
+        limit = settings.PAGE_SIZE_DEFAULT
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("列数が一致しません")
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime) and v is not None else v
+            for col, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="カーソルが不正です")
+
+
+def _after(columns: Sequence, values: Sequence[Any], descending: bool):
+    """(c1, c2, ...) が values より後ろ（descending なら小さい）行の条件"""
+    conditions = []
+    for i, col in enumerate(columns):
+        tail = col < values[i] if descending else col > values[i]
+        conditions.append(and_(*(columns[j] == values[j] for j in range(i)), tail))
+    return or_(*conditions)
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    params: PageParams,
+    response: Response,
+    columns: Sequence,
+    descending: bool = False,
+) -> list:
+    """
+    stmt（絞り込み済みの SELECT）を columns 順に1ページ分取得する。
+    columns の最後は一意な列（id）にすること。並び順の列は NOT NULL であること。
+    """
+    if params.cursor:
+        stmt = stmt.where(_after(columns, decode_cursor(params.cursor, columns), descending))
+    order = [col.desc() for col in columns] if descending else list(columns)
+    stmt = stmt.order_by(*order)
+    if params.limit is None:
+        return list((await db.execute(stmt)).scalars().all())
+    result = await db.execute(stmt.limit(params.limit + 1))
+    rows = list(result.scalars().all())
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, col.key) for col in columns])
+    return rows
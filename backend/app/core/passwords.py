@@ -0,0 +1,92 @@
+"""
+パスワードハッシュ（bcrypt）の非同期実行
+- bcrypt は1回で数百ミリ秒 CPU を使うため、イベントループではなく専用のスレッドプールで実行する
+  （bcrypt は計算中に GIL を解放する）
+- 実行中 + 待ちの件数が PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE に達したら待たせずに 503 を返す
+- BCRYPT_ROUNDS を変えた場合、ログイン成功時に新しいコストで再ハッシュする（needs_rehash）
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.core import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+_rejected = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt",
+        )
+    return _executor
+
+
+def _saturated() -> bool:
+    return _pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+
+
+async def _run(func: Callable[..., T], *args) -> T:
+    global _pending, _rejected
+    if _saturated():
+        _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="混み合っています。しばらくしてから再度お試しください",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run(verify_password, password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """ハッシュのコスト（$2b$12$... の 12）が BCRYPT_ROUNDS と異なるか"""
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+async def rehash_if_needed(password: str, hashed: str) -> Optional[str]:
+    """
+    コストが変わっていれば新しいハッシュを返す（ログイン成功後に呼ぶ）。
+    混雑時はログイン自体を失敗させないよう再ハッシュを見送って None を返す。
+    """
+    if not needs_rehash(hashed) or _saturated():
+        return None
+    try:
+        return await hash_password_async(password)
+    except HTTPException:
+        return None
+
+
+def get_password_hasher_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+        "pending": _pending,
+        "rejected": _rejected,
+    }
@@ -1,11 +1,208 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 from app.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+T = TypeVar("T")
+
+
+def _engine_options() -> dict:
+    if IS_SQLITE:
+        return {}
+    # 長寿命のプロセス（API・Celeryワーカー）で切断済みの接続を掴まないようにする
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+
+
+def sqlite_pragmas() -> Dict[str, object]:
+    """SQLITE_TUNED のときに接続ごとに設定する PRAGMA"""
+    return {
+        # WAL: 書き込み中も読み取りはブロックされない
+        "journal_mode": "WAL",
+        # WAL では NORMAL でも破損しない（電源断時に直近のコミットが失われうるのみ）
+        "synchronous": "NORMAL",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        # 負の値は KiB 単位
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+
+
+def configure_sqlite(target: AsyncEngine) -> None:
+    """接続時に PRAGMA を設定するイベントを登録する"""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(target.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+engine = create_async_engine(settings.DATABASE_URL, echo=False, **_engine_options())
+if IS_SQLITE and settings.SQLITE_TUNED:
+    configure_sqlite(engine)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+# ─── SQLite の書き込みキュー ───
+# SQLite は同時に1つしか書き込めず、競合した側は busy_timeout の間ポーリングで待つ。
+# バックグラウンドの書き込みは run_write で1本の書き込みタスクに集め、
+# 溜まった分（最大 SQLITE_WRITE_BATCH 件）を1トランザクション・1コミットでまとめて書く。
+
+WriteJob = Callable[[AsyncSession], Awaitable[T]]
+
+
+class SQLiteWriter:
+    """
+    書き込みジョブを順番に実行する単一の書き込みタスク。
+    ジョブは DB 操作のみを行い、コミットしないこと（途中で失敗したバッチは巻き戻して1件ずつ再実行する）。
+    close() は停止の目印をキューに積み、それまでに積まれたジョブを書き終えるのを待つ（実行中のコミットは中断しない）。
+    """
+
+    # キューに積む停止の目印
+    _STOP = None
+
+    def __init__(self, sessionmaker: async_sessionmaker, batch_size: int):
+        self.sessionmaker = sessionmaker
+        self.batch_size = max(1, batch_size)
+        self._queue: "asyncio.Queue[Optional[Tuple[WriteJob, asyncio.Future]]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.jobs = 0
+        self.commits = 0
+        self.retried = 0
+
+    async def submit(self, job: WriteJob) -> T:
+        if self._closing:
+            raise RuntimeError("書き込みキューは停止中です")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            batch = [(job, future) for job, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            try:
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # ループの終了等で外から止められた場合も待っている側を残さない
+                for _job, future in batch:
+                    future.cancel()
+                raise
+
+    async def _write(self, batch: list) -> None:
+        try:
+            await self._commit(batch)
+        except Exception:
+            # どれかが失敗したらまとめて巻き戻し、1件ずつ実行し直して失敗したものだけに例外を返す
+            self.retried += len(batch)
+            for item in batch:
+                try:
+                    await self._commit([item])
+                except Exception as e:
+                    if not item[1].done():
+                        item[1].set_exception(e)
+
+    async def _commit(self, batch: list) -> None:
+        results = []
+        async with self.sessionmaker() as session:
+            for job, _future in batch:
+                results.append(await job(session))
+            await session.commit()
+        self.jobs += len(batch)
+        self.commits += 1
+        for (_job, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """キューに残ったジョブを書き終えてから停止する（停止後に残ったジョブは例外で返す）"""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            await self._queue.put(self._STOP)
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not self._STOP and not item[1].done():
+                item[1].set_exception(RuntimeError("書き込みキューが停止したため実行されませんでした"))
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "jobs": self.jobs,
+            "commits": self.commits,
+            "retried": self.retried,
+        }
+
+
+# 書き込みタスクはイベントループごと（API と Celery ワーカーのランタイムでループが異なる）
+_writers: Dict[int, SQLiteWriter] = {}
+
+
+def _get_writer() -> SQLiteWriter:
+    loop_id = id(asyncio.get_running_loop())
+    writer = _writers.get(loop_id)
+    if writer is None:
+        writer = _writers[loop_id] = SQLiteWriter(async_session, settings.SQLITE_WRITE_BATCH)
+    return writer
+
+
+async def run_write(job: WriteJob) -> T:
+    """
+    job(session) を実行してコミットし、戻り値を返す。
+    SQLite で SQLITE_SINGLE_WRITER の場合は書き込みタスクに渡し、他の書き込みとまとめてコミットする。
+    """
+    if IS_SQLITE and settings.SQLITE_SINGLE_WRITER:
+        return await _get_writer().submit(job)
+    async with async_session() as session:
+        result = await job(session)
+        await session.commit()
+    return result
+
+
+async def close_sqlite_writer() -> None:
+    writer = _writers.pop(id(asyncio.get_running_loop()), None)
+    if writer is not None:
+        await writer.close()
+
+
+def get_sqlite_writer_stats() -> Optional[dict]:
+    writers = list(_writers.values())
+    if not writers:
+        return None
+    return {key: sum(w.stats()[key] for w in writers) for key in ("queued", "jobs", "commits", "retried")}
+
+
 class Base(DeclarativeBase):
     pass
 
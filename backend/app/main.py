@@ -4,9 +4,15 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import init_db
+from app.database import close_sqlite_writer, init_db
+from app.core.http import start_http_clients, close_http_clients
+from app.core.metrics import MetricsMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.post_outbox import start_outbox_dispatchers, stop_outbox_dispatchers
+from app.services.click_buffer import start_click_flusher, stop_click_flusher
+from app.services.link_resolver import preload_top_links
 from app.api import auth, sns, genres, posts, schedules, affiliate, links, analytics
-from app.api import autopilot
+from app.api import autopilot, metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,29 +21,57 @@ _scheduler_task = None
 
 
 async def _scheduler_loop():
-    """1分ごとにスケジュールチェックして自動投稿を実行"""
+    """
+    1分ごとにスケジュールチェックして自動投稿を実行
+    （全レプリカで動かしても、期限到来分は行単位で確保するため二重実行しない）
+    """
     from app.services.auto_scheduler import check_and_run_scheduled
 
+    tick = settings.SCHEDULER_TICK_SECONDS
+    loop = asyncio.get_running_loop()
     while True:
+        started = loop.time()
         try:
             await check_and_run_scheduled()
         except Exception as e:
             logger.error(f"スケジューラーエラー: {e}")
-        await asyncio.sleep(60)  # 1分間待機
+        # 実行にかかった時間を差し引いて次のティックまで待機
+        await asyncio.sleep(max(1.0, tick - (loop.time() - started)))
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 起動時にDBテーブルを作成
     await init_db()
+    # 外部API用の共有HTTPクライアントを開始
+    await start_http_clients()
     # バックグラウンドスケジューラー起動
     global _scheduler_task
-    _scheduler_task = asyncio.create_task(_scheduler_loop())
-    logger.info("自動投稿スケジューラーを起動しました")
+    if settings.SCHEDULER_IN_PROCESS:
+        _scheduler_task = asyncio.create_task(_scheduler_loop())
+        logger.info("自動投稿スケジューラーを起動しました")
+    # 投稿アウトボックスの送信ワーカー起動
+    if settings.OUTBOX_IN_PROCESS:
+        start_outbox_dispatchers()
+    # クリックログの書き出しタスク起動
+    start_click_flusher()
+    # よく使われる短縮URLをキャッシュに先読み
+    try:
+        await preload_top_links()
+    except Exception as e:
+        logger.warning(f"短縮URLキャッシュの先読みに失敗: {e}")
     yield
-    # シャットダウン時にスケジューラーを停止
+    # シャットダウン時にスケジューラーを停止し、リーダーリースを手放す
     if _scheduler_task:
         _scheduler_task.cancel()
+    await stop_outbox_dispatchers()
+    await stop_click_flusher()
+    from app.services.coordination import release_leases
+
+    await release_leases()
+    # 書き込みキューに残ったジョブを書き終えてから終了する
+    await close_sqlite_writer()
+    await close_http_clients()
 
 
 app = FastAPI(
@@ -54,7 +88,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+# リクエストの処理時間をルート単位で計測（/metrics で出力）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(auth.router)
@@ -66,6 +104,7 @@ app.include_router(affiliate.router)
 app.include_router(links.router)
 app.include_router(analytics.router)
 app.include_router(autopilot.router)
+app.include_router(metrics.router)
 
 @app.get("/api/setup-admin-user")
 async def setup_admin_user():
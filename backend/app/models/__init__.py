@@ -12,6 +12,9 @@ from app.models.affiliate_offer import AffiliateOffer
 from app.models.short_link import ShortLink
 from app.models.click_log import ClickLog
 from app.models.affiliate_revenue import AffiliateRevenue
+from app.models.scheduler_lease import SchedulerLease
+from app.models.post_outbox import PostOutbox, PostStatusEvent
+from app.models.click_rollup import ClickHourly, ClickDaily
 
 __all__ = [
     "User",
@@ -28,4 +31,9 @@ __all__ = [
     "ShortLink",
     "ClickLog",
     "AffiliateRevenue",
+    "SchedulerLease",
+    "PostOutbox",
+    "PostStatusEvent",
+    "ClickHourly",
+    "ClickDaily",
 ]
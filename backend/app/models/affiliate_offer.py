@@ -1,11 +1,13 @@
 import uuid
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
 class AffiliateOffer(Base):
     __tablename__ = "affiliate_offers"
+    # 一覧（title, id 順のページネーション）用
+    __table_args__ = (Index("ix_affiliate_offers_user_title", "user_id", "title", "id"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
@@ -1,12 +1,13 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Float, DateTime, ForeignKey, func
+from sqlalchemy import String, Float, DateTime, ForeignKey, func, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
 class AffiliateRevenue(Base):
     __tablename__ = "affiliate_revenue"
+    __table_args__ = (Index("ix_affiliate_revenue_user_recorded", "user_id", "recorded_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
@@ -1,12 +1,17 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, ForeignKey, func
+from sqlalchemy import String, DateTime, ForeignKey, func, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
 class ClickLog(Base):
     __tablename__ = "click_logs"
+    # リンク別の集計・保持期間による削除用
+    __table_args__ = (
+        Index("ix_click_logs_link_clicked", "link_id", "clicked_at"),
+        Index("ix_click_logs_clicked_at", "clicked_at"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     link_id: Mapped[str] = mapped_column(String, ForeignKey("short_links.id"), nullable=False)
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from sqlalchemy import String, Integer, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.database import Base
+
+
+class ClickHourly(Base):
+    """リンク × 時間（UTC）ごとのクリック数。クリック書き込み時に加算する"""
+    __tablename__ = "click_hourly"
+    __table_args__ = (
+        Index("ix_click_hourly_user_hour", "user_id", "hour"),
+        # 保持期間を過ぎた行の削除用
+        Index("ix_click_hourly_hour", "hour"),
+    )
+
+    link_id: Mapped[str] = mapped_column(String, ForeignKey("short_links.id"), primary_key=True)
+    hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
+    clicks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    link = relationship("ShortLink", back_populates="click_hourly")
+
+
+class ClickDaily(Base):
+    """リンク × 日（UTC）ごとのクリック数。クリック書き込み時に加算する"""
+    __tablename__ = "click_daily"
+    __table_args__ = (
+        Index("ix_click_daily_user_day", "user_id", "day"),
+        # 直近の日数でリンクを順位付けする短縮URLキャッシュの先読み用（clicks まで含めて表を引かない）
+        Index("ix_click_daily_day_link", "day", "link_id", "clicks"),
+    )
+
+    link_id: Mapped[str] = mapped_column(String, ForeignKey("short_links.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
+    clicks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    link = relationship("ShortLink", back_populates="click_daily")
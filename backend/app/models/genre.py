@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import String, ForeignKey, JSON
+from sqlalchemy import String, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
@@ -8,6 +8,8 @@ from typing import List
 
 class Genre(Base):
     __tablename__ = "genres"
+    # 一覧（genre_name, id 順のページネーション）・全自動モードのジャンル取得用
+    __table_args__ = (Index("ix_genres_user_name", "user_id", "genre_name", "id"),)
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
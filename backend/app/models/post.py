@@ -1,13 +1,15 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, DateTime, ForeignKey, func
+from sqlalchemy import String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
 class Post(Base):
     __tablename__ = "posts"
+    # 一覧のキーセットページネーション（user_id で絞り created_at, id の降順）用
+    __table_args__ = (Index("ix_posts_user_created", "user_id", "created_at", "id"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
@@ -15,7 +17,13 @@ class Post(Base):
     content: Mapped[str] = mapped_column(String, nullable=False)
     status: Mapped[str] = mapped_column(String, default="pending")
     posted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    # アプリ側でもマイクロ秒まで設定する（同一秒内の並び順とカーソル比較を安定させる）
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), server_default=func.now()
+    )
 
     user = relationship("User", back_populates="posts")
     analytics = relationship("PostAnalytics", back_populates="post", uselist=False, cascade="all, delete-orphan")
+    # 投稿の削除時にアウトボックスの行（送信前のものを含む）と遷移履歴も消す
+    outbox = relationship("PostOutbox", uselist=False, cascade="all, delete-orphan")
+    status_events = relationship("PostStatusEvent", cascade="all, delete-orphan")
@@ -0,0 +1,45 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class PostOutbox(Base):
+    """SNS投稿待ちキュー（投稿の作成と同じトランザクションで登録し、ディスパッチャーが送信する）"""
+    __tablename__ = "post_outbox"
+    # 送信期限到来（pending）と放置された送信中（sending）の取得用
+    __table_args__ = (
+        Index("ix_post_outbox_status_next", "status", "next_attempt_at"),
+        Index("ix_post_outbox_status_locked", "status", "locked_until"),
+    )
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    post_id: Mapped[str] = mapped_column(String, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, unique=True)
+    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
+    platform: Mapped[str] = mapped_column(String, nullable=False)
+    # 未設定の場合は .env のアカウントで投稿する（連携解除時は送信前の行を失敗にしてから NULL にする）
+    sns_account_id: Mapped[Optional[str]] = mapped_column(
+        String, ForeignKey("sns_accounts.id", ondelete="SET NULL"), nullable=True
+    )
+    # pending → sending → sent / failed（sending のまま locked_until を過ぎたら再取得される）
+    status: Mapped[str] = mapped_column(String, default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class PostStatusEvent(Base):
+    """Post.status の遷移履歴"""
+    __tablename__ = "post_status_events"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    post_id: Mapped[str] = mapped_column(String, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    from_status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    to_status: Mapped[str] = mapped_column(String, nullable=False)
+    detail: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
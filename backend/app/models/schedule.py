@@ -1,16 +1,21 @@
 import uuid
-from datetime import time
-from sqlalchemy import String, Time, ForeignKey
+from datetime import datetime, time
+from typing import Optional
+from sqlalchemy import String, Time, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
 class Schedule(Base):
     __tablename__ = "schedules"
+    # 一覧（time, id 順のページネーション）用
+    __table_args__ = (Index("ix_schedules_user_time", "user_id", "time", "id"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
     time: Mapped[str] = mapped_column(String, nullable=False)
     frequency: Mapped[str] = mapped_column(String, default="daily")
+    # 次回実行日時（UTC）。スケジューラーは next_run_at <= 現在時刻 のものだけを取得する
+    next_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
 
     user = relationship("User", back_populates="schedules")
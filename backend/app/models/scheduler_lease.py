@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class SchedulerLease(Base):
+    """リーダーリース（Redis / Postgres advisory lock が使えない環境用）"""
+    __tablename__ = "scheduler_leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -1,11 +1,12 @@
 import uuid
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
 class ShortLink(Base):
     __tablename__ = "short_links"
+    __table_args__ = (Index("ix_short_links_user", "user_id", "id"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
@@ -14,3 +15,5 @@ class ShortLink(Base):
 
     user = relationship("User", back_populates="short_links")
     click_logs = relationship("ClickLog", back_populates="link", cascade="all, delete-orphan")
+    click_hourly = relationship("ClickHourly", back_populates="link", cascade="all, delete-orphan")
+    click_daily = relationship("ClickDaily", back_populates="link", cascade="all, delete-orphan")
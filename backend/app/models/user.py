@@ -16,6 +16,8 @@ class User(Base):
     plan_type: Mapped[str] = mapped_column(String, default="free")
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
     auto_post_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    # スケジュール時刻を解釈するタイムゾーン（IANA名）
+    timezone: Mapped[str] = mapped_column(String, default="Asia/Tokyo", server_default="Asia/Tokyo")
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now()
     )
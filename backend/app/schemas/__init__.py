@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 
 
 # ─── Auth ───
@@ -24,6 +24,7 @@ class UserResponse(BaseModel):
     email: str
     plan_type: str
     is_admin: bool = False
+    timezone: str = "Asia/Tokyo"
     created_at: datetime
 
     model_config = {"from_attributes": True}
@@ -47,6 +48,17 @@ class SnsAccountResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class RateLimitWindow(BaseModel):
+    platform: str
+    scope: str  # account / app
+    window: str
+    account_id: Optional[str] = None
+    limit: Optional[int] = None  # None は未観測（上限不明）
+    remaining: Optional[int] = None
+    reset_at: datetime
+    blocked_until: Optional[datetime] = None
+
+
 # ─── Genre ───
 class GenreCreate(BaseModel):
     genre_name: str
@@ -71,16 +83,31 @@ class ScheduleResponse(BaseModel):
     id: str
     time: str
     frequency: str
+    next_run_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
 
+class TimezoneUpdate(BaseModel):
+    timezone: str
+
+
+class TimezoneResponse(BaseModel):
+    timezone: str
+
+
 # ─── Post ───
 class PostGenerateRequest(BaseModel):
     genre: Optional[str] = None
     platform: str = "x"
 
 
+class PostBatchGenerateRequest(BaseModel):
+    # 1リクエストの生成件数（ジャンル数 × プラットフォーム数）を抑えるため上限を設ける
+    genres: List[Optional[str]] = Field(default=[None], max_length=10)
+    platforms: List[Literal["x", "threads"]] = Field(default=["x", "threads"], max_length=2)
+
+
 class PostResponse(BaseModel):
     id: str
     platform: str
@@ -160,6 +187,9 @@ class RevenueResponse(BaseModel):
 class DashboardStats(BaseModel):
     total_posts: int
     total_clicks: int
+    clicks_24h: int = 0
+    clicks_7d: int = 0
+    clicks_30d: int = 0
     total_revenue: float
     ctr: float
     recent_posts: List[PostResponse]
@@ -167,6 +197,9 @@ class DashboardStats(BaseModel):
 
 class AffiliateStats(BaseModel):
     total_clicks: int
+    clicks_24h: int = 0
+    clicks_7d: int = 0
+    clicks_30d: int = 0
     total_revenue: float
     ctr: float
     offers: List[AffiliateOfferResponse]
@@ -1,11 +1,26 @@
+import asyncio
+import json
+import logging
 import random
 from typing import Optional, List
 from app.config import settings
+from app.core.http import get_openai_client
+from app.services.buzz_collector import merge_trends
+from app.services.generation_cache import generation_cache
+from app.services.llm_limiter import chat_completion
 
-try:
-    from openai import AsyncOpenAI
-except ImportError:
-    AsyncOpenAI = None
+logger = logging.getLogger(__name__)
+
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.9
+
+
+def platform_max_chars(platform: str) -> int:
+    return 280 if platform == "x" else 500
+
+
+def _platform_name(platform: str) -> str:
+    return "X (Twitter)" if platform == "x" else "Threads"
 
 
 async def generate_post_content(
@@ -18,19 +33,43 @@ async def generate_post_content(
     - OpenAI APIキー設定時: トレンドデータをコンテキストとしてAIが生成
     - 未設定時: トレンドデータを使ったテンプレート生成
     """
-    if not settings.OPENAI_API_KEY or AsyncOpenAI is None:
+    client = get_openai_client()
+    if client is None:
         return _template_generate(genre, platform, trend_data)
 
-    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    cache_key = _cache_key(trend_data, genre, platform)
+    if cache_key:
+        cached = await generation_cache.get(cache_key)
+        if cached:
+            return cached
+
+    content = await _complete_single(client, genre, platform, trend_data)
+    if cache_key:
+        await generation_cache.put(cache_key, content)
+    return content
 
-    platform_name = "X (Twitter)" if platform == "x" else "Threads"
-    max_chars = 280 if platform == "x" else 500
+
+def _cache_key(trend_data: Optional[dict], genre: Optional[str], platform: str) -> Optional[str]:
+    """生成キャッシュのキー（無効時は None）"""
+    if not settings.GENERATION_CACHE_ENABLED:
+        return None
+    return generation_cache.make_key(
+        _build_trend_context(trend_data, genre), genre, platform, MODEL, TEMPERATURE
+    )
+
+
+async def _complete_single(client, genre: Optional[str], platform: str, trend_data: Optional[dict]) -> str:
+    """1投稿分のチャット補完（キャッシュなし）"""
+    platform_name = _platform_name(platform)
+    max_chars = platform_max_chars(platform)
 
     # トレンドコンテキストを構築
     trend_context = _build_trend_context(trend_data, genre)
 
-    response = await client.chat.completions.create(
-        model="gpt-4o-mini",
+    response = await chat_completion(
+        client,
+        operation="single",
+        model=MODEL,
         messages=[
             {
                 "role": "system",
@@ -50,12 +89,180 @@ async def generate_post_content(
             {"role": "user", "content": "今のトレンドに基づいてバズる投稿を1つ生成して"},
         ],
         max_tokens=400,
-        temperature=0.9,
+        temperature=TEMPERATURE,
     )
 
     return response.choices[0].message.content.strip()
 
 
+async def generate_posts_batch(
+    targets: List[dict],
+    trend_data: Optional[dict] = None,
+    return_exceptions: bool = False,
+) -> list:
+    """
+    複数の投稿を1回の構造化(JSON)リクエストでまとめて生成する。
+    targets: [{"genre": ..., "platform": ..., "max_chars": 任意, "x_buzz": 任意}, ...]
+      - 共通のトレンドコンテキスト（Google Trends・ニュース）はリクエスト内で1回だけ送る
+      - x_buzz を指定した場合はその項目だけのバズ投稿として扱う
+    JSONが壊れている・欠けている・文字数超過の項目は generate_post_content で個別に再生成する。
+    戻り値は targets と同じ順序の投稿文リスト。
+    return_exceptions=True の場合、個別生成にも失敗した項目は例外オブジェクトになる。
+    """
+    if not targets:
+        return []
+
+    client = get_openai_client()
+    if client is None:
+        return [
+            _template_generate(t.get("genre"), t.get("platform", "x"), _item_trend_data(trend_data, t))
+            for t in targets
+        ]
+
+    # 生成キャッシュで充足できる項目を先に埋める
+    keys = [_cache_key(_item_trend_data(trend_data, t), t.get("genre"), t.get("platform", "x")) for t in targets]
+    drafts: list = [None] * len(targets)
+    for i, key in enumerate(keys):
+        if key:
+            drafts[i] = await generation_cache.get(key)
+    pending = [i for i, draft in enumerate(drafts) if draft is None]
+    if not pending:
+        return drafts
+
+    size = max(1, settings.LLM_BATCH_MAX_ITEMS)
+    chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+    results = await asyncio.gather(
+        *(
+            _generate_chunk(client, [targets[i] for i in chunk], trend_data, return_exceptions)
+            for chunk in chunks
+        )
+    )
+    for chunk, chunk_result in zip(chunks, results):
+        for i, content in zip(chunk, chunk_result):
+            drafts[i] = content
+            if keys[i] and isinstance(content, str):
+                await generation_cache.put(keys[i], content)
+    return drafts
+
+
+async def _generate_chunk(
+    client,
+    targets: List[dict],
+    trend_data: Optional[dict],
+    return_exceptions: bool,
+) -> list:
+    drafts: list = [None] * len(targets)
+    try:
+        response = await chat_completion(
+            client,
+            operation="batch",
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": _build_batch_prompt(targets, trend_data)},
+                {"role": "user", "content": "各項目について今のトレンドに基づいてバズる投稿を生成して"},
+            ],
+            max_tokens=min(4000, 400 * len(targets)),
+            temperature=TEMPERATURE,
+            response_format={"type": "json_object"},
+        )
+        drafts = _parse_batch_response(response.choices[0].message.content, targets)
+    except Exception as e:
+        logger.warning(f"一括生成失敗のため個別生成にフォールバック: {e}")
+
+    async def _fallback(index: int) -> str:
+        target = targets[index]
+        return await _complete_single(
+            client,
+            target.get("genre"),
+            target.get("platform", "x"),
+            _item_trend_data(trend_data, target),
+        )
+
+    missing = [i for i, draft in enumerate(drafts) if draft is None]
+    if missing:
+        logger.info(f"一括生成: {len(missing)}/{len(targets)}件を個別生成")
+        regenerated = await asyncio.gather(
+            *(_fallback(i) for i in missing), return_exceptions=return_exceptions
+        )
+        for i, content in zip(missing, regenerated):
+            drafts[i] = content
+    return drafts
+
+
+def _build_batch_prompt(targets: List[dict], trend_data: Optional[dict]) -> str:
+    """共通トレンドを1回だけ含む一括生成用のシステムプロンプト"""
+    shared = {
+        "google_trends": (trend_data or {}).get("google_trends", []),
+        "news": (trend_data or {}).get("news", []),
+    }
+    shared_context = _build_trend_context(shared, None) if trend_data else "（トレンドデータなし）"
+
+    items = []
+    for i, target in enumerate(targets):
+        platform = target.get("platform", "x")
+        max_chars = target.get("max_chars") or platform_max_chars(platform)
+        lines = [
+            f"[{i}] プラットフォーム: {_platform_name(platform)} / ジャンル: {target.get('genre') or 'テクノロジー'}"
+            f" / {max_chars}文字以内"
+        ]
+        x_buzz = target.get("x_buzz")
+        if x_buzz is None:
+            x_buzz = (trend_data or {}).get("x_buzz", [])
+        for item in x_buzz[:3]:
+            lines.append(f"  ・Xでバズっている投稿: {item.get('description', '')[:80]}")
+        items.append("\n".join(lines))
+
+    return (
+        "あなたはSNSでバズる投稿を作成するプロのSNSコピーライターです。\n"
+        "以下の現在のトレンドデータを参考にして、各項目ごとにバズる投稿を1つずつ生成してください。\n\n"
+        f"【現在のトレンド情報】\n{shared_context}\n\n"
+        f"【生成する項目】\n" + "\n".join(items) + "\n\n"
+        "【投稿ルール】\n"
+        "- 各項目の文字数以内\n"
+        "- トレンドに乗った内容にする\n"
+        "- 共感を呼ぶ・役に立つ・意外性のある内容にする\n"
+        "- エンゲージメントが高くなるような文体\n"
+        "- ハッシュタグを2-3個含める\n"
+        "- 項目ごとに異なる内容にする\n\n"
+        "【出力形式】\n"
+        '次のJSONのみを出力: {"posts": [{"id": 項目番号, "content": "投稿文"}, ...]}'
+    )
+
+
+def _parse_batch_response(raw: Optional[str], targets: List[dict]) -> List[Optional[str]]:
+    """構造化出力を項目ごとに検証する。不正な項目は None（個別生成の対象）"""
+    drafts: List[Optional[str]] = [None] * len(targets)
+    try:
+        posts = json.loads(raw or "").get("posts", [])
+    except (ValueError, AttributeError):
+        return drafts
+    if not isinstance(posts, list):
+        return drafts
+
+    for position, post in enumerate(posts):
+        if not isinstance(post, dict):
+            continue
+        index = post.get("id", position)
+        content = post.get("content")
+        if not isinstance(index, int) or not 0 <= index < len(targets):
+            continue
+        if not isinstance(content, str) or not content.strip():
+            continue
+        target = targets[index]
+        max_chars = target.get("max_chars") or platform_max_chars(target.get("platform", "x"))
+        if len(content.strip()) > max_chars:
+            continue
+        drafts[index] = content.strip()
+    return drafts
+
+
+def _item_trend_data(trend_data: Optional[dict], target: dict) -> Optional[dict]:
+    """項目固有の x_buzz を反映したトレンドデータ（個別生成・テンプレート用）"""
+    if target.get("x_buzz") is None:
+        return trend_data
+    return merge_trends(trend_data or {}, target["x_buzz"])
+
+
 def _build_trend_context(trend_data: Optional[dict], genre: Optional[str]) -> str:
     """トレンドデータからAIに渡すコンテキスト文を構築"""
     if not trend_data:
@@ -2,205 +2,404 @@
 自動投稿スケジューラーサービス
 全自動おまかせモード: ジャンル×プラットフォームでトレンド収集→投稿生成→SNS投稿
 """
+import asyncio
 import logging
-from typing import Optional
-from sqlalchemy import select
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import async_session
+from app.config import settings
+from app.core.metrics import EXTERNAL_BUCKETS, Counter, Histogram
+from app.database import async_session, run_write
 from app.models.user import User
 from app.models.genre import Genre
 from app.models.schedule import Schedule
 from app.models.post import Post
 from app.models.generated_post import GeneratedPost
 from app.models.sns_account import SnsAccount
-from app.services.buzz_collector import collect_all_trends
-from app.services.ai_generator import generate_post_content
-from app.services.sns_poster import post_to_x, post_to_threads
+from app.services.buzz_collector import collect_global_trends, collect_keyword_buzz
+from app.services.ai_generator import generate_posts_batch
+from app.services.dashboard_stats import invalidate_user_stats
+from app.services.post_outbox import enqueue_post
+from app.services.schedule_clock import compute_next_run_at, utcnow
 
 logger = logging.getLogger(__name__)
 
 PLATFORMS = ["x", "threads"]
 
-
-async def run_autopilot_for_user(user_id: str) -> list:
+# ─── メトリクス ───
+# ユーザーIDはラベルにしない（系列数がユーザー数に比例して増えるため）。1回の実行 = 1ユーザー分
+_autopilot_runs = Counter(
+    "autobuzz_autopilot_runs_total", "全自動モードのユーザー単位の実行回数（completed / skipped / failed）", ["outcome"]
+)
+_autopilot_seconds = Histogram(
+    "autobuzz_autopilot_run_duration_seconds", "全自動モードのユーザー単位の実行時間", buckets=EXTERNAL_BUCKETS
+)
+_autopilot_posts = Counter("autobuzz_autopilot_posts_total", "全自動モードで生成した投稿", ["platform", "status"])
+_tick_seconds = Histogram(
+    "autobuzz_scheduler_tick_duration_seconds",
+    "スケジューラーの1ティックの処理時間",
+    ["dispatch"],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+_tick_errors = Counter("autobuzz_scheduler_tick_errors_total", "スケジューラーのティックの失敗")
+_schedule_lag = Histogram(
+    "autobuzz_scheduler_lag_seconds",
+    "予定時刻から確保までの遅延",
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+)
+_schedule_runs = Counter("autobuzz_scheduler_runs_total", "確保したスケジュール（due / skipped_late）", ["result"])
+
+
+async def run_autopilot_for_user(user_id: str, global_trends: Optional[dict] = None) -> list:
     """
     指定ユーザーの全ジャンル × 全プラットフォームで
-    トレンド収集 → 投稿生成 → SNS投稿を実行する
+    トレンド収集 → 投稿生成 → 投稿アウトボックスへの登録を行う
+    （投稿生成は1回の一括リクエスト、収集の同時実行数は設定のセマフォで制限、
+    DB書き込みは最後にまとめて行う。SNSへの送信は post_outbox のディスパッチャーが行う）
+    global_trends: ティック単位で共有するグローバルトレンド（未指定時はここで1回だけ取得）
     """
-    results = []
+    started = time.perf_counter()
+    try:
+        results = await _run_autopilot_for_user(user_id, global_trends)
+    except Exception:
+        _autopilot_runs.inc("failed")
+        raise
+    finally:
+        _autopilot_seconds.observe(time.perf_counter() - started)
+    _autopilot_runs.inc("completed" if results else "skipped")
+    for result in results:
+        _autopilot_posts.inc(result["platform"], result["status"])
+    return results
 
+
+async def _run_autopilot_for_user(user_id: str, global_trends: Optional[dict]) -> list:
     async with async_session() as db:
         # ユーザー取得
         user_result = await db.execute(select(User).where(User.id == user_id))
         user = user_result.scalar_one_or_none()
         if not user or not user.auto_post_enabled:
-            return results
+            return []
 
         # ジャンル取得
         genres_result = await db.execute(select(Genre).where(Genre.user_id == user_id))
         genres = genres_result.scalars().all()
 
-        if not genres:
-            # ジャンル未設定の場合はデフォルトで1回実行
-            genres = [type("GenreMock", (), {"genre_name": None, "keywords_list": []})()]
-
         # SNSアカウント取得
         sns_result = await db.execute(select(SnsAccount).where(SnsAccount.user_id == user_id))
         sns_accounts = {a.platform: a for a in sns_result.scalars().all()}
 
-        # .envからのフォールバック (DBにない場合)
-        from app.config import settings
-        
-        if "x" not in sns_accounts and settings.X_ACCESS_TOKEN:
-            # 簡易オブジェクトを作成して擬似的にアカウントとして扱う
-            sns_accounts["x"] = type("SnsAccountMock", (), {
-                "access_token": settings.X_ACCESS_TOKEN,
-                "access_token_secret": settings.X_ACCESS_TOKEN_SECRET,
-                "platform": "x"
-            })()
-            logger.info("Xアカウント: .env設定を使用します")
-
-        if "threads" not in sns_accounts and settings.THREADS_ACCESS_TOKEN:
-             sns_accounts["threads"] = type("SnsAccountMock", (), {
-                "access_token": settings.THREADS_ACCESS_TOKEN,
-                "platform": "threads"
-            })()
-             logger.info("Threadsアカウント: .env設定を使用します")
-
-        for genre in genres:
-            genre_name = getattr(genre, "genre_name", None)
-            keywords = getattr(genre, "keywords_list", []) if hasattr(genre, "keywords_list") else []
-
-            # トレンド収集
-            try:
-                trend_data = await collect_all_trends(keywords=keywords or None)
-            except Exception as e:
-                logger.warning(f"トレンド収集失敗 (genre={genre_name}): {e}")
-                trend_data = None
-
-            for platform in PLATFORMS:
-                try:
-                    # AI投稿生成
-                    content = await generate_post_content(
-                        genre=genre_name,
-                        platform=platform,
-                        trend_data=trend_data,
-                    )
-
-                    # DB保存
-                    generated = GeneratedPost(user_id=user_id, content=content)
-                    db.add(generated)
-
-                    post = Post(
-                        user_id=user_id,
-                        platform=platform,
-                        content=content,
-                        status="pending",
-                    )
-                    db.add(post)
-                    await db.flush()
-                    await db.refresh(post)
-
-                    # SNS投稿実行
-                    sns_account = sns_accounts.get(platform)
-                    posted = False
-                    post_error = None
-
-                    if sns_account and sns_account.access_token:
-                        try:
-                            if platform == "x":
-                                result = await post_to_x(
-                                    content,
-                                    sns_account.access_token,
-                                    sns_account.access_token_secret or "",
-                                )
-                            elif platform == "threads":
-                                result = await post_to_threads(
-                                    content,
-                                    sns_account.access_token,
-                                )
-                            # モック投稿でないか確認
-                            posted = not result.get("mock", False)
-                            if result.get("mock"):
-                                logger.info(f"モック投稿: {result.get('message', '')}")
-                        except Exception as e:
-                            post_error = str(e)
-                            logger.error(f"SNS投稿失敗 ({platform}): {e}")
-                    else:
-                        post_error = f"SNSアカウント未連携 ({platform})"
-                        logger.warning(post_error)
-
-                    # ステータス更新
-                    from datetime import datetime, timezone
-                    if posted:
-                        post.status = "posted"
-                        post.posted_at = datetime.now(timezone.utc)
-                    else:
-                        post.status = "draft"
-
-                    results.append({
-                        "post_id": post.id,
-                        "platform": platform,
-                        "genre": genre_name,
-                        "content": content[:80],
-                        "status": post.status,
-                    })
-
-                except Exception as e:
-                    logger.error(f"自動投稿エラー (genre={genre_name}, platform={platform}): {e}")
-                    results.append({
-                        "platform": platform,
-                        "genre": genre_name,
-                        "error": str(e),
-                        "status": "error",
-                    })
-
-        await db.commit()
+    if not genres:
+        # ジャンル未設定の場合はデフォルトで1回実行
+        genres = [type("GenreMock", (), {"genre_name": None, "keywords_list": []})()]
+
+    # .envからのフォールバック (DBにない場合)
+    if "x" not in sns_accounts and settings.X_ACCESS_TOKEN:
+        # 簡易オブジェクトを作成して擬似的にアカウントとして扱う
+        sns_accounts["x"] = type("SnsAccountMock", (), {
+            "access_token": settings.X_ACCESS_TOKEN,
+            "access_token_secret": settings.X_ACCESS_TOKEN_SECRET,
+            "platform": "x"
+        })()
+        logger.info("Xアカウント: .env設定を使用します")
+
+    if "threads" not in sns_accounts and settings.THREADS_ACCESS_TOKEN:
+        sns_accounts["threads"] = type("SnsAccountMock", (), {
+            "access_token": settings.THREADS_ACCESS_TOKEN,
+            "platform": "threads"
+        })()
+        logger.info("Threadsアカウント: .env設定を使用します")
+
+    # グローバルトレンド（Google Trends + RSS）はジャンルに依存しないため1回だけ取得
+    if global_trends is None:
+        try:
+            global_trends = await collect_global_trends()
+        except Exception as e:
+            logger.warning(f"グローバルトレンド収集失敗: {e}")
+
+    collect_sem = asyncio.Semaphore(settings.AUTOPILOT_COLLECT_CONCURRENCY)
+
+    async def _collect(genre_name: Optional[str], keywords: list) -> Optional[list]:
+        # キーワード別のXバズのみジャンルごとに取得
+        try:
+            async with collect_sem:
+                return await collect_keyword_buzz(keywords or None)
+        except Exception as e:
+            logger.warning(f"トレンド収集失敗 (genre={genre_name}): {e}")
+            return None
+
+    def _prepare(target: dict, content) -> dict:
+        genre_name = target["genre"]
+        platform = target["platform"]
+        if isinstance(content, Exception):
+            logger.error(f"自動投稿エラー (genre={genre_name}, platform={platform}): {content}")
+            return {
+                "platform": platform,
+                "genre": genre_name,
+                "error": str(content),
+                "status": "error",
+            }
+        sns_account = sns_accounts.get(platform)
+        linked = bool(sns_account and sns_account.access_token)
+        if not linked:
+            logger.warning(f"SNSアカウント未連携 ({platform})")
+        return {
+            "post_id": str(uuid.uuid4()),
+            "platform": platform,
+            "genre": genre_name,
+            "content": content,
+            # 送信はアウトボックスのディスパッチャーが行う
+            "status": "queued" if linked else "draft",
+            # .env フォールバックのアカウントは DB に無いため None（送信時に .env を使う）
+            "sns_account_id": getattr(sns_account, "id", None) if linked else None,
+        }
+
+    # 1. トレンド収集（ジャンルごと並行）
+    genre_specs = [
+        (
+            getattr(genre, "genre_name", None),
+            getattr(genre, "keywords_list", []) if hasattr(genre, "keywords_list") else [],
+        )
+        for genre in genres
+    ]
+    x_buzz_per_genre = await asyncio.gather(
+        *(_collect(genre_name, keywords) for genre_name, keywords in genre_specs)
+    )
+
+    # 2. AI投稿生成（全ジャンル×全プラットフォームを一括リクエスト）
+    targets = [
+        {"genre": genre_name, "platform": platform, "x_buzz": x_buzz}
+        for (genre_name, _keywords), x_buzz in zip(genre_specs, x_buzz_per_genre)
+        for platform in PLATFORMS
+    ]
+    try:
+        contents = await generate_posts_batch(targets, global_trends, return_exceptions=True)
+    except Exception as e:
+        logger.error(f"投稿生成失敗: {e}")
+        contents = [e] * len(targets)
+
+    # 3. 投稿をアウトボックスに登録（SNSへの送信は別のディスパッチャーが再試行付きで行う）
+    outcomes = [_prepare(target, content) for target, content in zip(targets, contents)]
+
+    # DB保存（まとめて1トランザクション）
+    async def _save(db: AsyncSession) -> None:
+        for outcome in outcomes:
+            if outcome["status"] == "error":
+                continue
+            db.add(GeneratedPost(user_id=user_id, content=outcome["content"]))
+            post = Post(
+                id=outcome["post_id"],
+                user_id=user_id,
+                platform=outcome["platform"],
+                content=outcome["content"],
+                status="draft",
+            )
+            db.add(post)
+            if outcome["status"] == "queued":
+                enqueue_post(db, post, outcome["sns_account_id"])
+
+    await run_write(_save)
+    invalidate_user_stats(user_id)
 
+    results = []
+    for outcome in outcomes:
+        if outcome["status"] == "error":
+            results.append(outcome)
+            continue
+        results.append({
+            "post_id": outcome["post_id"],
+            "platform": outcome["platform"],
+            "genre": outcome["genre"],
+            "content": outcome["content"][:80],
+            "status": outcome["status"],
+        })
     return results
 
 
-async def check_and_run_scheduled():
+async def _backfill_next_run_at(db: AsyncSession) -> None:
+    """next_run_at 未設定（移行前・不正値）のスケジュールを計算して埋める"""
+    result = await db.execute(
+        select(Schedule, User.timezone)
+        .join(User, Schedule.user_id == User.id)
+        .where(Schedule.next_run_at.is_(None))
+    )
+    rows = result.all()
+    for schedule, tz_name in rows:
+        try:
+            schedule.next_run_at = compute_next_run_at(schedule.time, schedule.frequency, tz_name)
+        except ValueError:
+            logger.warning(f"スケジュール時刻が不正のためスキップ: schedule={schedule.id}, time={schedule.time}")
+
+
+class DueRun(NamedTuple):
+    """確保済みの1回分のスケジュール実行"""
+    schedule_id: str
+    user_id: str
+    email: str
+    plan_type: str
+    schedule_time: str
+    due_at: datetime
+    lag: timedelta
+
+    @property
+    def run_key(self) -> str:
+        """同じ実行を二重に処理しないための冪等キー（スケジュールID + 予定時刻）"""
+        return f"{self.schedule_id}:{self.due_at.strftime('%Y%m%dT%H%M')}"
+
+
+async def claim_due_schedules(limit: int) -> Tuple[int, List[DueRun]]:
     """
-    現在時刻がスケジュールに一致する全ユーザーの自動投稿を実行する。
-    1分ごとにバックグラウンドスケジューラーから呼ばれる。
+    期限到来スケジュールを最大 limit 件確保し、next_run_at を次回へ進めて返す。
+    - Postgres では FOR UPDATE SKIP LOCKED で行ロックし、他レプリカが確保中の行は飛ばす
+      （複数レプリカがそれぞれ別の行を取り合わずに分担する）
+    - ロックを持たない DB（SQLite）でも next_run_at の条件付き UPDATE で1件は1回しか確保されない
+    - 遅延で取りこぼした実行は SCHEDULE_CATCHUP_MINUTES 以内なら1回だけ追いかけて実行
+    戻り値: (取得した行数, 実行すべき DueRun のリスト)
     """
-    from datetime import datetime, timezone, timedelta
-
-    now_jst = datetime.now(timezone(timedelta(hours=9)))
-    current_time = now_jst.strftime("%H:%M")
-    current_weekday = now_jst.weekday()  # 0=月, 6=日
+    now = utcnow()
+    catchup_limit = timedelta(minutes=settings.SCHEDULE_CATCHUP_MINUTES)
 
-    logger.info(f"スケジュールチェック: {current_time} (weekday={current_weekday})")
-
-    async with async_session() as db:
-        # auto_post_enabled=True のユーザーのスケジュールを取得
+    async def _claim(db: AsyncSession) -> Tuple[int, List[DueRun], List[timedelta]]:
+        # auto_post_enabled=True のユーザーの期限到来スケジュールを取得
         result = await db.execute(
             select(Schedule, User)
             .join(User, Schedule.user_id == User.id)
-            .where(User.auto_post_enabled == True)
+            .where(User.auto_post_enabled == True, Schedule.next_run_at <= now)
+            .order_by(Schedule.next_run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=Schedule)
         )
         rows = result.all()
 
+        due, late = [], []
         for schedule, user in rows:
-            schedule_time = schedule.time
-            frequency = schedule.frequency
-
-            # 時刻比較（HH:MM形式）
-            if schedule_time != current_time:
+            due_at = schedule.next_run_at
+            try:
+                next_run_at = compute_next_run_at(schedule.time, schedule.frequency, user.timezone, after=now)
+            except ValueError:
+                next_run_at = None
+
+            # 現在の next_run_at が変わっていない場合のみ進める（取得できた1件だけが実行する）
+            claimed = await db.execute(
+                update(Schedule)
+                .where(Schedule.id == schedule.id, Schedule.next_run_at == due_at)
+                .values(next_run_at=next_run_at)
+            )
+            if claimed.rowcount != 1:
                 continue
 
-            # 頻度チェック
-            if frequency == "weekdays" and current_weekday >= 5:
-                continue
-            if frequency == "weekends" and current_weekday < 5:
+            lag = now - due_at
+            if lag > catchup_limit:
+                late.append(lag)
+                logger.warning(
+                    f"実行遅延が大きすぎるためスキップ: user={user.email}, "
+                    f"due={due_at.isoformat()}Z, lag={int(lag.total_seconds())}s"
+                )
                 continue
-
-            # 実行
-            logger.info(f"自動投稿実行: user={user.email}, time={schedule_time}")
+            due.append(DueRun(schedule.id, user.id, user.email, user.plan_type, schedule.time, due_at, lag))
+        return len(rows), due, late
+
+    # メトリクスはコミット後に記録する（書き込みキューでジョブが再実行されても二重に数えない）
+    fetched, due, late = await run_write(_claim)
+    for run in due:
+        _schedule_lag.observe(run.lag.total_seconds())
+    for lag in late:
+        _schedule_lag.observe(lag.total_seconds())
+    _schedule_runs.inc("due", amount=len(due))
+    _schedule_runs.inc("skipped_late", amount=len(late))
+    return fetched, due
+
+
+async def _run_housekeeping() -> None:
+    """リーダー（リース保持者）だけが next_run_at の補完・クリック集計の圧縮などの保守処理を行う"""
+    from app.services.click_rollup import maybe_compact_click_rollups
+    from app.services.coordination import get_leader_lease
+
+    if await get_leader_lease("scheduler").acquire():
+        await run_write(_backfill_next_run_at)
+        await maybe_compact_click_rollups()
+
+
+async def _claim_all_due_schedules() -> List[DueRun]:
+    """1ティック分（最大 SCHEDULER_BATCH_SIZE 行）の期限到来スケジュールをまとめて確保する"""
+    runs: List[DueRun] = []
+    examined = 0
+    while examined < settings.SCHEDULER_BATCH_SIZE:
+        limit = min(settings.SCHEDULER_CLAIM_BATCH_SIZE, settings.SCHEDULER_BATCH_SIZE - examined)
+        fetched, due = await claim_due_schedules(limit)
+        if not fetched:
+            break
+        examined += fetched
+        runs.extend(due)
+    return runs
+
+
+async def check_and_run_scheduled() -> int:
+    """
+    期限到来のスケジュールを確保しながら自動投稿を実行する。
+    API プロセスのスケジューラーループと Celery beat の auto_post_task から呼ばれ、
+    何プロセスで同時に呼ばれても各スケジュールは1回だけ実行される。
+    - SCHEDULER_DISPATCH=celery: 確保した分を (ユーザー, スケジュール) 単位の Celery サブタスクとして投入するだけ
+    - SCHEDULER_DISPATCH=inline: SCHEDULER_CLAIM_BATCH_SIZE 件ずつ確保 → このプロセスで実行を繰り返す
+      （レプリカを増やすと期限到来分を分担して処理できる）
+    戻り値: このプロセスで実行（または投入）したスケジュール件数
+    """
+    try:
+        with _tick_seconds.time(settings.SCHEDULER_DISPATCH):
+            return await _check_and_run_scheduled()
+    except Exception:
+        _tick_errors.inc()
+        raise
+
+
+async def _check_and_run_scheduled() -> int:
+    await _run_housekeeping()
+
+    if settings.SCHEDULER_DISPATCH == "celery":
+        from app.workers.tasks import enqueue_scheduled_runs
+
+        runs = await _claim_all_due_schedules()
+        if runs:
+            # Celery への投入はブロッキングI/Oのためスレッドで行う
+            await asyncio.to_thread(enqueue_scheduled_runs, runs)
+        logger.info(f"スケジュールチェック: {utcnow().isoformat()}Z 投入={len(runs)}件")
+        return len(runs)
+
+    # グローバルトレンドはティックごとに1回だけ取得し、全ユーザー・全ジャンルで共有
+    global_trends = None
+    sem = asyncio.Semaphore(max(1, settings.SCHEDULER_RUN_CONCURRENCY))
+
+    async def _run(run: DueRun) -> None:
+        async with sem:
+            logger.info(
+                f"自動投稿実行: user={run.email}, time={run.schedule_time}, lag={int(run.lag.total_seconds())}s"
+            )
             try:
-                results = await run_autopilot_for_user(user.id)
+                results = await run_autopilot_for_user(run.user_id, global_trends=global_trends)
                 logger.info(f"自動投稿結果: {len(results)}件 生成")
             except Exception as e:
-                logger.error(f"自動投稿失敗: user={user.email}, error={e}")
+                logger.error(f"自動投稿失敗: user={run.email}, error={e}")
+
+    examined = executed = 0
+    while examined < settings.SCHEDULER_BATCH_SIZE:
+        limit = min(settings.SCHEDULER_CLAIM_BATCH_SIZE, settings.SCHEDULER_BATCH_SIZE - examined)
+        fetched, due = await claim_due_schedules(limit)
+        if not fetched:
+            break
+        examined += fetched
+        if not due:
+            continue
+        if global_trends is None:
+            try:
+                global_trends = await collect_global_trends()
+            except Exception as e:
+                logger.warning(f"グローバルトレンド収集失敗: {e}")
+                global_trends = {}
+        await asyncio.gather(*(_run(run) for run in due))
+        executed += len(due)
+
+    logger.info(f"スケジュールチェック: {utcnow().isoformat()}Z 実行={executed}件")
+    return executed
@@ -2,13 +2,31 @@ import asyncio
 import logging
 from typing import List, Optional
 from app.config import settings
-import httpx
+from app.core.cache import SnapshotCache
+from app.core.http import get_http_client
+from app.core.metrics import EXTERNAL_BUCKETS, Counter, Histogram
 
 logger = logging.getLogger(__name__)
 
+# ソース×キーワード集合ごとのトレンドスナップショット（全リクエスト・全ジャンルで共有）
+_trend_cache = SnapshotCache(
+    name="trends",
+    ttl=settings.TREND_CACHE_TTL_SECONDS,
+    stale_ttl=settings.TREND_CACHE_STALE_SECONDS,
+    maxsize=settings.TREND_CACHE_MAX_ENTRIES,
+)
+
+# ソースごとの取得時間と失敗数（モックへのフォールバックは失敗として数える）
+# キャッシュには実際に取得できた結果だけを入れる（_fetch_* は失敗時に例外、collect_* はモックで補う）
+_fetch_seconds = Histogram(
+    "autobuzz_trend_fetch_duration_seconds", "トレンドソースの取得時間", ["source"], buckets=EXTERNAL_BUCKETS
+)
+_fetch_errors = Counter("autobuzz_trend_fetch_errors_total", "トレンドソースの取得失敗", ["source"])
+
+
 # ─── Google Trends（pytrends）─────────────────────────────
-async def collect_google_trends(geo: str = "JP", count: int = 20) -> List[dict]:
-    """Google Trendsからリアルタイムトレンドワードを取得（APIキー不要）"""
+async def _fetch_google_trends(geo: str = "JP", count: int = 20) -> List[dict]:
+    """Google Trendsからリアルタイムトレンドワードを取得（APIキー不要）。失敗時は例外"""
     try:
         from pytrends.request import TrendReq
 
@@ -26,59 +44,53 @@ async def collect_google_trends(geo: str = "JP", count: int = 20) -> List[dict]:
                 })
             return items
 
-        return await asyncio.to_thread(_fetch)
+        with _fetch_seconds.time("google_trends"):
+            return await asyncio.to_thread(_fetch)
     except Exception as e:
+        _fetch_errors.inc("google_trends")
         logger.warning(f"Google Trends取得失敗: {e}")
+        raise
+
+
+async def collect_google_trends(geo: str = "JP", count: int = 20) -> List[dict]:
+    """Google Trendsのトレンドワード（失敗時はモック）"""
+    try:
+        return await _fetch_google_trends(geo, count)
+    except Exception:
         return _mock_google_trends()
 
 
 # ─── RSSニュースフィード（APIキー不要）─────────────────────
-async def collect_rss_news(max_items: int = 15) -> List[dict]:
-    """複数のRSSフィードからトレンドニュースを取得"""
-    feeds = [
-        ("https://news.yahoo.co.jp/rss/topics/it.xml", "IT・テクノロジー"),
-        ("https://news.yahoo.co.jp/rss/topics/business.xml", "ビジネス"),
-        ("https://news.yahoo.co.jp/rss/topics/entertainment.xml", "エンタメ"),
-        ("https://news.yahoo.co.jp/rss/topics/domestic.xml", "国内"),
-        ("https://b.hatena.ne.jp/hotentry/it.rss", "はてブ IT"),
-    ]
+async def _fetch_rss_news(max_items: int = 15) -> List[dict]:
+    """設定されたRSSフィードを並列・条件付きGETで取得してトレンドニュースにする。失敗時は例外"""
     try:
-        import feedparser
+        from app.services.rss_fetcher import fetch_all_feeds
 
-        def _fetch_all():
-            items = []
-            for url, category in feeds:
-                try:
-                    feed = feedparser.parse(url)
-                    for entry in feed.entries[:3]:
-                        items.append({
-                            "source": "news",
-                            "title": entry.get("title", ""),
-                            "description": entry.get("summary", entry.get("description", ""))[:200],
-                            "score": 1.0,
-                            "url": entry.get("link", ""),
-                            "category": category,
-                        })
-                except Exception:
-                    continue
-            return items[:max_items]
-
-        return await asyncio.to_thread(_fetch_all)
+        with _fetch_seconds.time("rss"):
+            items = await fetch_all_feeds(settings.rss_feeds_list)
+        return items[:max_items]
     except Exception as e:
+        _fetch_errors.inc("rss")
         logger.warning(f"RSSフィード取得失敗: {e}")
+        raise
+
+
+async def collect_rss_news(max_items: int = 15) -> List[dict]:
+    """RSSのトレンドニュース（失敗時はモック）"""
+    try:
+        return await _fetch_rss_news(max_items)
+    except Exception:
         return _mock_news()
 
 
 # ─── X API バズ投稿取得 ─────────────────────────────────
-async def collect_buzz_from_x(keywords: Optional[List[str]] = None, max_results: int = 10) -> List[dict]:
-    """X APIからバズ投稿を取得する。APIキー未設定時はモック"""
-    if not settings.X_BEARER_TOKEN:
-        return _mock_buzz_posts()
-
+async def _fetch_buzz_from_x(keywords: Optional[List[str]] = None, max_results: int = 10) -> List[dict]:
+    """X APIからバズ投稿を取得する（X_BEARER_TOKEN 設定時のみ呼ぶ）。失敗時は例外"""
     query_parts = keywords or ["話題", "バズ"]
     query = " OR ".join(query_parts) + " lang:ja -is:retweet"
     try:
-        async with httpx.AsyncClient() as client:
+        client = get_http_client("x")
+        with _fetch_seconds.time("x"):
             response = await client.get(
                 "https://api.twitter.com/2/tweets/search/recent",
                 headers={"Authorization": f"Bearer {settings.X_BEARER_TOKEN}"},
@@ -89,40 +101,79 @@ async def collect_buzz_from_x(keywords: Optional[List[str]] = None, max_results:
                 },
                 timeout=10.0,
             )
-            response.raise_for_status()
-            data = response.json().get("data", [])
-            return [
-                {
-                    "source": "x",
-                    "title": tweet.get("text", "")[:60],
-                    "description": tweet.get("text", ""),
-                    "score": _calc_score(tweet.get("public_metrics", {})),
-                    "url": "",
-                }
-                for tweet in data
-            ]
+        response.raise_for_status()
+        data = response.json().get("data", [])
+        return [
+            {
+                "source": "x",
+                "title": tweet.get("text", "")[:60],
+                "description": tweet.get("text", ""),
+                "score": _calc_score(tweet.get("public_metrics", {})),
+                "url": "",
+            }
+            for tweet in data
+        ]
     except Exception as e:
+        _fetch_errors.inc("x")
         logger.warning(f"X API取得失敗: {e}")
+        raise
+
+
+async def collect_buzz_from_x(keywords: Optional[List[str]] = None, max_results: int = 10) -> List[dict]:
+    """X APIからバズ投稿を取得する。APIキー未設定時・失敗時はモック"""
+    if not settings.X_BEARER_TOKEN:
+        return _mock_buzz_posts()
+    try:
+        return await _fetch_buzz_from_x(keywords, max_results)
+    except Exception:
         return _mock_buzz_posts()
 
 
 # ─── 統合収集メソッド ────────────────────────────────────
-async def collect_all_trends(keywords: Optional[List[str]] = None) -> dict:
-    """全ソースからトレンドを収集して統合する"""
-    google, rss, x_buzz = await asyncio.gather(
-        collect_google_trends(),
-        collect_rss_news(),
-        collect_buzz_from_x(keywords),
+def _keywords_key(keywords: Optional[List[str]]) -> str:
+    """キーワード集合をキャッシュキーに変換（順序・重複・大小文字を無視）"""
+    if not keywords:
+        return "-"
+    return ",".join(sorted({kw.strip().lower() for kw in keywords if kw and kw.strip()})) or "-"
+
+
+async def collect_global_trends() -> dict:
+    """
+    キーワードに依存しないソース（Google Trends + RSS）のスナップショットを取得する。
+    スケジューラーの1ティックで1回取得し、全ユーザー・全ジャンルで共有する想定。
+    """
+    google, rss = await asyncio.gather(
+        _trend_cache.get_or_load("google", _fetch_google_trends),
+        _trend_cache.get_or_load("rss", _fetch_rss_news),
         return_exceptions=True,
     )
 
-    # エラーの場合は空リストに
+    # エラーの場合はモックに
     if isinstance(google, Exception):
         google = _mock_google_trends()
     if isinstance(rss, Exception):
         rss = _mock_news()
-    if isinstance(x_buzz, Exception):
+
+    return {"google_trends": list(google), "news": list(rss)}
+
+
+async def collect_keyword_buzz(keywords: Optional[List[str]] = None) -> List[dict]:
+    """キーワード単位のXバズ投稿を取得する（キーワード集合ごとにキャッシュ）"""
+    if not settings.X_BEARER_TOKEN:
+        return _mock_buzz_posts()
+    try:
+        x_buzz = await _trend_cache.get_or_load(
+            f"x:{_keywords_key(keywords)}", lambda: _fetch_buzz_from_x(keywords)
+        )
+    except Exception:
         x_buzz = _mock_buzz_posts()
+    return list(x_buzz)
+
+
+def merge_trends(global_trends: dict, x_buzz: List[dict]) -> dict:
+    """グローバルスナップショットとキーワード別Xバズを統合する"""
+    google = global_trends.get("google_trends", [])
+    rss = global_trends.get("news", [])
 
     all_items = list(google) + list(rss) + list(x_buzz)
     all_items.sort(key=lambda x: x.get("score", 0), reverse=True)
@@ -136,6 +187,20 @@ async def collect_all_trends(keywords: Optional[List[str]] = None) -> dict:
     }
 
 
+async def collect_all_trends(keywords: Optional[List[str]] = None) -> dict:
+    """全ソースからトレンドを収集して統合する"""
+    global_trends, x_buzz = await asyncio.gather(
+        collect_global_trends(),
+        collect_keyword_buzz(keywords),
+    )
+    return merge_trends(global_trends, x_buzz)
+
+
+def get_trend_cache_stats() -> dict:
+    """トレンドキャッシュのヒット/ミス統計"""
+    return _trend_cache.stats()
+
+
 def _extract_keywords(items: list, top_n: int = 10) -> List[str]:
     """トレンドアイテムからキーワードを抽出"""
     keywords = []
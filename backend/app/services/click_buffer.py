@@ -0,0 +1,215 @@
+"""
+短縮URLクリックの書き込みバッファ（write-behind）
+- リダイレクトはメモリ上のバッファに積むだけで、DBを待たずに返す
+- バックグラウンドの flusher が CLICK_FLUSH_INTERVAL_MS ごと、
+  または CLICK_FLUSH_BATCH_SIZE 件たまった時点でまとめて INSERT する
+- バッファは CLICK_BUFFER_MAX_ROWS で上限を設け、溢れた分は Redis に退避（spill）、
+  Redis が使えなければ破棄（drop）して件数を記録する
+- 書き出し時に時間別・日別のクリック集計（click_rollup）も同じトランザクションで加算する
+- シャットダウン時に残りを書き出す
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.core.cache import get_redis, redis_failed
+from app.database import run_write
+from app.models.click_log import ClickLog
+from app.models.short_link import ShortLink
+from app.services.click_rollup import apply_rollups
+from app.services.dashboard_stats import invalidate_user_stats
+from app.services.schedule_clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+_SPILL_KEY = "autobuzz:clicks:spill"
+
+Click = Tuple[str, datetime]
+
+
+class ClickBuffer:
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._rows: Deque[Click] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self.recorded = 0
+        self.flushed = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.flush_errors = 0
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    async def add(self, link_id: str) -> None:
+        """クリックを1件積む（DBには書かない）"""
+        self.recorded += 1
+        click = (link_id, utcnow())
+        if len(self._rows) >= self.max_rows:
+            await self._spill([click])
+            return
+        self._rows.append(click)
+        if len(self._rows) >= settings.CLICK_FLUSH_BATCH_SIZE:
+            self._event().set()
+
+    async def _spill(self, clicks: List[Click]) -> None:
+        """バッファに入らない分を Redis に退避する（使えなければ破棄）"""
+        client = await get_redis() if settings.CLICK_SPILL_TO_REDIS else None
+        if client is not None:
+            try:
+                await client.rpush(_SPILL_KEY, *(json.dumps([link_id, at.isoformat()]) for link_id, at in clicks))
+                self.spilled += len(clicks)
+                return
+            except Exception as e:
+                logger.warning(f"クリックの退避に失敗: {e}")
+                redis_failed()
+        self.dropped += len(clicks)
+
+    async def _take_spilled(self, limit: int) -> List[Click]:
+        if not settings.CLICK_SPILL_TO_REDIS:
+            return []
+        client = await get_redis()
+        if client is None:
+            return []
+        try:
+            values = await client.lpop(_SPILL_KEY, limit) or []
+        except Exception as e:
+            logger.warning(f"退避したクリックの取得に失敗: {e}")
+            redis_failed()
+            return []
+        clicks = []
+        for raw in values:
+            link_id, at = json.loads(raw)
+            clicks.append((link_id, datetime.fromisoformat(at)))
+        return clicks
+
+    async def flush(self) -> int:
+        """1バッチ分を書き出す。処理した（バッファから取り出した）件数を返す。失敗時は 0"""
+        batch: List[Click] = []
+        while self._rows and len(batch) < settings.CLICK_FLUSH_BATCH_SIZE:
+            batch.append(self._rows.popleft())
+        if len(batch) < settings.CLICK_FLUSH_BATCH_SIZE:
+            batch.extend(await self._take_spilled(settings.CLICK_FLUSH_BATCH_SIZE - len(batch)))
+        if not batch:
+            return 0
+
+        try:
+            written = await _insert_clicks(batch)
+        except Exception as e:
+            # 書き込めなかった分はバッファの先頭に戻す（入りきらない分は退避・破棄）
+            self.flush_errors += 1
+            logger.error(f"クリックログの書き込みに失敗: {len(batch)}件 {e}")
+            room = max(0, self.max_rows - len(self._rows))
+            self._rows.extendleft(reversed(batch[:room]))
+            if batch[room:]:
+                await self._spill(batch[room:])
+            return 0
+
+        self.dropped += len(batch) - written
+        self.flushed += written
+        return len(batch)
+
+    async def flush_all(self) -> int:
+        total = 0
+        while True:
+            count = await self.flush()
+            if count == 0:
+                return total
+            total += count
+
+    async def wait(self, timeout: float) -> None:
+        event = self._event()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._rows),
+            "max_rows": self.max_rows,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "flush_errors": self.flush_errors,
+        }
+
+
+async def _insert_clicks(batch: List[Click]) -> int:
+    """生のクリックログと時間別・日別ロールアップを同じトランザクションで書き込む"""
+
+    async def _write(db) -> Tuple[Set[str], int]:
+        # 集計前に削除されたリンクのクリックは捨てる（ロールアップ用に所有者も取得）
+        result = await db.execute(
+            select(ShortLink.id, ShortLink.user_id).where(ShortLink.id.in_({link_id for link_id, _ in batch}))
+        )
+        owners = dict(result.all())
+        clicks = [(link_id, owners[link_id], at) for link_id, at in batch if link_id in owners]
+        if clicks:
+            await db.execute(
+                insert(ClickLog),
+                [{"id": str(uuid.uuid4()), "link_id": link_id, "clicked_at": at} for link_id, _, at in clicks],
+            )
+            await apply_rollups(db, clicks)
+        return {user_id for _, user_id, _ in clicks}, len(clicks)
+
+    for attempt in range(2):
+        try:
+            user_ids, written = await run_write(_write)
+        except IntegrityError:
+            # 取得後にリンクが削除された場合は取り直して再試行
+            if attempt:
+                raise
+            continue
+        invalidate_user_stats(*user_ids)
+        return written
+    return 0
+
+
+click_buffer = ClickBuffer(settings.CLICK_BUFFER_MAX_ROWS)
+
+_flusher: Optional[asyncio.Task] = None
+
+
+async def _flush_loop() -> None:
+    interval = settings.CLICK_FLUSH_INTERVAL_MS / 1000.0
+    while True:
+        await click_buffer.wait(interval)
+        try:
+            await click_buffer.flush_all()
+        except Exception as e:
+            logger.error(f"クリックログ flusher エラー: {e}")
+
+
+def start_click_flusher() -> None:
+    global _flusher
+    if _flusher is None or _flusher.done():
+        _flusher = asyncio.create_task(_flush_loop())
+
+
+async def stop_click_flusher() -> None:
+    """flusher を止めて、バッファの残りを書き出す"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        await asyncio.gather(_flusher, return_exceptions=True)
+        _flusher = None
+    written = await click_buffer.flush_all()
+    if written:
+        logger.info(f"シャットダウン時にクリックログを書き出しました: {written}件")
+
+
+def get_click_buffer_stats() -> dict:
+    return click_buffer.stats()
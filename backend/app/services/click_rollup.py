@@ -0,0 +1,139 @@
+"""
+クリック数のロールアップ（リンク × 時間 / リンク × 日、UTC）
+- クリックログの書き込みと同じトランザクションで加算する（apply_rollups）
+- ダッシュボードの合計・直近24時間/7日/30日はロールアップだけで集計する（click_total_columns）
+- 圧縮ジョブ: 保持期間を過ぎた時間別行を削除し、必要なら生のクリックログも削除する
+"""
+import logging
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import run_write
+from app.models.click_log import ClickLog
+from app.models.click_rollup import ClickDaily, ClickHourly
+from app.services.schedule_clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+# (link_id, user_id, clicked_at)
+Click = Tuple[str, str, datetime]
+
+
+def hour_bucket(at: datetime) -> datetime:
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+async def _upsert_counts(db: AsyncSession, model, bucket: str, counts: Counter) -> None:
+    """(link_id, user_id, bucket) ごとの件数を加算する"""
+    if not counts:
+        return
+    rows = [
+        {"link_id": link_id, "user_id": user_id, bucket: at, "clicks": n}
+        for (link_id, user_id, at), n in counts.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["link_id", bucket],
+            set_={"clicks": model.clicks + stmt.excluded.clicks},
+        )
+        await db.execute(stmt)
+        return
+
+    # ON CONFLICT 非対応のDBは1行ずつ加算
+    column = getattr(model, bucket)
+    for row in rows:
+        result = await db.execute(
+            update(model)
+            .where(model.link_id == row["link_id"], column == row[bucket])
+            .values(clicks=model.clicks + row["clicks"])
+        )
+        if result.rowcount == 0:
+            db.add(model(**row))
+
+
+async def apply_rollups(db: AsyncSession, clicks: Iterable[Click]) -> None:
+    """クリックを時間別・日別のロールアップに加算する（コミットは呼び出し側）"""
+    hourly: Counter = Counter()
+    daily: Counter = Counter()
+    for link_id, user_id, at in clicks:
+        hourly[(link_id, user_id, hour_bucket(at))] += 1
+        daily[(link_id, user_id, at.date())] += 1
+    await _upsert_counts(db, ClickHourly, "hour", hourly)
+    await _upsert_counts(db, ClickDaily, "day", daily)
+
+
+def click_total_columns(user_id: str) -> list:
+    """
+    ユーザーのクリック数（累計・直近24時間・7日・30日）をロールアップから求めるスカラーサブクエリ。
+    他の集計と1回の SELECT にまとめるために列として返す。
+    24時間は時間別、7日/30日は日別（今日を含む暦日・UTC）で数える。
+    """
+    now = utcnow()
+    today = now.date()
+
+    def _daily_sum(since: Optional[date] = None):
+        clicks = ClickDaily.clicks if since is None else case((ClickDaily.day >= since, ClickDaily.clicks), else_=0)
+        return select(func.coalesce(func.sum(clicks), 0)).where(ClickDaily.user_id == user_id).scalar_subquery()
+
+    clicks_24h = (
+        select(func.coalesce(func.sum(ClickHourly.clicks), 0))
+        .where(ClickHourly.user_id == user_id, ClickHourly.hour >= hour_bucket(now) - timedelta(hours=23))
+        .scalar_subquery()
+    )
+    return [
+        _daily_sum().label("total_clicks"),
+        clicks_24h.label("clicks_24h"),
+        _daily_sum(today - timedelta(days=6)).label("clicks_7d"),
+        _daily_sum(today - timedelta(days=29)).label("clicks_30d"),
+    ]
+
+
+# ─── 圧縮ジョブ ───
+
+async def compact_click_rollups() -> dict:
+    """保持期間を過ぎた時間別ロールアップ（と、設定時は生のクリックログ）を削除する"""
+    now = utcnow()
+
+    async def _delete(db: AsyncSession) -> dict:
+        removed = {"hourly": 0, "raw": 0}
+        hourly_cutoff = hour_bucket(now) - timedelta(days=settings.CLICK_HOURLY_RETENTION_DAYS)
+        result = await db.execute(delete(ClickHourly).where(ClickHourly.hour < hourly_cutoff))
+        removed["hourly"] = result.rowcount or 0
+
+        if settings.CLICK_RAW_RETENTION_DAYS > 0:
+            raw_cutoff = now - timedelta(days=settings.CLICK_RAW_RETENTION_DAYS)
+            result = await db.execute(delete(ClickLog).where(ClickLog.clicked_at < raw_cutoff))
+            removed["raw"] = result.rowcount or 0
+        return removed
+
+    removed = await run_write(_delete)
+    if removed["hourly"] or removed["raw"]:
+        logger.info(f"クリックロールアップ圧縮: 時間別={removed['hourly']}件 生ログ={removed['raw']}件 削除")
+    return removed
+
+
+_last_compaction: Optional[float] = None
+
+
+async def maybe_compact_click_rollups() -> None:
+    """前回から CLICK_COMPACTION_INTERVAL_SECONDS 経過していれば圧縮する（リーダーの保守処理用）"""
+    global _last_compaction
+    if _last_compaction is not None and time.monotonic() - _last_compaction < settings.CLICK_COMPACTION_INTERVAL_SECONDS:
+        return
+    _last_compaction = time.monotonic()
+    try:
+        await compact_click_rollups()
+    except Exception as e:
+        logger.error(f"クリックロールアップ圧縮エラー: {e}")
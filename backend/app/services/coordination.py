@@ -0,0 +1,226 @@
+"""
+複数レプリカ間の協調
+- リーダーリース: 期限付きでリーダーを1プロセスに限定（保守処理用）
+  - redis: SET NX PX + 保持者チェック付き延長
+  - postgres: セッション単位の advisory lock を専用接続で保持
+  - table: scheduler_leases テーブルの条件付き UPDATE（SQLite 等の代替）
+- 期限到来スケジュールの実行権は各レプリカが行単位で取得する（auto_scheduler.claim_due_schedules）
+"""
+import logging
+import os
+import socket
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import engine, run_write
+from app.models.scheduler_lease import SchedulerLease
+from app.services.schedule_clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+# このプロセスの識別子（ホスト名:PID:乱数）
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease(ABC):
+    """リースの基底クラス。acquire() は取得または延長に成功したら True"""
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.is_leader = False
+
+    @abstractmethod
+    async def acquire(self) -> bool:
+        ...
+
+    async def release(self) -> None:
+        self.is_leader = False
+
+    def _transition(self, acquired: bool) -> bool:
+        if acquired and not self.is_leader:
+            logger.info(f"リーダーリース取得: {self.name} ({INSTANCE_ID})")
+        elif not acquired and self.is_leader:
+            logger.warning(f"リーダーリース喪失: {self.name} ({INSTANCE_ID})")
+        self.is_leader = acquired
+        return acquired
+
+
+class RedisLease(LeaderLease):
+    _RENEW = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+    _RELEASE = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, name: str, ttl_seconds: int):
+        super().__init__(name, ttl_seconds)
+        self._client = None
+        self._key = f"autobuzz:lease:{name}"
+
+    async def _redis(self):
+        if self._client is None:
+            import redis.asyncio as aioredis
+
+            self._client = aioredis.from_url(settings.REDIS_URL, socket_timeout=2.0)
+        return self._client
+
+    async def acquire(self) -> bool:
+        try:
+            client = await self._redis()
+            ttl_ms = self.ttl_seconds * 1000
+            if await client.set(self._key, INSTANCE_ID, nx=True, px=ttl_ms):
+                return self._transition(True)
+            renewed = await client.eval(self._RENEW, 1, self._key, INSTANCE_ID, ttl_ms)
+            return self._transition(bool(renewed))
+        except Exception as e:
+            logger.warning(f"Redisリース操作失敗: {e}")
+            self._client = None
+            return self._transition(False)
+
+    async def release(self) -> None:
+        if self.is_leader and self._client is not None:
+            try:
+                await self._client.eval(self._RELEASE, 1, self._key, INSTANCE_ID)
+            except Exception:
+                pass
+        await super().release()
+
+
+class PostgresAdvisoryLease(LeaderLease):
+    """advisory lock は接続が生きている間保持される。接続が切れたらリース喪失"""
+
+    def __init__(self, name: str, ttl_seconds: int):
+        super().__init__(name, ttl_seconds)
+        self._conn = None
+        self._lock_key = zlib.crc32(f"autobuzz:{name}".encode("utf-8"))
+
+    async def acquire(self) -> bool:
+        try:
+            if self._conn is None:
+                # 保持中はトランザクションを開いたままにしない（idle in transaction で切断されないように）。
+                # ロックはセッション単位なので autocommit でも維持される
+                conn = await engine.connect()
+                self._conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if self.is_leader:
+                await self._conn.execute(text("SELECT 1"))
+                return self._transition(True)
+            result = await self._conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self._lock_key}
+            )
+            return self._transition(bool(result.scalar()))
+        except Exception as e:
+            logger.warning(f"advisory lock 操作失敗: {e}")
+            await self._close()
+            return self._transition(False)
+
+    async def release(self) -> None:
+        if self._conn is not None and self.is_leader:
+            try:
+                await self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._lock_key})
+            except Exception:
+                pass
+        await self._close()
+        await super().release()
+
+    async def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class TableLease(LeaderLease):
+    """scheduler_leases テーブルを使う代替実装（期限切れか自分が保持者なら更新できる）"""
+
+    async def acquire(self) -> bool:
+        now = utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+
+        async def _renew(db) -> bool:
+            result = await db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    (SchedulerLease.holder == INSTANCE_ID) | (SchedulerLease.expires_at < now),
+                )
+                .values(holder=INSTANCE_ID, expires_at=expires_at)
+            )
+            return result.rowcount == 1
+
+        async def _insert(db) -> None:
+            db.add(SchedulerLease(name=self.name, holder=INSTANCE_ID, expires_at=expires_at))
+
+        try:
+            if await run_write(_renew):
+                return self._transition(True)
+            try:
+                await run_write(_insert)
+            except IntegrityError:
+                # 他プロセスが保持中
+                return self._transition(False)
+            return self._transition(True)
+        except Exception as e:
+            logger.warning(f"リーステーブル操作失敗: {e}")
+            return self._transition(False)
+
+    async def release(self) -> None:
+        if self.is_leader:
+            async def _expire(db) -> None:
+                await db.execute(
+                    update(SchedulerLease)
+                    .where(SchedulerLease.name == self.name, SchedulerLease.holder == INSTANCE_ID)
+                    .values(expires_at=utcnow())
+                )
+
+            try:
+                await run_write(_expire)
+            except Exception:
+                pass
+        await super().release()
+
+
+def _resolve_backend() -> str:
+    backend = settings.SCHEDULER_LEASE_BACKEND
+    if backend != "auto":
+        return backend
+    if settings.DATABASE_URL.startswith("postgresql"):
+        return "postgres"
+    return "table"
+
+
+_leases = {}
+
+
+def get_leader_lease(name: str = "scheduler") -> LeaderLease:
+    """プロセス内で共有するリースを返す"""
+    lease: Optional[LeaderLease] = _leases.get(name)
+    if lease is None:
+        backend = _resolve_backend()
+        ttl = settings.SCHEDULER_LEASE_TTL_SECONDS
+        if backend == "redis":
+            lease = RedisLease(name, ttl)
+        elif backend == "postgres":
+            lease = PostgresAdvisoryLease(name, ttl)
+        else:
+            lease = TableLease(name, ttl)
+        _leases[name] = lease
+    return lease
+
+
+async def release_leases() -> None:
+    for lease in list(_leases.values()):
+        await lease.release()
+    _leases.clear()
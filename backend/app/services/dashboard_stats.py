@@ -0,0 +1,117 @@
+"""
+ダッシュボード / アフィリエイト統計
+- 件数・売上・クリック数（ロールアップ）を1回のクエリでまとめて取得する
+- ユーザーごとに短いTTLでキャッシュし、投稿・クリック・売上・案件の変更時に invalidate_user_stats で破棄する
+  （他プロセスのキャッシュは TTL で失効する）
+"""
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.models.affiliate_offer import AffiliateOffer
+from app.models.affiliate_revenue import AffiliateRevenue
+from app.models.post import Post
+from app.schemas import AffiliateOfferResponse, AffiliateStats, DashboardStats, PostResponse
+from app.services.click_rollup import click_total_columns
+
+logger = logging.getLogger(__name__)
+
+RECENT_POSTS_LIMIT = 10
+
+_stats_cache = TTLCache(
+    maxsize=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+    ttl=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    name="dashboard_stats",
+)
+
+
+async def _load_totals(db: AsyncSession, user_id: str) -> dict:
+    """投稿数・売上・クリック数を1回のクエリ（スカラーサブクエリ）で取得する"""
+    total_posts = (
+        select(func.count()).select_from(Post).where(Post.user_id == user_id).scalar_subquery()
+    )
+    total_revenue = (
+        select(func.coalesce(func.sum(AffiliateRevenue.amount), 0.0))
+        .where(AffiliateRevenue.user_id == user_id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            total_posts.label("total_posts"),
+            total_revenue.label("total_revenue"),
+            *click_total_columns(user_id),
+        )
+    )
+    row = result.one()._mapping
+    return {
+        "total_posts": int(row["total_posts"] or 0),
+        "total_revenue": float(row["total_revenue"] or 0.0),
+        "total_clicks": int(row["total_clicks"] or 0),
+        "clicks_24h": int(row["clicks_24h"] or 0),
+        "clicks_7d": int(row["clicks_7d"] or 0),
+        "clicks_30d": int(row["clicks_30d"] or 0),
+    }
+
+
+async def get_dashboard_stats(db: AsyncSession, user_id: str) -> DashboardStats:
+    key = ("dashboard", user_id)
+    cached = _stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    totals = await _load_totals(db, user_id)
+    posts_result = await db.execute(
+        select(Post)
+        .where(Post.user_id == user_id)
+        .order_by(Post.created_at.desc())
+        .limit(RECENT_POSTS_LIMIT)
+    )
+    stats = DashboardStats(
+        total_posts=totals["total_posts"],
+        total_clicks=totals["total_clicks"],
+        clicks_24h=totals["clicks_24h"],
+        clicks_7d=totals["clicks_7d"],
+        clicks_30d=totals["clicks_30d"],
+        total_revenue=totals["total_revenue"],
+        ctr=0.0,
+        recent_posts=[PostResponse.model_validate(p) for p in posts_result.scalars().all()],
+    )
+    _stats_cache.set(key, stats)
+    return stats
+
+
+async def get_affiliate_stats(db: AsyncSession, user_id: str) -> AffiliateStats:
+    key = ("affiliate", user_id)
+    cached = _stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    totals = await _load_totals(db, user_id)
+    offers_result = await db.execute(
+        select(AffiliateOffer).where(AffiliateOffer.user_id == user_id)
+    )
+    stats = AffiliateStats(
+        total_clicks=totals["total_clicks"],
+        clicks_24h=totals["clicks_24h"],
+        clicks_7d=totals["clicks_7d"],
+        clicks_30d=totals["clicks_30d"],
+        total_revenue=totals["total_revenue"],
+        ctr=0.0,
+        offers=[AffiliateOfferResponse.model_validate(o) for o in offers_result.scalars().all()],
+    )
+    _stats_cache.set(key, stats)
+    return stats
+
+
+def invalidate_user_stats(*user_ids: str) -> None:
+    """投稿・クリック・売上・案件が変わったユーザーのキャッシュを破棄する（コミット後に呼ぶ）"""
+    for user_id in user_ids:
+        _stats_cache.delete(("dashboard", user_id))
+        _stats_cache.delete(("affiliate", user_id))
+
+
+def get_dashboard_cache_stats() -> dict:
+    return _stats_cache.stats()
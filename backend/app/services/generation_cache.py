@@ -0,0 +1,119 @@
+"""
+AI投稿生成キャッシュ
+同じトレンドコンテキスト・ジャンル・プラットフォーム・モデル・温度帯の生成結果を再利用する。
+キーごとに最大 N 件のバリエーションを貯め、揃うまではミス（新規生成）、揃った後は
+ラウンドロビンで返すため、同じ分に実行した複数ユーザーでも同一文面になりにくい。
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.core.cache import TTLCache, get_redis, redis_failed
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    def __init__(self, variants: int, ttl: float, maxsize: int, backend: str = "memory"):
+        self.variants = max(1, variants)
+        self.ttl = ttl
+        self.backend = backend
+        # 値: [バリエーションのリスト, 次に返す位置]
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl, name="generation")
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def make_key(trend_context: str, genre: Optional[str], platform: str, model: str, temperature: float) -> str:
+        payload = json.dumps(
+            [trend_context, genre or "", platform, model, round(temperature, 1)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """バリエーションが揃っていれば1件返す。未充足なら None（呼び出し側で生成して put）"""
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                pipe = redis.pipeline()
+                pipe.lrange(self._redis_key(key), 0, -1)
+                pipe.incr(self._redis_key(key) + ":cursor")
+                pipe.expire(self._redis_key(key) + ":cursor", int(self.ttl))
+                pool_raw, cursor, _ = await pipe.execute()
+                pool = [item.decode("utf-8") if isinstance(item, bytes) else item for item in pool_raw]
+                return self._pick(pool, cursor)
+            except Exception:
+                redis_failed()
+
+        entry = self._local.get(key)
+        if entry is None:
+            return self._pick([], 0)
+        entry[1] += 1
+        return self._pick(entry[0], entry[1])
+
+    async def put(self, key: str, content: str) -> None:
+        self.stores += 1
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                pipe = redis.pipeline()
+                pipe.rpush(self._redis_key(key), content)
+                pipe.ltrim(self._redis_key(key), -self.variants, -1)
+                pipe.expire(self._redis_key(key), int(self.ttl))
+                await pipe.execute()
+                return
+            except Exception:
+                redis_failed()
+
+        entry = self._local.peek(key) or [[], 0]
+        entry[0] = (entry[0] + [content])[-self.variants:]
+        self._local.set(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "name": "generation",
+            "backend": self.backend,
+            "variants": self.variants,
+            "size": len(self._local),
+            "evictions": self._local.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    # ─── 内部処理 ───
+    def _pick(self, pool: List[str], cursor: int) -> Optional[str]:
+        if len(pool) < self.variants:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pool[cursor % len(pool)]
+
+    def _redis_key(self, key: str) -> str:
+        return f"autobuzz:generation:{key}"
+
+    async def _redis(self):
+        if self.backend != "redis":
+            return None
+        return await get_redis()
+
+
+generation_cache = GenerationCache(
+    variants=settings.GENERATION_CACHE_VARIANTS,
+    ttl=settings.GENERATION_CACHE_TTL_SECONDS,
+    maxsize=settings.GENERATION_CACHE_MAX_KEYS,
+    backend=settings.GENERATION_CACHE_BACKEND,
+)
+
+
+def get_generation_cache_stats() -> dict:
+    """生成キャッシュのヒット率など（キャッシュサイズ調整用）"""
+    stats = generation_cache.stats()
+    stats["enabled"] = settings.GENERATION_CACHE_ENABLED
+    return stats
@@ -0,0 +1,139 @@
+"""
+短縮コード → (link_id, original_url) の解決キャッシュ
+- プロセス内 LRU（TTL付き）+ 任意の Redis 層（CACHE_REDIS_ENABLED）
+- 存在しないコードも短いTTLで否定キャッシュし、スキャナーのアクセスでDBを叩かない
+- リンク削除時は invalidate_short_code で無効化する（他プロセスのローカル分は TTL で失効）
+- 起動時に直近のクリック数上位のリンクを日別ロールアップから先読みする
+"""
+import json
+import logging
+import re
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.core.cache import TTLCache, get_redis, redis_failed
+from app.database import async_session
+from app.models.click_rollup import ClickDaily
+from app.models.short_link import ShortLink
+from app.services.schedule_clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+_REDIS_PREFIX = "autobuzz:link:"
+# 発行するコードは英数字のみ。形式外のコードはDBを引かずに存在しない扱いにする
+_CODE_PATTERN = re.compile(r"[A-Za-z0-9]{1,32}")
+# 否定キャッシュの値（None はキャッシュミスと区別できないため）
+_NOT_FOUND = ()
+
+_links = TTLCache(
+    maxsize=settings.LINK_CACHE_MAX_ENTRIES,
+    ttl=settings.LINK_CACHE_TTL_SECONDS,
+    name="short_links",
+)
+
+
+def _remember(short_code: str, value: tuple) -> None:
+    ttl = settings.LINK_NEGATIVE_TTL_SECONDS if value == _NOT_FOUND else None
+    _links.set(short_code, value, ttl=ttl)
+
+
+async def _redis_get(short_code: str) -> Optional[tuple]:
+    client = await get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(_REDIS_PREFIX + short_code)
+    except Exception as e:
+        logger.warning(f"短縮URLキャッシュ取得失敗: {e}")
+        redis_failed()
+        return None
+    if raw is None:
+        return None
+    value = json.loads(raw)
+    return tuple(value) if value else _NOT_FOUND
+
+
+async def _redis_set(short_code: str, value: tuple) -> None:
+    client = await get_redis()
+    if client is None:
+        return
+    ttl = settings.LINK_NEGATIVE_TTL_SECONDS if value == _NOT_FOUND else settings.LINK_CACHE_TTL_SECONDS
+    try:
+        await client.set(_REDIS_PREFIX + short_code, json.dumps(list(value)), ex=int(ttl))
+    except Exception as e:
+        logger.warning(f"短縮URLキャッシュ保存失敗: {e}")
+        redis_failed()
+
+
+async def resolve_short_code(short_code: str) -> Optional[Tuple[str, str]]:
+    """(link_id, original_url) を返す。存在しなければ None"""
+    value = _links.get(short_code)
+    if value is None:
+        if not _CODE_PATTERN.fullmatch(short_code):
+            value = _NOT_FOUND
+        else:
+            value = await _redis_get(short_code)
+            if value is None:
+                async with async_session() as db:
+                    result = await db.execute(
+                        select(ShortLink.id, ShortLink.original_url).where(ShortLink.short_code == short_code)
+                    )
+                    row = result.first()
+                value = tuple(row) if row else _NOT_FOUND
+                await _redis_set(short_code, value)
+        _remember(short_code, value)
+    return value or None
+
+
+async def cache_link(short_code: str, link_id: str, original_url: str) -> None:
+    """作成直後のリンクを登録する（否定キャッシュを上書きする）"""
+    _remember(short_code, (link_id, original_url))
+    await _redis_set(short_code, (link_id, original_url))
+
+
+async def invalidate_short_code(short_code: str) -> None:
+    _links.delete(short_code)
+    client = await get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(_REDIS_PREFIX + short_code)
+    except Exception as e:
+        logger.warning(f"短縮URLキャッシュ削除失敗: {e}")
+        redis_failed()
+
+
+async def preload_top_links(limit: Optional[int] = None) -> int:
+    """直近 LINK_CACHE_PRELOAD_DAYS 日（UTC の暦日）のクリック数上位のリンクをキャッシュに読み込む"""
+    limit = settings.LINK_CACHE_PRELOAD if limit is None else limit
+    if limit <= 0:
+        return 0
+    today = utcnow().date()
+    since = today - timedelta(days=max(1, settings.LINK_CACHE_PRELOAD_DAYS) - 1)
+    async with async_session() as db:
+        # 生のクリックログ全体ではなく、リンク × 日のロールアップの直近分だけを集計する
+        clicks = (
+            select(ClickDaily.link_id, func.sum(ClickDaily.clicks).label("clicks"))
+            # 上限も付けると統計が無くても SQLite が ix_click_daily_day_link の範囲検索を選ぶ
+            .where(ClickDaily.day.between(since, today))
+            .group_by(ClickDaily.link_id)
+            .order_by(func.sum(ClickDaily.clicks).desc())
+            .limit(limit)
+            .subquery()
+        )
+        result = await db.execute(
+            select(ShortLink.short_code, ShortLink.id, ShortLink.original_url)
+            .join(clicks, clicks.c.link_id == ShortLink.id)
+        )
+        rows = result.all()
+    for short_code, link_id, original_url in rows:
+        _remember(short_code, (link_id, original_url))
+    logger.info(f"短縮URLキャッシュを先読みしました: {len(rows)}件")
+    return len(rows)
+
+
+def get_link_cache_stats() -> dict:
+    return _links.stats()
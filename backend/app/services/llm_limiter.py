@@ -0,0 +1,244 @@
+"""
+OpenAI 呼び出しの同時実行数・レート制御
+- 同時実行数の上限（セマフォ）
+- リクエスト/分・トークン/分のトークンバケット
+- 期限付きの待ち行列（期限超過は LLMQueueTimeout）
+- 429 の Retry-After を尊重して全体を一時停止し、再試行する
+待ち行列の深さ・待ち時間などの統計を get_llm_limiter_stats() で返す。
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.core.metrics import EXTERNAL_BUCKETS, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# OpenAI の応答時間（待ち行列の時間は含まない）・失敗（429 の再試行を含む）・消費トークン
+_request_seconds = Histogram(
+    "autobuzz_openai_request_duration_seconds",
+    "OpenAI chat.completions の応答時間",
+    ["operation", "model"],
+    buckets=EXTERNAL_BUCKETS,
+)
+_request_errors = Counter("autobuzz_openai_errors_total", "OpenAI 呼び出しの失敗", ["operation", "error"])
+_tokens_used = Counter("autobuzz_openai_tokens_total", "OpenAI の消費トークン", ["operation", "model"])
+
+
+class LLMQueueTimeout(RuntimeError):
+    """期限内に OpenAI 呼び出しの枠を確保できなかった"""
+
+
+class _TokenBucket:
+    """1分あたりの容量で連続補充されるトークンバケット（容量0は無制限）"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        # バケット容量を超える要求は満タンになった時点で通す
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+
+    def consume(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.tokens -= amount
+
+
+class LLMLimiter:
+    def __init__(self, max_in_flight: int, rpm: int, tpm: int):
+        self._semaphore = asyncio.Semaphore(max(1, max_in_flight))
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+        self._paused_until = 0.0
+        self.max_in_flight = max(1, max_in_flight)
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.rate_limited = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int, timeout: Optional[float] = None):
+        """枠を確保してから本体を実行する。timeout 秒以内に確保できなければ LLMQueueTimeout"""
+        started = time.monotonic()
+        deadline = started + (settings.LLM_QUEUE_TIMEOUT_SECONDS if timeout is None else timeout)
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        acquired = False
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+                acquired = True
+            except asyncio.TimeoutError:
+                raise self._timeout()
+
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self._paused_until - now,
+                    self._requests.wait_time(1, now),
+                    self._tokens.wait_time(estimated_tokens, now),
+                )
+                if wait <= 0:
+                    self._requests.consume(1)
+                    self._tokens.consume(estimated_tokens)
+                    break
+                if now + wait > deadline:
+                    raise self._timeout()
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.queue_depth -= 1
+            if acquired:
+                self._semaphore.release()
+            raise
+
+        waited = time.monotonic() - started
+        self.queue_depth -= 1
+        self.acquired += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def pause(self, seconds: float) -> None:
+        """Retry-After 等に従い、全呼び出しを一定時間止める"""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """実際の消費トークンで TPM バケットを補正する"""
+        if actual_tokens is not None:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.acquired, 4) if self.acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "timeouts": self.timeouts,
+            "rate_limited": self.rate_limited,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        }
+
+    def _timeout(self) -> LLMQueueTimeout:
+        self.timeouts += 1
+        return LLMQueueTimeout("OpenAI呼び出しの待ち行列が期限を超えました")
+
+
+# セマフォはイベントループに紐づくため、ループごとに作り直す
+_limiter: Optional[LLMLimiter] = None
+_limiter_loop = None
+
+
+def get_llm_limiter() -> LLMLimiter:
+    global _limiter, _limiter_loop
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter_loop is not loop:
+        _limiter = LLMLimiter(
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            rpm=settings.LLM_REQUESTS_PER_MINUTE,
+            tpm=settings.LLM_TOKENS_PER_MINUTE,
+        )
+        _limiter_loop = loop
+    return _limiter
+
+
+def get_llm_limiter_stats() -> dict:
+    return _limiter.stats() if _limiter else {}
+
+
+def _estimate_tokens(kwargs: dict) -> int:
+    """プロンプト文字数（日本語はほぼ1文字1トークン）+ 最大出力トークン"""
+    prompt_chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []))
+    return prompt_chars + int(kwargs.get("max_tokens") or 0)
+
+
+def _retry_after_seconds(error: Exception, attempt: int) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return min(60.0, 2.0 ** attempt)
+
+
+async def chat_completion(client, operation: str = "chat", **kwargs):
+    """
+    リミッター経由で chat.completions.create を呼ぶ
+    - 429: Retry-After の間は全体を止めてから再試行
+    - 接続エラー・タイムアウト・5xx: この呼び出しだけ指数バックオフで再試行
+      （SDK の再試行は無効にしているため、ここで LLM_MAX_RETRIES 回・LLM_QUEUE_TIMEOUT_SECONDS 以内に限って行う）
+    operation: メトリクスのラベル（呼び出し元の種類）
+    """
+    try:
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+        transient = (APIConnectionError, InternalServerError)
+    except ImportError:
+        RateLimitError = None
+        transient = ()
+
+    limiter = get_llm_limiter()
+    estimated = _estimate_tokens(kwargs)
+    model = str(kwargs.get("model", ""))
+    deadline = time.monotonic() + settings.LLM_QUEUE_TIMEOUT_SECONDS
+    attempt = 0
+    while True:
+        try:
+            async with limiter.slot(estimated, timeout=max(0.0, deadline - time.monotonic())):
+                with _request_seconds.time(operation, model):
+                    response = await client.chat.completions.create(**kwargs)
+        except Exception as e:
+            _request_errors.inc(operation, type(e).__name__)
+            rate_limited = RateLimitError is not None and isinstance(e, RateLimitError)
+            if not rate_limited and not isinstance(e, transient):
+                raise
+            delay = _retry_after_seconds(e, attempt)
+            attempt += 1
+            if attempt > settings.LLM_MAX_RETRIES or time.monotonic() + delay > deadline:
+                raise
+            if rate_limited:
+                limiter.pause(delay)
+                logger.warning(f"OpenAI 429: {delay:.1f}秒後に再試行 ({attempt}/{settings.LLM_MAX_RETRIES})")
+            else:
+                logger.warning(
+                    f"OpenAI 一時エラー ({type(e).__name__}): {delay:.1f}秒後に再試行 ({attempt}/{settings.LLM_MAX_RETRIES})"
+                )
+                await asyncio.sleep(delay)
+            continue
+
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        limiter.record_usage(estimated, total_tokens)
+        if total_tokens is not None:
+            _tokens_used.inc(operation, model, amount=total_tokens)
+        return response
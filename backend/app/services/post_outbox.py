@@ -0,0 +1,319 @@
+"""
+投稿アウトボックス
+- 投稿生成側は Post と PostOutbox を同じトランザクションで登録するだけ（enqueue_post）
+- ディスパッチャーが期限到来の行をまとめて確保し、並行してSNSへ送信する
+- 失敗時は指数バックオフ（ジッター付き）で再試行し、上限に達したら failed にする
+- レート上限（RateLimitDeferred）は試行回数を消費せず、枠が空く時刻まで後回しにする
+- Post.status の遷移は post_status_events に記録する
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session, run_write
+from app.models.post import Post
+from app.models.post_outbox import PostOutbox, PostStatusEvent
+from app.models.sns_account import SnsAccount
+from app.services.dashboard_stats import invalidate_user_stats
+from app.services.schedule_clock import utcnow
+from app.services.rate_governor import RateLimitDeferred
+from app.services.sns_poster import PermanentPostError, post_to_x, post_to_threads
+
+logger = logging.getLogger(__name__)
+
+
+# ─── 登録 ───
+
+def record_status(db: AsyncSession, post: Post, to_status: str, detail: Optional[str] = None) -> None:
+    """Post.status を変更し、遷移を記録する（コミットは呼び出し側）"""
+    from_status = post.status
+    post.status = to_status
+    db.add(PostStatusEvent(post_id=post.id, from_status=from_status, to_status=to_status, detail=detail))
+
+
+def enqueue_post(db: AsyncSession, post: Post, sns_account_id: Optional[str] = None) -> PostOutbox:
+    """
+    投稿をアウトボックスに登録する（post は同じセッションに追加済みであること）。
+    sns_account_id が None の場合は送信時に .env のアカウントを使う。
+    """
+    record_status(db, post, "queued")
+    entry = PostOutbox(
+        post_id=post.id,
+        user_id=post.user_id,
+        platform=post.platform,
+        sns_account_id=sns_account_id,
+        next_attempt_at=utcnow(),
+    )
+    db.add(entry)
+    return entry
+
+
+async def detach_sns_account(db: AsyncSession, account_id: str) -> None:
+    """
+    SNSアカウントの連携解除前に呼ぶ（コミットは呼び出し側）。
+    送信前（pending / sending）の行は .env のアカウントで送られないよう失敗にして投稿を下書きに戻し、
+    送信済みの行も含めて sns_account_id を外す。
+    """
+    result = await db.execute(
+        select(PostOutbox).where(
+            PostOutbox.sns_account_id == account_id,
+            PostOutbox.status.in_(("pending", "sending")),
+        )
+    )
+    for entry in result.scalars().all():
+        entry.status = "failed"
+        entry.locked_until = None
+        entry.last_error = "SNSアカウント連携解除"
+        post = await db.get(Post, entry.post_id)
+        if post is not None and post.status != "draft":
+            record_status(db, post, "draft", "SNSアカウント連携解除")
+    await db.execute(
+        update(PostOutbox).where(PostOutbox.sns_account_id == account_id).values(sns_account_id=None)
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    """attempts 回目の失敗後の待機秒数（指数バックオフ + 半分までのジッター）"""
+    delay = min(
+        settings.OUTBOX_BACKOFF_MAX_SECONDS,
+        settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)),
+    )
+    return random.uniform(delay / 2, delay)
+
+
+# ─── 確保 ───
+
+async def claim_outbox_batch(limit: int) -> List[dict]:
+    """
+    送信期限が来た行を最大 limit 件確保する（sending にして locked_until を設定）。
+    Postgres では SKIP LOCKED で他ディスパッチャーと行を分け合い、
+    それ以外でも status/attempts の条件付き UPDATE で1行は1回しか確保されない。
+    """
+    now = utcnow()
+
+    async def _claim(db: AsyncSession) -> List[dict]:
+        result = await db.execute(
+            select(PostOutbox, Post.content)
+            .join(Post, PostOutbox.post_id == Post.id)
+            .where(or_(
+                (PostOutbox.status == "pending") & (PostOutbox.next_attempt_at <= now),
+                (PostOutbox.status == "sending") & (PostOutbox.locked_until < now),
+            ))
+            .order_by(PostOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=PostOutbox)
+        )
+        claimed = []
+        for entry, content in result.all():
+            attempts = entry.attempts
+            updated = await db.execute(
+                update(PostOutbox)
+                .where(
+                    PostOutbox.id == entry.id,
+                    PostOutbox.status == entry.status,
+                    PostOutbox.attempts == attempts,
+                )
+                .values(
+                    status="sending",
+                    attempts=attempts + 1,
+                    locked_until=now + timedelta(seconds=settings.OUTBOX_LOCK_SECONDS),
+                )
+            )
+            if updated.rowcount != 1:
+                continue
+            claimed.append({
+                "id": entry.id,
+                "post_id": entry.post_id,
+                "platform": entry.platform,
+                "sns_account_id": entry.sns_account_id,
+                "attempts": attempts + 1,
+                "content": content,
+            })
+        return claimed
+
+    return await run_write(_claim)
+
+
+# ─── 送信 ───
+
+async def _load_credentials(db: AsyncSession, entry: dict) -> Optional[tuple]:
+    """(access_token, access_token_secret) を返す。アカウントが無ければ None"""
+    if entry["sns_account_id"]:
+        account = await db.get(SnsAccount, entry["sns_account_id"])
+        if account and account.access_token:
+            return account.access_token, account.access_token_secret or ""
+        return None
+    # .envからのフォールバック
+    if entry["platform"] == "x" and settings.X_ACCESS_TOKEN:
+        return settings.X_ACCESS_TOKEN, settings.X_ACCESS_TOKEN_SECRET
+    if entry["platform"] == "threads" and settings.THREADS_ACCESS_TOKEN:
+        return settings.THREADS_ACCESS_TOKEN, ""
+    return None
+
+
+async def _send(entry: dict, credentials: tuple) -> dict:
+    access_token, access_token_secret = credentials
+    if entry["platform"] == "x":
+        return await post_to_x(entry["content"], access_token, access_token_secret)
+    if entry["platform"] == "threads":
+        return await post_to_threads(entry["content"], access_token)
+    raise ValueError(f"未対応のプラットフォーム: {entry['platform']}")
+
+
+async def _finish(entry: dict, outbox_status: str, post_status: Optional[str], detail: Optional[str] = None,
+                  retry_at: Optional[datetime] = None) -> None:
+    async def _update(db: AsyncSession) -> Optional[str]:
+        values = {"status": outbox_status, "locked_until": None, "last_error": detail}
+        if retry_at is not None:
+            values["next_attempt_at"] = retry_at
+        await db.execute(update(PostOutbox).where(PostOutbox.id == entry["id"]).values(**values))
+
+        post = await db.get(Post, entry["post_id"])
+        if post is not None:
+            if post_status is not None and post.status != post_status:
+                record_status(db, post, post_status, detail)
+                if post_status == "posted":
+                    post.posted_at = datetime.now(timezone.utc)
+            elif retry_at is not None:
+                # 再試行予定も履歴に残す（status は queued のまま）
+                db.add(PostStatusEvent(
+                    post_id=post.id, from_status=post.status, to_status=post.status,
+                    detail=f"retry {entry['attempts']}: {detail}",
+                ))
+        return post.user_id if post is not None else None
+
+    user_id = await run_write(_update)
+    if user_id is not None:
+        invalidate_user_stats(user_id)
+
+
+async def _defer(entry: dict, retry_at: datetime, detail: str) -> None:
+    async def _update(db: AsyncSession) -> None:
+        await db.execute(
+            update(PostOutbox)
+            .where(PostOutbox.id == entry["id"])
+            .values(
+                status="pending",
+                attempts=entry["attempts"] - 1,
+                next_attempt_at=retry_at,
+                locked_until=None,
+                last_error=detail,
+            )
+        )
+
+    await run_write(_update)
+
+
+async def deliver_entry(entry: dict) -> str:
+    """1件送信して結果（sent / retry / deferred / failed / skipped）を返す"""
+    try:
+        async with async_session() as db:
+            credentials = await _load_credentials(db, entry)
+        if credentials is None:
+            logger.warning(f"SNSアカウント未連携のため下書きに戻します ({entry['platform']}): post={entry['post_id']}")
+            await _finish(entry, "failed", "draft", "SNSアカウント未連携")
+            return "skipped"
+
+        result = await _send(entry, credentials)
+    except RateLimitDeferred as e:
+        # レート上限は失敗ではないため試行回数を戻して後回しにする（他アカウントの行は先に進む）
+        retry_at = datetime.fromtimestamp(e.retry_at, tz=timezone.utc).replace(tzinfo=None)
+        logger.info(f"SNS投稿を後回し ({entry['platform']}): post={entry['post_id']} {e}")
+        await _defer(entry, retry_at, str(e))
+        return "deferred"
+    except PermanentPostError as e:
+        # 認証エラー・不正な内容・重複投稿などは再試行しても成功しないため即座に失敗とする
+        error = str(e)[:500]
+        logger.error(f"SNS投稿失敗（再試行不可） ({entry['platform']}): post={entry['post_id']} {error}")
+        await _finish(entry, "failed", "failed", error)
+        return "failed"
+    except Exception as e:
+        error = str(e)[:500]
+        if entry["attempts"] >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error(f"SNS投稿失敗（上限到達） ({entry['platform']}): post={entry['post_id']} {error}")
+            await _finish(entry, "failed", "failed", error)
+            return "failed"
+        retry_at = utcnow() + timedelta(seconds=backoff_seconds(entry["attempts"]))
+        logger.warning(
+            f"SNS投稿失敗（再試行予定 {retry_at.isoformat()}Z） ({entry['platform']}): "
+            f"post={entry['post_id']} attempt={entry['attempts']} {error}"
+        )
+        await _finish(entry, "pending", None, error, retry_at=retry_at)
+        return "retry"
+
+    # モック投稿は実際には投稿されていないため下書き扱い
+    if result.get("mock"):
+        logger.info(f"モック投稿: {result.get('message', '')}")
+        await _finish(entry, "sent", "draft", "mock")
+        return "skipped"
+    await _finish(entry, "sent", "posted")
+    return "sent"
+
+
+async def dispatch_once(limit: Optional[int] = None) -> int:
+    """1バッチ確保して並行送信する。確保した件数を返す"""
+    entries = await claim_outbox_batch(limit or settings.OUTBOX_BATCH_SIZE)
+    if not entries:
+        return 0
+    sem = asyncio.Semaphore(max(1, settings.OUTBOX_SEND_CONCURRENCY))
+
+    async def _deliver(entry: dict) -> str:
+        async with sem:
+            try:
+                return await deliver_entry(entry)
+            except Exception as e:
+                # 記録にも失敗した行は locked_until 経過後に再取得される
+                logger.error(f"アウトボックス処理エラー: post={entry['post_id']} {e}")
+                return "error"
+
+    outcomes = await asyncio.gather(*(_deliver(entry) for entry in entries))
+    logger.info(f"アウトボックス送信: {len(entries)}件 " + " ".join(
+        f"{name}={outcomes.count(name)}" for name in ("sent", "retry", "deferred", "failed", "skipped") if name in outcomes
+    ))
+    return len(entries)
+
+
+async def drain_outbox(max_batches: int = 10) -> int:
+    """期限到来分が無くなるまで（最大 max_batches 回）送信する"""
+    total = 0
+    for _ in range(max_batches):
+        count = await dispatch_once()
+        total += count
+        if count == 0:
+            break
+    return total
+
+
+# ─── ディスパッチャー（API プロセス内） ───
+
+_dispatchers: List[asyncio.Task] = []
+
+
+async def _dispatcher_loop(index: int) -> None:
+    while True:
+        try:
+            count = await dispatch_once()
+        except Exception as e:
+            logger.error(f"アウトボックスディスパッチャーエラー (#{index}): {e}")
+            count = 0
+        if count == 0:
+            await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+def start_outbox_dispatchers() -> None:
+    for index in range(settings.OUTBOX_DISPATCHERS):
+        _dispatchers.append(asyncio.create_task(_dispatcher_loop(index)))
+    logger.info(f"アウトボックスディスパッチャーを起動しました ({settings.OUTBOX_DISPATCHERS})")
+
+
+async def stop_outbox_dispatchers() -> None:
+    for task in _dispatchers:
+        task.cancel()
+    await asyncio.gather(*_dispatchers, return_exceptions=True)
+    _dispatchers.clear()
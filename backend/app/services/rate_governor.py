@@ -0,0 +1,288 @@
+"""
+SNS投稿のレート制御（アクセストークン単位・アプリ単位）
+- X: x-rate-limit-*（15分枠）と x-user-limit-24hour-* / x-app-limit-24hour-*（24時間枠）を追跡
+- Threads: プロフィールごとの1日の投稿上限と、x-app-usage（アプリ全体の使用率%）を追跡
+- 各枠は「残り回数 + リセット時刻」のバケットで、送信ごとに1消費し、応答ヘッダーで補正する
+- 枠が尽きたら SNS_RATE_MAX_WAIT_SECONDS までは待って送信し、それ以上なら RateLimitDeferred を送出する
+  （アウトボックスは試行回数を消費せずに再スケジュールする）
+CACHE_REDIS_ENABLED の場合は枠の状態を Redis で全プロセス共有する。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.config import settings
+from app.core.cache import get_redis, redis_failed
+
+logger = logging.getLogger(__name__)
+
+X_WINDOW_15M = 900
+DAY = 86400
+
+_REDIS_PREFIX = "autobuzz:ratelimit:"
+
+
+class RateLimitDeferred(RuntimeError):
+    """レート上限のため送信を後回しにする（retry_at は epoch 秒）"""
+
+    def __init__(self, platform: str, retry_at: float, reason: str = ""):
+        self.platform = platform
+        self.retry_at = retry_at
+        wait = max(0, int(retry_at - time.time()))
+        super().__init__(f"{platform} レート上限のため {wait}秒後に再送: {reason}".rstrip(": "))
+
+
+def token_key(access_token: str) -> str:
+    """アクセストークンそのものは保持しない（ハッシュの先頭で識別）"""
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+
+class _Window:
+    """
+    リセット時刻で満タンに戻るバケット（limit=0 は未観測のため無制限扱い）
+    blocked_until は 429 や使用率超過で枠とは別に止める期限
+    """
+
+    __slots__ = ("limit", "remaining", "reset_at", "period", "blocked_until")
+
+    def __init__(self, limit: int, period: int):
+        self.limit = limit
+        self.remaining = limit
+        self.period = period
+        self.reset_at = time.time() + period
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        if self.reset_at <= now:
+            self.remaining = self.limit
+            self.reset_at = now + self.period
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.limit <= 0 or self.remaining > 0:
+            return 0.0
+        return self.reset_at - now
+
+    def update(self, limit: Optional[int], remaining: Optional[int], reset_at: Optional[float]) -> None:
+        if limit is not None:
+            self.limit = limit
+        if remaining is not None:
+            self.remaining = remaining
+        if reset_at is not None:
+            self.reset_at = reset_at
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateGovernor:
+    def __init__(self):
+        self._windows: Dict[str, _Window] = {}
+        self.deferred = 0
+        self.waited = 0
+        self.refunded = 0
+        self.total_wait_seconds = 0.0
+
+    # ─── 枠の定義 ───
+
+    def _keys(self, platform: str, tkey: str) -> List[Tuple[str, int, int]]:
+        """(キー, 既定の上限, 周期秒) のリスト。既定の上限0はヘッダーで観測するまで無制限"""
+        if platform == "x":
+            return [
+                (f"x:user:{tkey}:15m", 0, X_WINDOW_15M),
+                (f"x:user:{tkey}:24h", settings.X_USER_POSTS_PER_DAY, DAY),
+                ("x:app:24h", 0, DAY),
+            ]
+        if platform == "threads":
+            return [
+                (f"threads:user:{tkey}:24h", settings.THREADS_POSTS_PER_DAY, DAY),
+                ("threads:app:usage", 0, settings.THREADS_APP_USAGE_COOLDOWN_SECONDS),
+            ]
+        return []
+
+    def _window(self, key: str, limit: int, period: int) -> _Window:
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window(limit, period)
+        return window
+
+    # ─── Redis 共有 ───
+
+    async def _pull(self, keys: List[Tuple[str, int, int]]) -> None:
+        client = await get_redis()
+        if client is None:
+            return
+        try:
+            values = await client.mget([_REDIS_PREFIX + key for key, _, _ in keys])
+        except Exception as e:
+            logger.warning(f"レート制御状態の取得に失敗: {e}")
+            redis_failed()
+            return
+        for (key, limit, period), raw in zip(keys, values):
+            if raw is None:
+                continue
+            state = json.loads(raw)
+            window = self._window(key, limit, period)
+            # より新しい（または残りが少ない）状態を採用する
+            if state["reset_at"] > window.reset_at or (
+                state["reset_at"] == window.reset_at and state["remaining"] < window.remaining
+            ):
+                window.update(state["limit"], state["remaining"], state["reset_at"])
+            window.blocked_until = max(window.blocked_until, state.get("blocked_until", 0.0))
+
+    async def _push(self, keys: List[str]) -> None:
+        client = await get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            for key in keys:
+                window = self._windows[key]
+                ttl = max(1, int(max(window.reset_at, window.blocked_until) - time.time()) + 1)
+                pipe.set(
+                    _REDIS_PREFIX + key,
+                    json.dumps({
+                        "limit": window.limit,
+                        "remaining": window.remaining,
+                        "reset_at": window.reset_at,
+                        "blocked_until": window.blocked_until,
+                    }),
+                    ex=ttl,
+                )
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"レート制御状態の保存に失敗: {e}")
+            redis_failed()
+
+    # ─── 送信前 ───
+
+    async def acquire(self, platform: str, access_token: str) -> None:
+        """
+        送信枠を1つ確保する。枠が空くまでの待ちが SNS_RATE_MAX_WAIT_SECONDS 以内なら待ち、
+        それ以上なら RateLimitDeferred を送出する。
+        """
+        keys = self._keys(platform, token_key(access_token))
+        await self._pull(keys)
+        while True:
+            now = time.time()
+            windows = [self._window(key, limit, period) for key, limit, period in keys]
+            wait = max((w.wait_time(now) for w in windows), default=0.0)
+            if wait <= 0:
+                for window in windows:
+                    if window.limit > 0:
+                        window.remaining -= 1
+                await self._push([key for key, _, _ in keys])
+                return
+            if wait > settings.SNS_RATE_MAX_WAIT_SECONDS:
+                self.deferred += 1
+                raise RateLimitDeferred(platform, now + wait, "送信枠なし")
+            self.waited += 1
+            self.total_wait_seconds += wait
+            logger.info(f"{platform} レート上限のため {wait:.1f}秒待機します")
+            await asyncio.sleep(wait)
+
+    async def release(self, platform: str, access_token: str) -> None:
+        """
+        acquire で確保した枠を1つ戻す（送信が 429 以外で失敗した場合）。
+        確保後にリセットされた枠は満タンに戻っているため上限を超えては戻さない。
+        """
+        keys = self._keys(platform, token_key(access_token))
+        changed = []
+        for key, limit, period in keys:
+            window = self._window(key, limit, period)
+            if window.limit > 0 and window.remaining < window.limit:
+                window.remaining += 1
+                changed.append(key)
+        self.refunded += 1
+        if changed:
+            await self._push(changed)
+
+    # ─── 応答後 ───
+
+    async def observe_x(self, access_token: str, headers: Mapping[str, str]) -> None:
+        """X API の応答ヘッダーから各枠の残り回数を更新する"""
+        tkey = token_key(access_token)
+        changed = []
+        for key, prefix in (
+            (f"x:user:{tkey}:15m", "x-rate-limit"),
+            (f"x:user:{tkey}:24h", "x-user-limit-24hour"),
+            ("x:app:24h", "x-app-limit-24hour"),
+        ):
+            limit = _int_header(headers, f"{prefix}-limit")
+            remaining = _int_header(headers, f"{prefix}-remaining")
+            reset = _int_header(headers, f"{prefix}-reset")
+            if limit is None and remaining is None and reset is None:
+                continue
+            period = X_WINDOW_15M if key.endswith(":15m") else DAY
+            self._window(key, 0, period).update(limit, remaining, float(reset) if reset else None)
+            changed.append(key)
+        if changed:
+            await self._push(changed)
+
+    async def observe_threads(self, headers: Mapping[str, str]) -> None:
+        """Threads（Graph API）の x-app-usage が閾値を超えたらアプリ全体をしばらく止める"""
+        raw = headers.get("x-app-usage")
+        if not raw:
+            return
+        try:
+            usage = max(int(v) for v in json.loads(raw).values())
+        except (ValueError, TypeError, AttributeError):
+            return
+        if usage < settings.THREADS_APP_USAGE_THRESHOLD:
+            return
+        logger.warning(f"Threads アプリ使用率 {usage}% のため送信を一時停止します")
+        await self.block("threads", None, time.time() + settings.THREADS_APP_USAGE_COOLDOWN_SECONDS)
+
+    async def block(self, platform: str, access_token: Optional[str], until: float) -> None:
+        """429 等を受けた枠を until まで使えなくする（access_token=None はアプリ単位）"""
+        keys = self._keys(platform, token_key(access_token or ""))
+        key, limit, period = keys[-1] if access_token is None else keys[0]
+        window = self._window(key, limit, period)
+        window.blocked_until = max(window.blocked_until, until)
+        await self._push([key])
+
+    # ─── 参照 ───
+
+    def headroom(self, platform: str, access_token: Optional[str] = None) -> List[dict]:
+        """現在の残り枠（access_token 指定時はそのアカウント分、未指定時はアプリ単位）"""
+        now = time.time()
+        if access_token is None:
+            keys = [k for k in self._keys(platform, "") if ":app:" in k[0]]
+        else:
+            keys = [k for k in self._keys(platform, token_key(access_token)) if ":user:" in k[0]]
+        result = []
+        for key, limit, period in keys:
+            window = self._window(key, limit, period)
+            window.wait_time(now)
+            result.append({
+                "platform": platform,
+                "scope": "app" if ":app:" in key else "account",
+                "window": key.rsplit(":", 1)[-1],
+                "limit": window.limit or None,
+                "remaining": window.remaining if window.limit else None,
+                "reset_at": datetime.fromtimestamp(window.reset_at, tz=timezone.utc),
+                "blocked_until": (
+                    datetime.fromtimestamp(window.blocked_until, tz=timezone.utc)
+                    if window.blocked_until > now else None
+                ),
+            })
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "windows": len(self._windows),
+            "waited": self.waited,
+            "deferred": self.deferred,
+            "refunded": self.refunded,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+        }
+
+
+rate_governor = RateGovernor()
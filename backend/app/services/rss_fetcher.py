@@ -0,0 +1,127 @@
+"""
+RSSフィード取得サービス
+- 全フィードを共有HTTPクライアントで並列取得
+- ETag / Last-Modified による条件付きGET（304なら再パースしない）
+- フィードごとに既読GUIDを保持し、新着エントリのみを取り込む
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# 一部のフィードだけ失敗しても fetch_all_feeds は例外にしないため、フィード単位でも数える
+_feed_errors = Counter("autobuzz_rss_feed_errors_total", "RSSフィード単位の取得失敗", ["feed"])
+
+USER_AGENT = "AutoBuzz/1.0 (+https://github.com/naganosyotaro/AutoBuzz)"
+
+
+class _FeedState:
+    """フィード単位の条件付きGET用ヘッダーと既読GUID・直近エントリ"""
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.items: List[dict] = []
+
+    def mark_seen(self, guid: str) -> None:
+        self.seen[guid] = None
+        while len(self.seen) > settings.RSS_SEEN_GUIDS_MAX:
+            self.seen.popitem(last=False)
+
+
+_feed_states: Dict[str, _FeedState] = {}
+
+
+def _entry_guid(entry) -> str:
+    return entry.get("id") or entry.get("guid") or entry.get("link") or entry.get("title", "")
+
+
+def _parse_new_entries(content: bytes, state: _FeedState, category: str, limit: int) -> List[dict]:
+    """フィード本文をパースし、未読のエントリだけをアイテム化する"""
+    import feedparser
+
+    feed = feedparser.parse(content)
+    new_items = []
+    for entry in feed.entries[:limit]:
+        guid = _entry_guid(entry)
+        if not guid or guid in state.seen:
+            continue
+        state.mark_seen(guid)
+        new_items.append({
+            "source": "news",
+            "title": entry.get("title", ""),
+            "description": entry.get("summary", entry.get("description", ""))[:200],
+            "score": 1.0,
+            "url": entry.get("link", ""),
+            "category": category,
+        })
+    return new_items
+
+
+async def fetch_feed(client: httpx.AsyncClient, url: str, category: str, limit: int) -> List[dict]:
+    """1フィードを条件付きGETで取得し、直近エントリ（新着を先頭にマージ済み）を返す"""
+    state = _feed_states.setdefault(url, _FeedState())
+
+    headers = {"User-Agent": USER_AGENT}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    response = await client.get(
+        url,
+        headers=headers,
+        follow_redirects=True,
+        timeout=settings.RSS_FETCH_TIMEOUT_SECONDS,
+    )
+    if response.status_code == 304:
+        return list(state.items)
+    response.raise_for_status()
+
+    state.etag = response.headers.get("etag")
+    state.last_modified = response.headers.get("last-modified")
+
+    new_items = await asyncio.to_thread(_parse_new_entries, response.content, state, category, limit)
+    if new_items:
+        state.items = (new_items + state.items)[:limit]
+    return list(state.items)
+
+
+async def fetch_all_feeds(
+    feeds: List[Tuple[str, str]],
+    items_per_feed: Optional[int] = None,
+) -> List[dict]:
+    """全フィードを並列取得して統合する。失敗したフィードは前回のエントリで補う"""
+    limit = items_per_feed or settings.RSS_ITEMS_PER_FEED
+    client = get_http_client("rss")
+
+    results = await asyncio.gather(
+        *(fetch_feed(client, url, category, limit) for url, category in feeds),
+        return_exceptions=True,
+    )
+
+    items = []
+    failures = 0
+    for (url, _category), result in zip(feeds, results):
+        if isinstance(result, Exception):
+            failures += 1
+            _feed_errors.inc(url)
+            logger.warning(f"RSSフィード取得失敗 ({url}): {result}")
+            state = _feed_states.get(url)
+            if state:
+                items.extend(state.items)
+            continue
+        items.extend(result)
+
+    if feeds and failures == len(feeds) and not items:
+        raise RuntimeError("全てのRSSフィードの取得に失敗しました")
+    return items
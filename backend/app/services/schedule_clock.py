@@ -0,0 +1,77 @@
+"""
+スケジュール時刻計算
+ユーザーのタイムゾーンでの "HH:MM" + 頻度から、次回実行日時（UTC・naive）を求める。
+"""
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = "Asia/Tokyo"
+FREQUENCIES = ("daily", "weekdays", "weekends")
+
+
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """タイムゾーン名から ZoneInfo を返す。不正な名前はデフォルト（JST）"""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"不正なタイムゾーンのため {DEFAULT_TIMEZONE} を使用: {name}")
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def parse_schedule_time(value: str) -> time:
+    """"HH:MM" または "HH:MM:SS" を time に変換する（不正なら ValueError）"""
+    parts = value.strip().split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"時刻の形式が不正です: {value}")
+    hour, minute = int(parts[0]), int(parts[1])
+    return time(hour=hour, minute=minute)
+
+
+def _matches_frequency(frequency: str, weekday: int) -> bool:
+    # weekday: 0=月, 6=日
+    if frequency == "weekdays":
+        return weekday < 5
+    if frequency == "weekends":
+        return weekday >= 5
+    return True
+
+
+def utcnow() -> datetime:
+    """DB保存用の naive UTC 現在時刻"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def compute_next_run_at(
+    schedule_time: str,
+    frequency: str,
+    tz_name: Optional[str],
+    after: Optional[datetime] = None,
+) -> datetime:
+    """
+    after（naive UTC）より後で、頻度条件を満たす最初の実行日時を naive UTC で返す。
+    """
+    zone = get_zone(tz_name)
+    local_after = (after or utcnow()).replace(tzinfo=timezone.utc).astimezone(zone)
+    at = parse_schedule_time(schedule_time)
+
+    for offset in range(0, 8):
+        day = local_after.date() + timedelta(days=offset)
+        if not _matches_frequency(frequency, day.weekday()):
+            continue
+        candidate = datetime.combine(day, at, tzinfo=zone)
+        if candidate > local_after:
+            return candidate.astimezone(timezone.utc).replace(tzinfo=None)
+
+    raise ValueError(f"次回実行日時を計算できません: {schedule_time} {frequency}")
@@ -1,16 +1,124 @@
 """
 SNS投稿サービス
-X (Twitter): OAuth 1.0a User Context (tweepy) を使用
+X (Twitter): OAuth 1.0a User Context を使用
+  - httpx バックエンド: 共有HTTPクライアント上で非同期に署名・投稿（デフォルト）
+  - tweepy バックエンド: 上限付きスレッドプールで tweepy を実行
 Threads: Meta Graph API を使用
+送信前に rate_governor で枠を確保し、応答ヘッダーで残り枠を更新する。
 """
+import asyncio
+import base64
+import hashlib
+import hmac
 import logging
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from urllib.parse import quote
 from app.config import settings
+from app.core.cache import TTLCache
+from app.core.http import get_http_client
+from app.core.metrics import EXTERNAL_BUCKETS, Counter, Histogram
+from app.services.rate_governor import RateLimitDeferred, rate_governor
 import httpx
 
 logger = logging.getLogger(__name__)
 
+X_TWEETS_URL = "https://api.twitter.com/2/tweets"
 
+# アクセストークンごとの署名器 / tweepy クライアント
+_x_clients = TTLCache(maxsize=settings.X_CLIENT_CACHE_SIZE, ttl=3600.0, name="x_clients")
+_x_executor: Optional[ThreadPoolExecutor] = None
+
+# 送信時間（枠の確保待ちは含まない）と失敗数（reason: rate_limited / error）。モック投稿は数えない
+_publish_seconds = Histogram(
+    "autobuzz_sns_publish_duration_seconds", "SNS への投稿時間", ["platform"], buckets=EXTERNAL_BUCKETS
+)
+_publish_errors = Counter("autobuzz_sns_publish_errors_total", "SNS への投稿失敗", ["platform", "reason"])
+
+
+class PermanentPostError(RuntimeError):
+    """再試行しても結果が変わらない投稿失敗（認証エラー・不正な内容・重複投稿など）"""
+
+
+def _is_permanent(status_code: Optional[int]) -> bool:
+    """408（タイムアウト）・429（レート制限）以外の 4xx は再試行しても成功しない"""
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+# ─── OAuth 1.0a 署名 ─────────────────────────────────────
+def _pct(value: str) -> str:
+    """RFC 3986 のパーセントエンコード"""
+    return quote(str(value), safe="~")
+
+
+class XUserSigner:
+    """ユーザーコンテキストの OAuth 1.0a (HMAC-SHA1) 署名器"""
+
+    def __init__(self, consumer_key: str, consumer_secret: str, token: str, token_secret: str):
+        self.consumer_key = consumer_key
+        self.token = token
+        self._signing_key = f"{_pct(consumer_secret)}&{_pct(token_secret)}".encode("utf-8")
+
+    def authorization(self, method: str, url: str, params: Optional[dict] = None) -> str:
+        """Authorization ヘッダー値を生成する（JSONボディは署名対象外）"""
+        oauth_params = {
+            "oauth_consumer_key": self.consumer_key,
+            "oauth_nonce": secrets.token_hex(16),
+            "oauth_signature_method": "HMAC-SHA1",
+            "oauth_timestamp": str(int(time.time())),
+            "oauth_token": self.token,
+            "oauth_version": "1.0",
+        }
+        pairs = sorted(
+            (_pct(k), _pct(v)) for k, v in {**(params or {}), **oauth_params}.items()
+        )
+        param_string = "&".join(f"{k}={v}" for k, v in pairs)
+        base_string = "&".join([method.upper(), _pct(url), _pct(param_string)])
+        digest = hmac.new(self._signing_key, base_string.encode("utf-8"), hashlib.sha1).digest()
+        oauth_params["oauth_signature"] = base64.b64encode(digest).decode("ascii")
+        return "OAuth " + ", ".join(
+            f'{_pct(k)}="{_pct(v)}"' for k, v in sorted(oauth_params.items())
+        )
+
+
+def _get_x_signer(access_token: str, access_token_secret: str) -> XUserSigner:
+    key = ("signer", access_token, hashlib.sha256(access_token_secret.encode("utf-8")).hexdigest())
+    signer = _x_clients.get(key)
+    if signer is None:
+        signer = XUserSigner(settings.X_API_KEY, settings.X_API_SECRET, access_token, access_token_secret)
+        _x_clients.set(key, signer)
+    return signer
+
+
+def _get_tweepy_client(access_token: str, access_token_secret: str):
+    import tweepy
+
+    key = ("tweepy", access_token, hashlib.sha256(access_token_secret.encode("utf-8")).hexdigest())
+    client = _x_clients.get(key)
+    if client is None:
+        client = tweepy.Client(
+            consumer_key=settings.X_API_KEY,
+            consumer_secret=settings.X_API_SECRET,
+            access_token=access_token,
+            access_token_secret=access_token_secret,
+        )
+        _x_clients.set(key, client)
+    return client
+
+
+def _get_x_executor() -> ThreadPoolExecutor:
+    global _x_executor
+    if _x_executor is None:
+        _x_executor = ThreadPoolExecutor(
+            max_workers=settings.X_POST_THREADPOOL_WORKERS,
+            thread_name_prefix="x-poster",
+        )
+    return _x_executor
+
+
+# ─── X (Twitter) ─────────────────────────────────────────
 async def post_to_x(
     content: str,
     access_token: str,
@@ -18,7 +126,7 @@ async def post_to_x(
 ) -> dict:
     """
     X (Twitter) API v2 で投稿する。
-    OAuth 1.0a User Context 認証（tweepy使用）。
+    OAuth 1.0a User Context 認証。イベントループはブロックしない。
     consumer_key/secret は .env の X_API_KEY / X_API_SECRET を使用。
     """
     # APIキー未設定チェック
@@ -37,28 +145,107 @@ async def post_to_x(
         return {"mock": True, "status": "posted", "platform": "x",
                 "message": "access_token_secret 未設定のためモック投稿しました"}
 
+    # 送信枠の確保（尽きていれば待つか RateLimitDeferred）
+    await rate_governor.acquire("x", access_token)
+
     try:
-        import tweepy
+        with _publish_seconds.time("x"):
+            if settings.X_POST_BACKEND == "tweepy":
+                tweet_id = await _create_tweet_tweepy(content, access_token, access_token_secret)
+            else:
+                tweet_id = await _create_tweet_httpx(content, access_token, access_token_secret)
+    except RateLimitDeferred:
+        _publish_errors.inc("x", "rate_limited")
+        raise
+    except Exception:
+        _publish_errors.inc("x", "error")
+        # 429 以外の失敗は投稿されていないため確保した枠を戻す
+        await rate_governor.release("x", access_token)
+        raise
 
-        client = tweepy.Client(
-            consumer_key=settings.X_API_KEY,
-            consumer_secret=settings.X_API_SECRET,
-            access_token=access_token,
-            access_token_secret=access_token_secret,
+    logger.info(f"X投稿成功: tweet_id={tweet_id}")
+    return {
+        "mock": False,
+        "status": "posted",
+        "platform": "x",
+        "tweet_id": tweet_id,
+        "url": f"https://x.com/i/status/{tweet_id}",
+    }
+
+
+async def _create_tweet_httpx(content: str, access_token: str, access_token_secret: str) -> str:
+    """共有HTTPクライアントで署名付きリクエストを送る"""
+    signer = _get_x_signer(access_token, access_token_secret)
+    try:
+        client = get_http_client("x")
+        response = await client.post(
+            X_TWEETS_URL,
+            json={"text": content},
+            headers={"Authorization": signer.authorization("POST", X_TWEETS_URL)},
         )
+    except Exception as e:
+        logger.error(f"X投稿エラー: {e}")
+        raise RuntimeError(f"X投稿エラー: {e}")
+
+    await rate_governor.observe_x(access_token, response.headers)
+    if response.status_code == 429:
+        await _defer_x(access_token, response.headers)
+    if response.is_error:
+        logger.error(f"X投稿APIエラー: {response.status_code} {response.text}")
+        error_cls = PermanentPostError if _is_permanent(response.status_code) else RuntimeError
+        raise error_cls(f"X投稿失敗: {response.status_code} {response.text}")
+    try:
+        return response.json()["data"]["id"]
+    except Exception as e:
+        logger.error(f"X投稿エラー: {e}")
+        raise RuntimeError(f"X投稿エラー: {e}")
 
-        response = client.create_tweet(text=content)
-        tweet_id = response.data["id"]
-        logger.info(f"X投稿成功: tweet_id={tweet_id}")
 
-        return {
-            "mock": False,
-            "status": "posted",
-            "platform": "x",
-            "tweet_id": tweet_id,
-            "url": f"https://x.com/i/status/{tweet_id}",
-        }
+def _retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _defer_x(access_token: str, headers) -> None:
+    """429: リセット時刻（無ければ Retry-After・既定秒数）まで止めて後回しにする"""
+    now = time.time()
+    resets = []
+    for prefix in ("x-rate-limit", "x-user-limit-24hour", "x-app-limit-24hour"):
+        try:
+            if int(headers.get(f"{prefix}-remaining")) <= 0:
+                resets.append(float(headers.get(f"{prefix}-reset")))
+        except (TypeError, ValueError):
+            continue
+    until = max(resets) if resets else now + (_retry_after(headers) or settings.SNS_RATE_LIMIT_DEFAULT_BLOCK_SECONDS)
+    # アプリ全体の枠が尽きた場合はアプリ単位で止める
+    app_exhausted = headers.get("x-app-limit-24hour-remaining") == "0"
+    await rate_governor.block("x", None if app_exhausted else access_token, until)
+    raise RateLimitDeferred("x", until, "429 Too Many Requests")
+
 
+async def _create_tweet_tweepy(content: str, access_token: str, access_token_secret: str) -> str:
+    """tweepy の同期呼び出しを上限付きスレッドプールへ逃がす"""
+    try:
+        import tweepy
+    except ImportError:
+        raise RuntimeError("X投稿エラー: tweepy が未インストールです")
+
+    try:
+        client = _get_tweepy_client(access_token, access_token_secret)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            _get_x_executor(), lambda: client.create_tweet(text=content)
+        )
+        return response.data["id"]
+    except tweepy.TooManyRequests as e:
+        await rate_governor.observe_x(access_token, e.response.headers)
+        await _defer_x(access_token, e.response.headers)
+    except tweepy.HTTPException as e:
+        logger.error(f"X投稿APIエラー: {e}")
+        error_cls = PermanentPostError if _is_permanent(getattr(e.response, "status_code", None)) else RuntimeError
+        raise error_cls(f"X投稿失敗: {e}")
     except tweepy.TweepyException as e:
         logger.error(f"X投稿APIエラー: {e}")
         raise RuntimeError(f"X投稿失敗: {e}")
@@ -67,6 +254,7 @@ async def post_to_x(
         raise RuntimeError(f"X投稿エラー: {e}")
 
 
+# ─── Threads ─────────────────────────────────────────────
 async def post_to_threads(
     content: str,
     access_token: str,
@@ -78,8 +266,12 @@ async def post_to_threads(
         return {"mock": True, "status": "posted", "platform": "threads",
                 "message": "access_token 未設定のためモック投稿しました"}
 
+    # 送信枠の確保（尽きていれば待つか RateLimitDeferred）
+    await rate_governor.acquire("threads", access_token)
+
     try:
-        async with httpx.AsyncClient() as client:
+        with _publish_seconds.time("threads"):
+            client = get_http_client("threads")
             # Step 1: Create media container
             create_response = await client.post(
                 f"https://graph.threads.net/v1.0/{user_id}/threads",
@@ -89,6 +281,7 @@ async def post_to_threads(
                     "access_token": access_token,
                 },
             )
+            await _check_threads_limits(create_response, access_token)
             create_response.raise_for_status()
             creation_id = create_response.json().get("id")
 
@@ -100,14 +293,45 @@ async def post_to_threads(
                     "access_token": access_token,
                 },
             )
+            await _check_threads_limits(publish_response, access_token)
             publish_response.raise_for_status()
             result = publish_response.json()
-            logger.info(f"Threads投稿成功: {result}")
-            return {**result, "mock": False, "status": "posted", "platform": "threads"}
+        logger.info(f"Threads投稿成功: {result}")
+        return {**result, "mock": False, "status": "posted", "platform": "threads"}
 
+    except RateLimitDeferred:
+        _publish_errors.inc("threads", "rate_limited")
+        raise
     except httpx.HTTPStatusError as e:
+        _publish_errors.inc("threads", "error")
+        # 429 以外の失敗は投稿されていないため確保した枠を戻す
+        await rate_governor.release("threads", access_token)
         logger.error(f"Threads API エラー: {e.response.status_code} {e.response.text}")
-        raise RuntimeError(f"Threads投稿失敗: {e.response.text}")
+        error_cls = PermanentPostError if _is_permanent(e.response.status_code) else RuntimeError
+        raise error_cls(f"Threads投稿失敗: {e.response.status_code} {e.response.text}")
     except Exception as e:
+        _publish_errors.inc("threads", "error")
+        await rate_governor.release("threads", access_token)
         logger.error(f"Threads投稿エラー: {e}")
         raise RuntimeError(f"Threads投稿エラー: {e}")
+
+
+# Graph API のレート制限エラーコード（アプリ / ユーザー / 投稿上限）
+_THREADS_RATE_LIMIT_CODES = {4, 17, 32, 613}
+
+
+async def _check_threads_limits(response: httpx.Response, access_token: str) -> None:
+    """使用率ヘッダーを記録し、レート制限エラーなら後回しにする"""
+    await rate_governor.observe_threads(response.headers)
+    if not response.is_error:
+        return
+    try:
+        code = response.json().get("error", {}).get("code")
+    except Exception:
+        code = None
+    if response.status_code != 429 and code not in _THREADS_RATE_LIMIT_CODES:
+        return
+    until = time.time() + (_retry_after(response.headers) or settings.SNS_RATE_LIMIT_DEFAULT_BLOCK_SECONDS)
+    # code 4 はアプリ全体の上限
+    await rate_governor.block("threads", None if code == 4 else access_token, until)
+    raise RateLimitDeferred("threads", until, f"rate limit (code={code})")
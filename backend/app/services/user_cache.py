@@ -0,0 +1,111 @@
+"""
+認証ユーザーのキャッシュ（get_current_user 用）
+- users 行の列の値をプロセス内 LRU（TTL付き）+ 任意の Redis 層（CACHE_REDIS_ENABLED）に保持する
+- 保持するのは _COLUMNS の列のみ（password_hash はキャッシュしない。必要な処理は都度 SELECT する）
+- ヒット時はリクエストのセッションに load=False で merge し、DBを引かずに User を渡す
+  （エンドポイントでの変更はそのまま UPDATE される）
+- プロフィール・プラン・全自動モード等を変更したらコミット後に invalidate_user を呼ぶ
+  （他プロセスのローカル分は TTL で失効）
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.core.cache import TTLCache, get_redis, redis_failed
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_REDIS_PREFIX = "autobuzz:user:"
+
+_users = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    name="users",
+)
+
+# キャッシュする列（許可リスト）。キャッシュから作った User ではこれ以外の列は未ロードになる
+_COLUMNS = ("id", "email", "plan_type", "is_admin", "auto_post_enabled", "timezone", "created_at")
+_DATETIME_COLUMNS = {
+    attr.key for attr in inspect(User).column_attrs
+    if attr.key in _COLUMNS and isinstance(attr.columns[0].type, DateTime)
+}
+
+
+def _snapshot(user: User) -> dict:
+    return {key: getattr(user, key) for key in _COLUMNS}
+
+
+async def _redis_get(user_id: str) -> Optional[dict]:
+    client = await get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(_REDIS_PREFIX + user_id)
+    except Exception as e:
+        logger.warning(f"ユーザーキャッシュ取得失敗: {e}")
+        redis_failed()
+        return None
+    if raw is None:
+        return None
+    # 許可リスト外の列（旧形式のエントリ等）は使わない
+    values = {k: v for k, v in json.loads(raw).items() if k in _COLUMNS}
+    for key in _DATETIME_COLUMNS:
+        if values.get(key):
+            values[key] = datetime.fromisoformat(values[key])
+    return values
+
+
+async def _redis_set(user_id: str, values: dict) -> None:
+    client = await get_redis()
+    if client is None:
+        return
+    payload = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in values.items()}
+    try:
+        await client.set(_REDIS_PREFIX + user_id, json.dumps(payload), ex=int(settings.USER_CACHE_TTL_SECONDS))
+    except Exception as e:
+        logger.warning(f"ユーザーキャッシュ保存失敗: {e}")
+        redis_failed()
+
+
+async def load_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """db に紐づいた User を返す（キャッシュにあれば SELECT しない）。存在しなければ None"""
+    values = _users.get(user_id)
+    if values is None:
+        values = await _redis_get(user_id)
+        if values is None:
+            result = await db.execute(select(User).where(User.id == user_id))
+            user = result.scalar_one_or_none()
+            if user is None:
+                return None
+            values = _snapshot(user)
+            await _redis_set(user_id, values)
+            _users.set(user_id, values)
+            return user
+        _users.set(user_id, values)
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def invalidate_user(user_id: str) -> None:
+    _users.delete(user_id)
+    client = await get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(_REDIS_PREFIX + user_id)
+    except Exception as e:
+        logger.warning(f"ユーザーキャッシュ削除失敗: {e}")
+        redis_failed()
+
+
+def get_user_cache_stats() -> dict:
+    return _users.stats()
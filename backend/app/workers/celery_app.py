@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.config import settings
 
 celery_app = Celery(
@@ -13,6 +14,16 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="Asia/Tokyo",
     enable_utc=True,
+    # 自動投稿サブタスクはキューを分ける（pro 用キューを先に指定して起動する:
+    #   celery -A app.workers.celery_app worker -Q autopilot_pro,autopilot,celery）
+    task_routes={
+        "app.workers.tasks.run_schedule_task": {"queue": "autopilot"},
+    },
+    # Redis ブローカーで優先度（0 が最優先）を有効にする
+    broker_transport_options={"priority_steps": list(range(10)), "queue_order_strategy": "priority"},
+    # 長い実行を1ワーカーが抱え込まないよう1件ずつ受け取る
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
     beat_schedule={
         "collect-buzz-every-hour": {
             "task": "app.workers.tasks.collect_buzz_task",
@@ -22,5 +33,53 @@ celery_app.conf.update(
             "task": "app.workers.tasks.auto_post_task",
             "schedule": 60.0,
         },
+        "dispatch-post-outbox": {
+            "task": "app.workers.tasks.dispatch_outbox_task",
+            "schedule": 15.0,
+        },
     },
 )
+
+
+# プロセスごとのメトリクス出力サーバー
+_metrics_server = None
+
+
+def _start_metrics_server() -> None:
+    """
+    ワーカーで記録したメトリクスを METRICS_WORKER_PORT + プールのプロセス番号で出力する
+    （API の /metrics とは別プロセスのため、ワーカーごとにスクレイプする）
+    """
+    global _metrics_server
+    if not settings.METRICS_ENABLED or settings.METRICS_WORKER_PORT <= 0:
+        return
+    from billiard.process import current_process
+
+    import app.api.metrics  # noqa: F401 - キャッシュ・リミッター等の収集関数の登録のため
+    from app.core.metrics import start_metrics_server
+
+    index = getattr(current_process(), "index", None) or 0
+    _metrics_server = start_metrics_server(settings.METRICS_WORKER_PORT + index)
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    """fork 後のワーカープロセスでイベントループ・DBプール・HTTPクライアント・メトリクス出力を用意する"""
+    from app.workers.runtime import start_runtime
+
+    start_runtime()
+    _start_metrics_server()
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    global _metrics_server
+    from app.workers.runtime import stop_runtime
+    from app.workers.tasks import release_running_run_keys
+
+    release_running_run_keys()
+    stop_runtime()
+    if _metrics_server is not None:
+        _metrics_server.shutdown()
+        _metrics_server.server_close()
+        _metrics_server = None
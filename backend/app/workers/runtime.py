@@ -0,0 +1,82 @@
+"""
+Celery ワーカープロセスごとの非同期ランタイム
+- 専用スレッドで1つのイベントループを動かし続ける（タスクごとに asyncio.run しない）
+- DBエンジン（app.database）・共有HTTPクライアント・リーダーリースはこのループ上で使い回す
+worker_process_init で開始し、worker_process_shutdown で停止する。
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def start_runtime() -> asyncio.AbstractEventLoop:
+    """ランタイムを開始する（開始済みなら既存のループを返す）"""
+    global _loop, _thread
+    with _lock:
+        if _loop is not None and _thread is not None and _thread.is_alive():
+            return _loop
+
+        from app.core.http import reset_http_clients, start_http_clients
+        from app.database import engine
+
+        # fork 前に親プロセスで作られた接続・クライアントは引き継がない
+        engine.sync_engine.dispose(close=False)
+        reset_http_clients()
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=_run_loop, args=(loop,), name="autobuzz-runtime", daemon=True)
+        thread.start()
+        _loop, _thread = loop, thread
+
+    asyncio.run_coroutine_threadsafe(start_http_clients(), loop).result()
+    logger.info("ワーカーランタイムを開始しました")
+    return loop
+
+
+def run(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """コルーチンをランタイムのループで実行し、結果を待って返す（未開始なら開始する）"""
+    loop = _loop if _thread is not None and _thread.is_alive() else None
+    if loop is None:
+        loop = start_runtime()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def _shutdown() -> None:
+    from app.core.http import close_http_clients
+    from app.database import close_sqlite_writer, engine
+    from app.services.coordination import release_leases
+
+    await release_leases()
+    await close_sqlite_writer()
+    await close_http_clients()
+    await engine.dispose()
+
+
+def stop_runtime(timeout: float = 10.0) -> None:
+    """接続を閉じてループを停止する"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None or thread is None or not thread.is_alive():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"ワーカーランタイム終了処理エラー: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    loop.close()
+    logger.info("ワーカーランタイムを停止しました")
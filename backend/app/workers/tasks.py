@@ -1,79 +1,171 @@
+import logging
+
+from celery import chord
+
+from app.config import settings
 from app.workers.celery_app import celery_app
+from app.workers.runtime import run
+
+logger = logging.getLogger(__name__)
+
+AUTOPILOT_QUEUE = "autopilot"
+AUTOPILOT_PRO_QUEUE = "autopilot_pro"
+# Redis ブローカーの優先度（小さいほど先に処理される）
+PRO_PRIORITY = 0
+DEFAULT_PRIORITY = 6
+
+_redis = None
 
 
 @celery_app.task(name="app.workers.tasks.collect_buzz_task")
 def collect_buzz_task():
     """バズ投稿を定期的に収集するタスク"""
-    import asyncio
     from app.services.buzz_collector import collect_buzz_from_x
 
-    async def _run():
-        posts = await collect_buzz_from_x(["トレンド", "話題", "バズ"])
-        return len(posts)
-
-    result = asyncio.run(_run())
-    return {"collected": result}
+    posts = run(collect_buzz_from_x(["トレンド", "話題", "バズ"]))
+    return {"collected": len(posts)}
 
 
 @celery_app.task(name="app.workers.tasks.auto_post_task")
 def auto_post_task():
-    """スケジュールに基づいて自動投稿を実行するタスク"""
-    import asyncio
-    from datetime import datetime, timezone, timedelta
-
-    async def _run():
-        from sqlalchemy import select
-        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-        from app.config import settings
-        from app.models.schedule import Schedule
-        from app.models.sns_account import SnsAccount
-        from app.models.post import Post
-        from app.services.ai_generator import generate_post_content
-        from app.services.sns_poster import post_to_x, post_to_threads
-
-        engine = create_async_engine(settings.DATABASE_URL)
-        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-        jst = timezone(timedelta(hours=9))
-        now = datetime.now(jst)
-        current_time = now.time().replace(second=0, microsecond=0)
-
-        async with session_factory() as db:
-            result = await db.execute(
-                select(Schedule).where(Schedule.time == current_time)
-            )
-            schedules = result.scalars().all()
-
-            posted = 0
-            for schedule in schedules:
-                # Fetch user's SNS accounts
-                accounts_result = await db.execute(
-                    select(SnsAccount).where(SnsAccount.user_id == schedule.user_id)
-                )
-                accounts = accounts_result.scalars().all()
-
-                for account in accounts:
-                    content = await generate_post_content(platform=account.platform)
-
-                    if account.platform == "x":
-                        await post_to_x(content, account.access_token)
-                    elif account.platform == "threads":
-                        await post_to_threads(content, account.access_token)
-
-                    post = Post(
-                        user_id=schedule.user_id,
-                        platform=account.platform,
-                        content=content,
-                        status="posted",
-                        posted_at=now,
-                    )
-                    db.add(post)
-                    posted += 1
-
-                await db.commit()
-
-        await engine.dispose()
-        return posted
-
-    result = asyncio.run(_run())
-    return {"posted": result}
+    """
+    スケジュールに基づいて自動投稿を実行するタスク
+    API プロセスのスケジューラーと同じ協調処理（行単位の確保）を使うため、
+    beat と API レプリカが同時に動いていても各スケジュールは1回だけ実行される。
+    """
+    from app.services.auto_scheduler import check_and_run_scheduled
+
+    result = run(check_and_run_scheduled())
+    return {"executed": result}
+
+
+@celery_app.task(name="app.workers.tasks.dispatch_outbox_task")
+def dispatch_outbox_task():
+    """投稿アウトボックスの期限到来分を送信するタスク（API 内ディスパッチャーと併用しても二重送信しない）"""
+    from app.services.post_outbox import drain_outbox
+
+    return {"dispatched": run(drain_outbox())}
+
+
+# ─── サブタスクの冪等キー ───
+# 実行中は "running"（実行時間の上限程度で失効）、成功したら "done"（AUTOPILOT_RUN_KEY_TTL_SECONDS 保持）。
+# 失敗時・ワーカー停止時はキーを消し、acks_late による再配送や再投入で実行し直せるようにする。
+
+RUN_KEY_PREFIX = "autobuzz:autopilot:run:"
+RUN_KEY_RUNNING = "running"
+RUN_KEY_DONE = "done"
+
+# このプロセスで実行中の run_key（ワーカー停止時に解放する）
+_running_keys = set()
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        import redis
+
+        _redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=2.0)
+    return _redis
+
+
+def _claim_run_key(run_key: str) -> bool:
+    """冪等キーを実行中として確保する（処理済み・処理中なら False）。Redis に届かない場合は実行を優先する"""
+    global _redis
+    try:
+        claimed = bool(_get_redis().set(
+            RUN_KEY_PREFIX + run_key, RUN_KEY_RUNNING,
+            nx=True, ex=settings.AUTOPILOT_RUN_TIME_LIMIT_SECONDS + 60,
+        ))
+    except Exception as e:
+        logger.warning(f"冪等キーを確認できません（実行を継続）: {run_key} {e}")
+        _redis = None
+        return True
+    if claimed:
+        _running_keys.add(run_key)
+    return claimed
+
+
+def _finish_run_key(run_key: str, succeeded: bool) -> None:
+    """成功なら処理済みにし、失敗ならキーを消して再実行できるようにする"""
+    global _redis
+    _running_keys.discard(run_key)
+    try:
+        client = _get_redis()
+        if succeeded:
+            client.set(RUN_KEY_PREFIX + run_key, RUN_KEY_DONE, xx=True, ex=settings.AUTOPILOT_RUN_KEY_TTL_SECONDS)
+        else:
+            client.delete(RUN_KEY_PREFIX + run_key)
+    except Exception as e:
+        logger.warning(f"冪等キーを更新できません: {run_key} {e}")
+        _redis = None
+
+
+def release_running_run_keys() -> None:
+    """ワーカー停止時: 実行途中のキーを消す（acks_late で再配送された実行が重複扱いにならないように）"""
+    for run_key in list(_running_keys):
+        _finish_run_key(run_key, succeeded=False)
+
+
+@celery_app.task(name="app.workers.tasks.run_schedule_task", time_limit=settings.AUTOPILOT_RUN_TIME_LIMIT_SECONDS)
+def run_schedule_task(user_id: str, schedule_id: str, run_key: str):
+    """
+    1ユーザー・1スケジュール分の全自動投稿を実行するサブタスク。
+    同じ run_key の再配送・重複投入は1回だけ実行する（失敗した実行は再実行できる）。
+    失敗も結果として返す（chord を止めない）
+    """
+    from app.services.auto_scheduler import run_autopilot_for_user
+
+    if not _claim_run_key(run_key):
+        logger.info(f"処理済みまたは処理中のためスキップ: run_key={run_key}")
+        return {"run_key": run_key, "user_id": user_id, "status": "duplicate"}
+
+    try:
+        results = run(run_autopilot_for_user(user_id))
+    except Exception as e:
+        _finish_run_key(run_key, succeeded=False)
+        logger.error(f"自動投稿失敗: user={user_id}, schedule={schedule_id}, error={e}")
+        return {"run_key": run_key, "user_id": user_id, "status": "failed", "error": str(e)}
+
+    failed = sum(1 for r in results if r.get("status") == "error")
+    status = "failed" if results and failed == len(results) else "completed"
+    _finish_run_key(run_key, succeeded=status == "completed")
+    return {
+        "run_key": run_key,
+        "user_id": user_id,
+        "status": status,
+        "posts": len(results) - failed,
+        "errors": failed,
+    }
+
+
+@celery_app.task(name="app.workers.tasks.report_autopilot_runs")
+def report_autopilot_runs(results: list, dispatched: int):
+    """サブタスクの結果を集計してログに残す（chord のコールバック）"""
+    counts = {"completed": 0, "failed": 0, "duplicate": 0}
+    for result in results:
+        status = (result or {}).get("status", "failed")
+        counts[status] = counts.get(status, 0) + 1
+    logger.info(
+        f"自動投稿ティック完了: 投入={dispatched} 完了={counts['completed']} "
+        f"失敗={counts['failed']} 重複={counts['duplicate']}"
+    )
+    return {"dispatched": dispatched, **counts}
+
+
+def enqueue_scheduled_runs(runs: list):
+    """
+    確保済みの実行（auto_scheduler.DueRun）を (ユーザー, スケジュール) 単位のサブタスクとして投入する。
+    pro プランは専用キュー・高優先度。結果は chord で report_autopilot_runs に集約する。
+    """
+    header = []
+    for due in runs:
+        is_pro = due.plan_type == "pro"
+        header.append(run_schedule_task.signature(
+            (due.user_id, due.schedule_id, due.run_key),
+            queue=AUTOPILOT_PRO_QUEUE if is_pro else AUTOPILOT_QUEUE,
+            priority=PRO_PRIORITY if is_pro else DEFAULT_PRIORITY,
+            task_id=f"autopilot:{due.run_key}",
+        ))
+    if not header:
+        return None
+    return chord(header)(report_autopilot_runs.s(len(header)))
@@ -0,0 +1,143 @@
+"""
+SQLite プロファイルのベンチマーク
+- 一時ファイルの SQLite に対して、書き込み（クリック記録 + 投稿更新）と読み取り（ダッシュボード相当の集計）を
+  同時に流し、既定（PRAGMA なし・書き込みキューなし）と本番プロファイル（SQLITE_TUNED + SQLITE_SINGLE_WRITER）の
+  スループットを比較する
+
+使い方:
+  python bench_sqlite.py [--writers 8] [--readers 8] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import Base, SQLiteWriter, configure_sqlite
+import app.models  # noqa: F401 - モデルの登録のため
+from app.models import ClickLog, Post, ShortLink, User
+from app.services.schedule_clock import utcnow
+
+USERS = 10
+POSTS_PER_USER = 200
+
+
+async def _seed(sessionmaker) -> tuple:
+    async with sessionmaker() as db:
+        users, links, posts = [], [], []
+        for u in range(USERS):
+            user_id = str(uuid.uuid4())
+            users.append({"id": user_id, "email": f"bench{u}@example.com", "password_hash": "x"})
+            links.append({"id": str(uuid.uuid4()), "user_id": user_id, "original_url": "https://example.com",
+                          "short_code": f"bench{u}"})
+            posts += [{"id": str(uuid.uuid4()), "user_id": user_id, "platform": "x", "content": "bench",
+                       "status": "draft", "created_at": utcnow()} for _ in range(POSTS_PER_USER)]
+        await db.execute(insert(User), users)
+        await db.execute(insert(ShortLink), links)
+        await db.execute(insert(Post), posts)
+        await db.commit()
+    return [u["id"] for u in users], [link["id"] for link in links], [p["id"] for p in posts]
+
+
+async def run(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    tuned = profile == "tuned"
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        if tuned:
+            configure_sqlite(engine)
+        sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        user_ids, link_ids, post_ids = await _seed(sessionmaker)
+
+        # 本番プロファイルでは run_write と同じ書き込みタスクを通す（まとめてコミットされる）
+        sqlite_writer = SQLiteWriter(sessionmaker, settings.SQLITE_WRITE_BATCH) if tuned else None
+        counts = {"writes": 0, "reads": 0, "locked": 0}
+        latencies = []
+        deadline = time.perf_counter() + seconds
+
+        async def writer(index: int) -> None:
+            i = index
+            while time.perf_counter() < deadline:
+                i += writers
+                started = time.perf_counter()
+
+                async def _write(db) -> None:
+                    await db.execute(insert(ClickLog).values(
+                        id=str(uuid.uuid4()), link_id=link_ids[i % len(link_ids)], clicked_at=utcnow()))
+                    await db.execute(update(Post).where(Post.id == post_ids[i % len(post_ids)])
+                                     .values(status="queued"))
+
+                try:
+                    if sqlite_writer is not None:
+                        await sqlite_writer.submit(_write)
+                    else:
+                        async with sessionmaker() as db:
+                            await _write(db)
+                            await db.commit()
+                    counts["writes"] += 1
+                    latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    counts["locked"] += 1
+
+        async def reader(index: int) -> None:
+            i = index
+            while time.perf_counter() < deadline:
+                i += 1
+                user_id = user_ids[i % len(user_ids)]
+                try:
+                    async with sessionmaker() as db:
+                        await db.execute(select(func.count()).select_from(Post).where(Post.user_id == user_id))
+                        await db.execute(select(Post).where(Post.user_id == user_id)
+                                         .order_by(Post.created_at.desc(), Post.id.desc()).limit(50))
+                    counts["reads"] += 1
+                except OperationalError:
+                    counts["locked"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(writer(i) for i in range(writers)), *(reader(i) for i in range(readers)))
+        elapsed = time.perf_counter() - started
+        if sqlite_writer is not None:
+            commits = sqlite_writer.commits
+            await sqlite_writer.close()
+        else:
+            commits = counts["writes"]
+        await engine.dispose()
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "writes/s": round(counts["writes"] / elapsed, 1),
+        "reads/s": round(counts["reads"] / elapsed, 1),
+        "commits": commits,
+        "locked_errors": counts["locked"],
+        "write_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "write_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1) if latencies else None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite プロファイルのベンチマーク")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"=== SQLite ベンチマーク (writers={args.writers}, readers={args.readers}, {args.seconds}秒) ===")
+    for profile in ("default", "tuned"):
+        result = await run(profile, args.writers, args.readers, args.seconds)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
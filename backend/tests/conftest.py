@@ -0,0 +1,25 @@
+"""
+テスト共通設定
+- app.config の読み込み前に DATABASE_URL を一時ディレクトリの SQLite に向ける（開発用の autobuzz.db は触らない）
+- スケジューラー・アウトボックスの常駐ループ、短縮URLの先読みはテストから明示的に呼ぶため止めておく
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TEST_DB_DIR = tempfile.mkdtemp(prefix="autobuzz-test-")
+TEST_DB_PATH = os.path.join(TEST_DB_DIR, "autobuzz.db")
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
+os.environ["SCHEDULER_IN_PROCESS"] = "false"
+os.environ["OUTBOX_IN_PROCESS"] = "false"
+os.environ["LINK_CACHE_PRELOAD"] = "0"
+os.environ["CACHE_REDIS_ENABLED"] = "false"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
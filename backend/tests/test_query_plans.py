@@ -0,0 +1,263 @@
+"""
+主要クエリの実行計画テスト
+- 同梱の autobuzz.db（初期スキーマ）を一時ディレクトリにコピーし、alembic upgrade head を適用してからデータを投入する
+- API・スケジューラー・アウトボックス・クリック集計・ロールアップ圧縮を実際に呼び、発行された SELECT / UPDATE / DELETE を記録する
+- 記録したクエリを EXPLAIN し、インデックスを使わずテーブル全体を走査するものがあれば失敗とする
+- TEST_POSTGRES_DSN（postgresql+asyncpg://...）を設定した場合は同じクエリを Postgres でも確認する
+  （トランザクション内でテーブル作成・投入・EXPLAIN を行い、最後にロールバックする。
+    データ量が少なくても判定できるよう enable_seqscan=off で計画させる）
+"""
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from conftest import BACKEND_DIR, TEST_DB_PATH
+from app.core import create_access_token, hash_password
+from app.database import Base, engine
+from app.models import (
+    AffiliateAccount, AffiliateOffer, AffiliateRevenue, ClickDaily, ClickHourly, ClickLog, Genre, Post,
+    PostOutbox, Schedule, ShortLink, SnsAccount, User,
+)
+from app.services.click_buffer import click_buffer
+from app.services.click_rollup import compact_click_rollups, hour_bucket
+from app.services.auto_scheduler import claim_due_schedules
+from app.services.link_resolver import preload_top_links
+from app.services.post_outbox import claim_outbox_batch
+from app.services.schedule_clock import utcnow
+
+TABLES = set(Base.metadata.tables)
+POSTGRES_DSN = os.environ.get("TEST_POSTGRES_DSN")
+
+USERS = 20
+ROWS_PER_USER = 50
+PASSWORD = "plan-password"
+
+
+# ─── データ投入 ───
+
+def seed_rows() -> list:
+    """(モデル, 行) のリスト。先頭のユーザーがテスト用のログインユーザー"""
+    now = utcnow()
+    users, posts, links, clicks, hourly, daily = [], [], [], [], [], []
+    schedules, genres, accounts, offers, revenue, aff_accounts, outbox = [], [], [], [], [], [], []
+    for u in range(USERS):
+        user_id = str(uuid.uuid4())
+        users.append({
+            "id": user_id, "email": f"plan{u}@example.com",
+            "password_hash": hash_password(PASSWORD) if u == 0 else "x", "auto_post_enabled": u % 2 == 0,
+        })
+        for i in range(ROWS_PER_USER):
+            post_id = str(uuid.uuid4())
+            created_at = now - timedelta(minutes=i)
+            posts.append({"id": post_id, "user_id": user_id, "platform": "x", "content": "plan", "status": "draft", "created_at": created_at})
+            outbox.append({"id": str(uuid.uuid4()), "post_id": post_id, "user_id": user_id, "platform": "x",
+                           "status": "pending", "attempts": 0, "next_attempt_at": created_at})
+        for i in range(5):
+            link_id = str(uuid.uuid4())
+            links.append({"id": link_id, "user_id": user_id, "original_url": "https://example.com", "short_code": f"p{u}x{i}"})
+            for d in range(10):
+                at = now - timedelta(hours=d * 5)
+                clicks.append({"id": str(uuid.uuid4()), "link_id": link_id, "clicked_at": at})
+                hourly.append({"link_id": link_id, "hour": hour_bucket(at), "user_id": user_id, "clicks": 1})
+                daily.append({"link_id": link_id, "day": date.today() - timedelta(days=d), "user_id": user_id, "clicks": 1})
+        schedules += [{"id": str(uuid.uuid4()), "user_id": user_id, "time": f"{h:02d}:00", "frequency": "daily",
+                       "next_run_at": now + timedelta(hours=h)} for h in range(3)]
+        genres += [{"id": str(uuid.uuid4()), "user_id": user_id, "genre_name": f"g{i}", "keywords": "[]"} for i in range(3)]
+        accounts += [{"id": str(uuid.uuid4()), "user_id": user_id, "platform": p} for p in ("x", "threads")]
+        offers += [{"id": str(uuid.uuid4()), "user_id": user_id, "title": f"o{i}", "affiliate_url": "https://a"} for i in range(3)]
+        revenue += [{"id": str(uuid.uuid4()), "user_id": user_id, "amount": 1.0} for _ in range(5)]
+        aff_accounts.append({"id": str(uuid.uuid4()), "user_id": user_id, "platform": "a8", "tracking_id": "t"})
+
+    return [
+        (User, users), (Post, posts), (ShortLink, links), (ClickLog, clicks), (ClickHourly, hourly),
+        (ClickDaily, daily), (Schedule, schedules), (Genre, genres), (SnsAccount, accounts),
+        (AffiliateOffer, offers), (AffiliateRevenue, revenue), (AffiliateAccount, aff_accounts), (PostOutbox, outbox),
+    ]
+
+
+def _upgrade_head(sync_url: str) -> None:
+    """alembic upgrade head（env.py は DATABASE_URL を優先するため、実行中だけ外す）"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.set_main_option("sqlalchemy.url", sync_url)
+    saved = os.environ.pop("DATABASE_URL", None)
+    try:
+        command.upgrade(config, "head")
+    finally:
+        if saved is not None:
+            os.environ["DATABASE_URL"] = saved
+
+
+@pytest.fixture(scope="module")
+def seeded_db() -> list:
+    """初期スキーマにマイグレーションを適用してからデータを入れた SQLite（アプリの engine が指す DB）"""
+    shutil.copy(os.path.join(BACKEND_DIR, "autobuzz.db"), TEST_DB_PATH)
+    sync_url = f"sqlite:///{TEST_DB_PATH}"
+    _upgrade_head(sync_url)
+    rows = seed_rows()
+    sync_engine = create_engine(sync_url)
+    with sync_engine.begin() as conn:
+        for model, values in rows:
+            conn.execute(insert(model), values)
+    sync_engine.dispose()
+    return rows
+
+
+# ─── アプリのクエリを記録する ───
+
+class QueryRecorder:
+    """engine で実行された SELECT / UPDATE / DELETE を (呼び出し元の名前, 文, パラメータ, 元の式) で記録する"""
+
+    def __init__(self):
+        self.label = ""
+        self.queries = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "UPDATE", "DELETE"):
+            return
+        compiled = getattr(context, "compiled", None)
+        params = context.compiled_parameters[0] if compiled is not None and context.compiled_parameters else {}
+        self.queries.append((self.label, statement, parameters, compiled.statement if compiled is not None else None, params))
+
+
+@pytest.fixture(scope="module")
+def app_queries(seeded_db) -> list:
+    from app.main import app
+
+    users = dict(seeded_db)[User]
+    posts = dict(seeded_db)[Post]
+    links = dict(seeded_db)[ShortLink]
+    user_id = users[0]["id"]
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    recorder = QueryRecorder()
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+    try:
+        with TestClient(app) as client:
+            def get(path, **params):
+                recorder.label = f"GET {path}"
+                response = client.get(path, params=params, headers=headers, follow_redirects=False)
+                assert response.status_code < 400, (path, response.status_code, response.text)
+                return response
+
+            def call(name, func, *args):
+                recorder.label = name
+                return client.portal.call(func, *args)
+
+            first = get("/api/posts/", limit=20)
+            get("/api/posts/", limit=20, cursor=first.headers["X-Next-Cursor"])
+            get(f"/api/posts/{posts[10]['id']}")
+            get("/api/dashboard/stats")
+            get("/api/affiliate/stats")
+            get("/api/schedules/", limit=20)
+            get("/api/genres/", limit=20)
+            get("/api/affiliate/offers", limit=20)
+            get("/api/affiliate/accounts")
+            get("/api/links/", limit=20)
+            get("/api/sns/accounts")
+            get(f"/api/links/r/{links[0]['short_code']}")
+
+            recorder.label = "POST /api/auth/login"
+            response = client.post("/api/auth/login", json={"email": users[0]["email"], "password": PASSWORD})
+            assert response.status_code == 200, response.text
+
+            call("click_buffer.flush_all", click_buffer.flush_all)
+            call("preload_top_links", preload_top_links, 100)
+            call("claim_due_schedules", claim_due_schedules, 20)
+            call("claim_outbox_batch", claim_outbox_batch, 20)
+            call("compact_click_rollups", compact_click_rollups)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", recorder)
+
+    assert recorder.queries, "クエリが記録されていません"
+    return recorder.queries
+
+
+# ─── 判定 ───
+
+def _full_scans_sqlite(rows) -> list:
+    """SCAN <table>（インデックスを使った SEARCH ではない走査）を返す"""
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in TABLES:
+            scans.append(detail)
+    return scans
+
+
+def _full_scans_postgresql(plan) -> list:
+    scans = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        for child in node.get("Plans", []):
+            walk(child)
+
+    for entry in plan:
+        walk(entry["Plan"])
+    return scans
+
+
+def _report(failures: list) -> str:
+    return "\n".join(f"{label}: {', '.join(scans)}\n    {sql}" for label, sql, scans in failures)
+
+
+def test_sqlite_query_plans(app_queries):
+    conn = sqlite3.connect(TEST_DB_PATH)
+    failures = []
+    try:
+        for label, statement, parameters, _, _ in app_queries:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            scans = _full_scans_sqlite(rows)
+            if scans:
+                failures.append((label, statement, scans))
+    finally:
+        conn.close()
+    assert not failures, "テーブル全体を走査するクエリがあります:\n" + _report(failures)
+
+
+@pytest.mark.skipif(not POSTGRES_DSN, reason="TEST_POSTGRES_DSN が未設定")
+def test_postgresql_query_plans(seeded_db, app_queries):
+    async def _check() -> list:
+        pg_engine = create_async_engine(POSTGRES_DSN)
+        failures = []
+        try:
+            async with pg_engine.connect() as conn:
+                trans = await conn.begin()
+                try:
+                    await conn.run_sync(Base.metadata.create_all)
+                    for model, values in seeded_db:
+                        await conn.execute(insert(model), values)
+                    await conn.execute(text("ANALYZE"))
+                    await conn.execute(text("SET LOCAL enable_seqscan = off"))
+                    for label, _, _, clause, params in app_queries:
+                        if clause is None:
+                            continue
+                        # 値はリテラルで埋め込む（SQLite で記録したパラメータを Postgres 向けに描画し直す）
+                        bound = clause.params(params) if params else clause
+                        sql = str(bound.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+                        raw = (await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+                        plan = json.loads(raw) if isinstance(raw, str) else raw
+                        scans = _full_scans_postgresql(plan)
+                        if scans:
+                            failures.append((label, sql, scans))
+                finally:
+                    await trans.rollback()
+        finally:
+            await pg_engine.dispose()
+        return failures
+
+    failures = asyncio.run(_check())
+    assert not failures, "テーブル全体を走査するクエリがあります:\n" + _report(failures)
@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { api } from "@/lib/api";
+import { postStatusBadge, postStatusLabel } from "@/lib/post-status";
 
 interface Stats {
   total_posts: number;
@@ -90,8 +91,8 @@ export default function DashboardPage() {
                       {post.content}
                     </td>
                     <td>
-                      <span className={`badge ${post.status === "posted" ? "badge-success" : "badge-warning"}`}>
-                        {post.status === "posted" ? "投稿済み" : post.status === "draft" ? "下書き" : post.status}
+                      <span className={`badge ${postStatusBadge(post.status)}`}>
+                        {postStatusLabel(post.status)}
                       </span>
                     </td>
                     <td style={{ fontSize: 13, color: "var(--text-secondary)" }}>
@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { api } from "@/lib/api";
+import { postStatusBadge, postStatusLabel } from "@/lib/post-status";
 import Link from "next/link";
 
 interface TrendItem {
@@ -28,6 +29,8 @@ export default function PostsPage() {
   // 共通
   const [posts, setPosts] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // 手動モード
   const [generating, setGenerating] = useState(false);
@@ -44,7 +47,25 @@ export default function PostsPage() {
   const [runResult, setRunResult] = useState<any>(null);
 
   const load = () => {
-    api.getPosts().then(setPosts).catch(console.error).finally(() => setLoading(false));
+    api.getPosts()
+      .then((page) => {
+        setPosts(page.items);
+        setNextCursor(page.nextCursor);
+      })
+      .catch(console.error)
+      .finally(() => setLoading(false));
+  };
+
+  const loadMore = () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    api.getPosts(nextCursor)
+      .then((page) => {
+        setPosts((prev) => [...prev, ...page.items]);
+        setNextCursor(page.nextCursor);
+      })
+      .catch(console.error)
+      .finally(() => setLoadingMore(false));
   };
 
   const loadTrends = () => {
@@ -371,8 +392,8 @@ export default function PostsPage() {
                           {r.platform === "x" ? "𝕏" : "Threads"}
                         </span>
                         {r.genre && <span className="badge badge-warning" style={{ marginRight: 8, fontSize: 10 }}>{r.genre}</span>}
-                        <span className={`badge ${r.status === "posted" ? "badge-success" : r.status === "error" ? "badge-danger" : "badge-warning"}`} style={{ fontSize: 10 }}>
-                          {r.status === "posted" ? "投稿済み" : r.status === "error" ? "エラー" : "下書き"}
+                        <span className={`badge ${postStatusBadge(r.status)}`} style={{ fontSize: 10 }}>
+                          {postStatusLabel(r.status)}
                         </span>
                         <span style={{ marginLeft: 8 }}>{r.content}</span>
                       </div>
@@ -416,8 +437,8 @@ export default function PostsPage() {
                       <div style={{ whiteSpace: "pre-wrap", fontSize: 13, lineHeight: 1.5 }}>{post.content}</div>
                     </td>
                     <td>
-                      <span className={`badge ${post.status === "posted" ? "badge-success" : post.status === "pending" ? "badge-info" : "badge-warning"}`}>
-                        {post.status === "posted" ? "投稿済み" : post.status === "pending" ? "予約中" : "下書き"}
+                      <span className={`badge ${postStatusBadge(post.status)}`}>
+                        {postStatusLabel(post.status)}
                       </span>
                     </td>
                     <td style={{ fontSize: 13, color: "var(--text-secondary)", whiteSpace: "nowrap" }}>
@@ -428,6 +449,13 @@ export default function PostsPage() {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div style={{ display: "flex", justifyContent: "center", marginTop: 16 }}>
+                <button className="btn btn-secondary btn-sm" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore ? <span className="loading-spinner" style={{ width: 14, height: 14 }} /> : "もっと見る"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
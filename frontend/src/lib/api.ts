@@ -1,4 +1,6 @@
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+// 投稿一覧の1ページの件数（続きは「もっと見る」で取得）
+const POSTS_PAGE_SIZE = 20;
 
 class ApiClient {
   private token: string | null = null;
@@ -20,10 +22,7 @@ class ApiClient {
     return this.token;
   }
 
-  private async request<T>(
-    path: string,
-    options: RequestInit = {}
-  ): Promise<T> {
+  private async send(path: string, options: RequestInit = {}): Promise<Response> {
     const headers: Record<string, string> = {
       "Content-Type": "application/json",
       ...(options.headers as Record<string, string>),
@@ -43,11 +42,39 @@ class ApiClient {
       const error = await res.json().catch(() => ({ detail: "エラーが発生しました" }));
       throw new Error(error.detail || `HTTP ${res.status}`);
     }
+    return res;
+  }
 
+  private async request<T>(
+    path: string,
+    options: RequestInit = {}
+  ): Promise<T> {
+    const res = await this.send(path, options);
     if (res.status === 204) return {} as T;
     return res.json();
   }
 
+  // 一覧APIはページ単位で返るため、X-Next-Cursor が無くなるまで続きを取得して連結する
+  // 1ページ分と次ページのカーソル（X-Next-Cursor）を返す
+  private async requestPage<T>(path: string, cursor?: string | null): Promise<{ items: T[]; nextCursor: string | null }> {
+    const sep = path.includes("?") ? "&" : "?";
+    const query = cursor ? `${sep}cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await this.send(`${path}${query}`);
+    return { items: (await res.json()) as T[], nextCursor: res.headers.get("X-Next-Cursor") };
+  }
+
+  // 件数の少ない一覧（ジャンル・スケジュール・案件）だけに使う
+  private async requestAll<T>(path: string): Promise<T[]> {
+    const items: T[] = [];
+    let cursor: string | null = null;
+    do {
+      const page: { items: T[]; nextCursor: string | null } = await this.requestPage<T>(path, cursor);
+      items.push(...page.items);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return items;
+  }
+
   // Auth
   async register(email: string, password: string) {
     return this.request("/api/auth/register", {
@@ -92,7 +119,7 @@ class ApiClient {
 
   // Genres
   async getGenres() {
-    return this.request<any[]>("/api/genres/");
+    return this.requestAll<any>("/api/genres/");
   }
 
   async createGenre(genreName: string, keywords: string[]) {
@@ -107,8 +134,8 @@ class ApiClient {
   }
 
   // Posts
-  async getPosts() {
-    return this.request<any[]>("/api/posts/");
+  async getPosts(cursor?: string | null, limit = POSTS_PAGE_SIZE) {
+    return this.requestPage<any>(`/api/posts/?limit=${limit}`, cursor);
   }
 
   async generatePost(platform: string, genre?: string) {
@@ -124,7 +151,7 @@ class ApiClient {
 
   // Schedules
   async getSchedules() {
-    return this.request<any[]>("/api/schedules/");
+    return this.requestAll<any>("/api/schedules/");
   }
 
   async createSchedule(time: string, frequency: string) {
@@ -151,7 +178,7 @@ class ApiClient {
   }
 
   async getAffiliateOffers() {
-    return this.request<any[]>("/api/affiliate/offers");
+    return this.requestAll<any>("/api/affiliate/offers");
   }
 
   async createAffiliateOffer(title: string, affiliateUrl: string, genre?: string) {
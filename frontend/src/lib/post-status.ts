@@ -0,0 +1,18 @@
+// 投稿ステータスの表示名とバッジ（バックエンドの Post.status / 全自動投稿の結果に対応）
+const POST_STATUS: Record<string, { label: string; badge: string }> = {
+  draft: { label: "下書き", badge: "badge-warning" },
+  pending: { label: "予約中", badge: "badge-info" },
+  queued: { label: "送信待ち", badge: "badge-info" },
+  sending: { label: "送信中", badge: "badge-info" },
+  posted: { label: "投稿済み", badge: "badge-success" },
+  failed: { label: "失敗", badge: "badge-danger" },
+  error: { label: "エラー", badge: "badge-danger" },
+};
+
+export function postStatusLabel(status: string): string {
+  return POST_STATUS[status]?.label ?? status;
+}
+
+export function postStatusBadge(status: string): string {
+  return POST_STATUS[status]?.badge ?? "badge-warning";
+}